@@ -1,12 +1,44 @@
 import os
+import tempfile
 
 # ── Model paths (override via environment variables for Docker) ────────────────
 MODEL_PATH = os.getenv("MODEL_PATH", "models/lstm_petr4_final.keras")
 METADATA_PATH = os.getenv("METADATA_PATH", "models/model_metadata.json")
 
+# ── Registro de modelos (padrão + MODELS, com recarga a quente) ────────────────
+MODELS_DIR = os.getenv("MODELS_DIR", os.path.dirname(MODEL_PATH) or ".")
+# Modelos servidos além do padrão (MODEL_PATH): nomes de arquivo sem ".keras",
+# separados por vírgula; "*" carrega todos os *.keras de MODELS_DIR. Cada modelo
+# custa warm-up, memória, batcher, cache de resultados e séries de métricas próprios
+MODELS: list[str] = [name.strip() for name in os.getenv("MODELS", "").split(",") if name.strip()]
+MODEL_WATCH_ENABLED: bool = os.getenv("MODEL_WATCH_ENABLED", "true").lower() == "true"
+# Intervalo entre varreduras do diretório; um arquivo só é carregado depois de
+# aparecer igual (mtime/tamanho) em duas varreduras seguidas
+MODEL_WATCH_INTERVAL_S: float = float(os.getenv("MODEL_WATCH_INTERVAL_S", "10"))
+
+# ── Backend de inferência ──────────────────────────────────────────────────────
+# "keras" → TensorFlow/Keras | "numpy" → forward pass em NumPy puro (sem TF)
+INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "keras").lower()
+# Com o backend NumPy, confere as saídas contra o Keras na carga (exige TF instalado)
+NUMPY_BACKEND_VERIFY: bool = os.getenv("NUMPY_BACKEND_VERIFY", "false").lower() == "true"
+NUMPY_BACKEND_TOLERANCE: float = float(os.getenv("NUMPY_BACKEND_TOLERANCE", "1e-4"))
+# Pesos do backend NumPy exportados uma vez para um arquivo .npy plano e abertos
+# com memory-map: os workers compartilham as mesmas páginas ("" desativa)
+NUMPY_WEIGHTS_DIR = os.getenv("NUMPY_WEIGHTS_DIR", "data/weights")
+# Precisão da inferência: "float32" (padrão), "float64" (referência) ou "int8"
+# (pesos quantizados). float64/int8 exigem o backend NumPy; int8 só é servido com
+# relatório aprovado por `python -m app.services.precision` para a versão do modelo
+INFERENCE_PRECISION: str = os.getenv("INFERENCE_PRECISION", "float32").lower()
+# Afastamento máximo do MAPE (pontos percentuais) em relação à referência float64
+PRECISION_MAX_MAPE_DRIFT: float = float(os.getenv("PRECISION_MAX_MAPE_DRIFT", "0.05"))
+
 # ── Model hyperparameters (must match training) ────────────────────────────────
 LOOK_BACK: int = int(os.getenv("LOOK_BACK", "60"))
 
+# ── Vários workers (uvicorn --workers / WEB_CONCURRENCY) ───────────────────────
+# Diretório das métricas Prometheus em modo multiprocess (agregadas entre workers)
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
 # ── API settings ───────────────────────────────────────────────────────────────
 API_TITLE = "PETR4.SA LSTM Stock Price Predictor"
 API_DESCRIPTION = (
@@ -15,3 +47,132 @@ API_DESCRIPTION = (
     "Empresa padrão: Petrobras (PETR4.SA, B3)."
 )
 API_VERSION = "1.0.0"
+
+# ── Serialização das respostas ─────────────────────────────────────────────────
+# Caminho rápido opcional: resposta serializada uma única vez com orjson (ou
+# MessagePack via Accept), sem a revalidação do response_model pelo FastAPI
+FAST_RESPONSES: bool = os.getenv("FAST_RESPONSES", "false").lower() == "true"
+
+# ── Micro-batching de inferência ───────────────────────────────────────────────
+# Requisições concorrentes são agrupadas em um único forward pass do modelo.
+BATCHING_ENABLED: bool = os.getenv("BATCHING_ENABLED", "true").lower() == "true"
+BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS: float = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+# ── Cache de resultados de inferência ──────────────────────────────────────────
+# Janelas repetidas (mesmo conteúdo normalizado e mesma versão do modelo) são
+# respondidas sem forward pass; remoção LRU acima do limite de entradas
+RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "4096"))
+
+# ── Inicialização (warm-up) ────────────────────────────────────────────────────
+# Tamanhos de lote exercitados antes de a API ser marcada como pronta
+WARMUP_BATCH_SIZES: list[int] = [
+    int(size)
+    for size in os.getenv("WARMUP_BATCH_SIZES", f"1,{BATCH_MAX_SIZE}").split(",")
+    if size.strip()
+]
+WARMUP_ROUNDS: int = int(os.getenv("WARMUP_ROUNDS", "2"))
+
+# ── Execução fora do event loop ────────────────────────────────────────────────
+# Pool de threads para I/O bloqueante (yfinance) e executor dedicado à inferência
+IO_POOL_SIZE: int = int(os.getenv("IO_POOL_SIZE", "16"))
+INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "1"))
+
+# ── Controle de admissão (/predict*) ───────────────────────────────────────────
+# Capacidade (em unidades de trabalho) de cada pool: predição simples pesa 1,
+# forecast pesa `days`; com `mc_samples` (/predict e /predict/forecast) o peso é
+# multiplicado por ⌈mc_samples / ADMISSION_MC_SAMPLES_PER_UNIT⌉ e limitado à
+# capacidade do pool. Sem capacidade livre, a requisição espera em uma fila
+# limitada até ADMISSION_QUEUE_TIMEOUT_MS e depois recebe 503 com Retry-After.
+ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_PREDICT_CAPACITY: int = int(os.getenv("ADMISSION_PREDICT_CAPACITY", "64"))
+ADMISSION_FORECAST_CAPACITY: int = int(os.getenv("ADMISSION_FORECAST_CAPACITY", "120"))
+ADMISSION_BATCH_CAPACITY: int = int(os.getenv("ADMISSION_BATCH_CAPACITY", "4"))
+ADMISSION_MC_SAMPLES_PER_UNIT: int = max(1, int(os.getenv("ADMISSION_MC_SAMPLES_PER_UNIT", "32")))
+ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT_MS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "1000"))
+ADMISSION_RETRY_AFTER_S: int = int(os.getenv("ADMISSION_RETRY_AFTER_S", "1"))
+
+# ── Tabela pré-computada de predições (watchlist) ──────────────────────────────
+# Após cada fechamento, /predict/live e /predict/forecast dos símbolos da
+# watchlist passam a ser servidos de uma tabela em memória
+PREDICTION_TABLE_ENABLED: bool = os.getenv("PREDICTION_TABLE_ENABLED", "true").lower() == "true"
+PREDICTION_WATCHLIST: list[str] = [
+    symbol.strip()
+    for symbol in os.getenv("PREDICTION_WATCHLIST", "PETR4.SA").split(",")
+    if symbol.strip()
+]
+PREDICTION_TABLE_FORECAST_DAYS: int = int(os.getenv("PREDICTION_TABLE_FORECAST_DAYS", "30"))
+# Intervalo entre verificações de "tabela desatualizada" (novo pregão ou troca de modelo)
+PREDICTION_TABLE_CHECK_S: float = float(os.getenv("PREDICTION_TABLE_CHECK_S", "60"))
+# Símbolo sem dados até o último pregão (download falhou, papel suspenso) é
+# buscado de novo sozinho, com espera dobrando a partir de PREDICTION_TABLE_CHECK_S
+PREDICTION_TABLE_RETRY_MAX_S: float = float(os.getenv("PREDICTION_TABLE_RETRY_MAX_S", "1800"))
+
+# ── Jobs em background com vários workers ──────────────────────────────────────
+# Só o worker que detém o lock (flock) roda o scheduler da tabela — download da
+# watchlist e atualização do histórico local; os demais carregam o snapshot
+# publicado por ele. Os caminhos devem ser comuns aos workers de um mesmo host
+BACKGROUND_LOCK_FILE = os.getenv(
+    "BACKGROUND_LOCK_FILE", os.path.join(tempfile.gettempdir(), "lstm-api-background.lock")
+)
+PREDICTION_TABLE_SNAPSHOT = os.getenv(
+    "PREDICTION_TABLE_SNAPSHOT", os.path.join(tempfile.gettempdir(), "lstm-api-prediction-table.json")
+)
+
+# ── Predição em lote (POST /predict/batch) ─────────────────────────────────────
+BATCH_REQUEST_MAX_ITEMS: int = int(os.getenv("BATCH_REQUEST_MAX_ITEMS", "1000"))
+
+# ── Feed de predições via WebSocket (/predict/ws) ──────────────────────────────
+WS_REFRESH_INTERVAL_S: float = float(os.getenv("WS_REFRESH_INTERVAL_S", "5"))
+WS_MAX_SYMBOLS: int = int(os.getenv("WS_MAX_SYMBOLS", "50"))
+# Mensagens pendentes por conexão antes de descartar as mais antigas
+WS_QUEUE_SIZE: int = int(os.getenv("WS_QUEUE_SIZE", "100"))
+
+# ── Forecast (POST /predict/forecast) ──────────────────────────────────────────
+# Horizonte máximo de uma resposta JSON completa e de uma resposta em streaming
+FORECAST_MAX_DAYS: int = int(os.getenv("FORECAST_MAX_DAYS", "30"))
+FORECAST_STREAM_MAX_DAYS: int = int(os.getenv("FORECAST_STREAM_MAX_DAYS", "365"))
+
+# ── Intervalos por MC dropout (mc_samples em /predict e /predict/forecast) ─────
+# Máximo de passes estocásticos por requisição e quantis devolvidos por padrão
+MC_DROPOUT_MAX_SAMPLES: int = int(os.getenv("MC_DROPOUT_MAX_SAMPLES", "1000"))
+MC_DROPOUT_QUANTILES: list[float] = [
+    float(q) for q in os.getenv("MC_DROPOUT_QUANTILES", "0.05,0.5,0.95").split(",") if q.strip()
+]
+
+# ── Backtest (POST /predict/backtest) ──────────────────────────────────────────
+# Janelas por forward pass; em streaming, também o tamanho de cada bloco enviado
+BACKTEST_CHUNK_SIZE: int = int(os.getenv("BACKTEST_CHUNK_SIZE", "512"))
+
+# ── Mercado (B3) ───────────────────────────────────────────────────────────────
+MARKET_TIMEZONE = os.getenv("MARKET_TIMEZONE", "America/Sao_Paulo")
+# Horário a partir do qual o fechamento do pregão já está disponível (HH:MM)
+MARKET_CLOSE_TIME = os.getenv("MARKET_CLOSE_TIME", "18:00")
+
+# ── Fonte de preços ────────────────────────────────────────────────────────────
+# "yahoo" → Yahoo Finance | "local" → arquivos <SYMBOL>.csv (Date,Close) em PRICE_SOURCE_DIR
+PRICE_SOURCE: str = os.getenv("PRICE_SOURCE", "yahoo").lower()
+PRICE_SOURCE_DIR = os.getenv("PRICE_SOURCE_DIR", "data/prices")
+
+# ── Histórico local em disco (memory-mapped, append incremental) ───────────────
+HISTORY_STORE_ENABLED: bool = os.getenv("HISTORY_STORE_ENABLED", "false").lower() == "true"
+HISTORY_STORE_DIR = os.getenv("HISTORY_STORE_DIR", "data/history")
+# Primeira data baixada para símbolos ainda sem histórico local
+HISTORY_START_DATE = os.getenv("HISTORY_START_DATE", "2018-01-01")
+# Pregões já gravados baixados de novo a cada atualização: se mudaram (série
+# reajustada por proventos/desdobramento), o histórico inteiro é regravado
+HISTORY_OVERLAP_SESSIONS: int = int(os.getenv("HISTORY_OVERLAP_SESSIONS", "5"))
+
+# ── Cache de preços (Yahoo Finance) ────────────────────────────────────────────
+PRICE_CACHE_ENABLED: bool = os.getenv("PRICE_CACHE_ENABLED", "true").lower() == "true"
+PRICE_CACHE_MAX_ENTRIES: int = int(os.getenv("PRICE_CACHE_MAX_ENTRIES", "256"))
+# Janela que ainda não inclui o último pregão encerrado (fechamento não
+# publicado) fica em cache só por este prazo, para ser buscada de novo logo
+PRICE_CACHE_STALE_TTL_S: float = float(os.getenv("PRICE_CACHE_STALE_TTL_S", "300"))
+
+# ── Profiler por amostragem (GET /monitoring/profile) ──────────────────────────
+# Vazio desativa o endpoint (404); o token vai no header X-Profile-Token
+PROFILE_TOKEN: str = os.getenv("PROFILE_TOKEN", "")
+PROFILE_MAX_SECONDS: float = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
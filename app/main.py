@@ -1,14 +1,44 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST
 
-from app.config import API_DESCRIPTION, API_TITLE, API_VERSION, METADATA_PATH, MODEL_PATH
-from app.middleware.metrics import MetricsMiddleware
+from app.config import (
+    ADMISSION_ENABLED,
+    BACKGROUND_LOCK_FILE,
+    API_DESCRIPTION,
+    API_TITLE,
+    API_VERSION,
+    BATCH_MAX_SIZE,
+    BATCH_MAX_WAIT_MS,
+    BATCHING_ENABLED,
+    METADATA_PATH,
+    MODEL_PATH,
+    MODEL_WATCH_ENABLED,
+    MODEL_WATCH_INTERVAL_S,
+    MODELS,
+    MODELS_DIR,
+    PREDICTION_TABLE_CHECK_S,
+    PREDICTION_TABLE_ENABLED,
+    PREDICTION_TABLE_FORECAST_DAYS,
+    PREDICTION_TABLE_RETRY_MAX_S,
+    PREDICTION_TABLE_SNAPSHOT,
+    PREDICTION_WATCHLIST,
+    WARMUP_BATCH_SIZES,
+    WARMUP_ROUNDS,
+    WS_REFRESH_INTERVAL_S,
+)
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.metrics import MetricsMiddleware, mark_worker_dead, render_metrics
 from app.routers import health, monitoring, predict
-from app.services.model_service import ModelService
+from app.services.executor_service import shutdown_executors
+from app.services.leader import LeaderLock
+from app.services.model_registry import ModelRegistry
+from app.services.prediction_table import PredictionScheduler, PredictionTable
+from app.services.subscription_hub import SubscriptionHub
 
 # ── Logging ────────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -20,13 +50,58 @@ logger = logging.getLogger(__name__)
 
 # ── Lifespan (startup / shutdown) ──────────────────────────────────────────────
 
+async def _start_models(registry: ModelRegistry) -> None:
+    """Carrega e aquece os modelos em background; a API responde "degraded" até o fim."""
+    await registry.start(MODEL_WATCH_INTERVAL_S if MODEL_WATCH_ENABLED else None)
+    if not registry.ready:
+        logger.error("=== Default model failed to load — API stays degraded ===")
+        return
+    logger.info(
+        "=== API ready — models loaded and warmed up: %s ===", sorted(registry.services())
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("=== API startup — loading LSTM model ===")
-    app.state.model_service = ModelService(MODEL_PATH, METADATA_PATH)
-    logger.info("=== API ready — model loaded successfully ===")
+    logger.info("=== API startup — loading LSTM models in background ===")
+    registry = ModelRegistry(
+        MODELS_DIR,
+        MODEL_PATH,
+        METADATA_PATH,
+        WARMUP_BATCH_SIZES,
+        WARMUP_ROUNDS,
+        batching=(BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS) if BATCHING_ENABLED else None,
+        names=MODELS,
+    )
+    app.state.model_registry = registry
+    startup = asyncio.create_task(_start_models(registry))
+
+    app.state.prediction_table = PredictionTable()
+    scheduler = PredictionScheduler(
+        app.state.prediction_table,
+        registry,
+        PREDICTION_WATCHLIST if PREDICTION_TABLE_ENABLED else [],
+        PREDICTION_TABLE_FORECAST_DAYS,
+        PREDICTION_TABLE_CHECK_S,
+        # Um só worker baixa a watchlist e grava o histórico; o watcher de
+        # modelos continua em todos (cada worker troca os próprios modelos)
+        leader=LeaderLock(BACKGROUND_LOCK_FILE),
+        snapshot_path=PREDICTION_TABLE_SNAPSHOT,
+        max_retry_interval=PREDICTION_TABLE_RETRY_MAX_S,
+    )
+    scheduler.start()
+    app.state.subscription_hub = SubscriptionHub(
+        registry, app.state.prediction_table, WS_REFRESH_INTERVAL_S
+    )
     yield
     logger.info("=== API shutdown ===")
+    if not startup.done():
+        startup.cancel()
+    await app.state.subscription_hub.stop()
+    await scheduler.stop()
+    await registry.stop()
+    shutdown_executors()
+    mark_worker_dead()
 
 
 # ── Application ────────────────────────────────────────────────────────────────
@@ -42,6 +117,11 @@ app = FastAPI(
     redirect_slashes=False,
 )
 
+# Controle de admissão das rotas /predict* (503 + Retry-After sob sobrecarga);
+# registrado antes do CORS para que os 503 também levem os cabeçalhos CORS
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
 # CORS — permite acesso de qualquer origem (ajuste para produção se necessário)
 app.add_middleware(
     CORSMiddleware,
@@ -51,13 +131,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Middleware de métricas (Prometheus)
+# Middleware de métricas (Prometheus) — por fora, para contar também os 503
 app.add_middleware(MetricsMiddleware)
 
 # Endpoint /metrics no formato Prometheus (rota direta, sem mount)
 @app.get("/metrics", include_in_schema=False)
 async def metrics():
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 # ── Routers ────────────────────────────────────────────────────────────────────
 app.include_router(health.router)
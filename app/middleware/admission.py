@@ -0,0 +1,231 @@
+"""
+Controle de admissão das rotas de predição.
+
+Cada classe de endpoint tem um pool com capacidade em unidades de trabalho:
+
+- `predict`:  /predict e /predict/live (peso 1).
+- `forecast`: /predict/forecast (peso = `days`: um forward pass por dia).
+- `batch`:    /predict/batch e /predict/backtest (peso 1, capacidade baixa).
+
+Com `mc_samples` (/predict e /predict/forecast), o peso é multiplicado por
+⌈mc_samples / ADMISSION_MC_SAMPLES_PER_UNIT⌉: K passes estocásticos em lote
+custam como vários forward passes. O peso é limitado à capacidade do pool
+(uma requisição maior que o pool ainda roda, mas sozinha).
+
+Sem capacidade livre, a requisição entra em uma fila FIFO limitada e espera
+até o prazo (ADMISSION_QUEUE_TIMEOUT_MS); fila cheia ou prazo vencido viram
+um 503 imediato com Retry-After, em vez de mais latência para todo mundo.
+O pool fica ocupado até a resposta terminar, inclusive em streaming.
+
+As demais rotas (/health, /metrics, /monitoring, WebSocket) não passam por
+aqui e continuam respondendo sob sobrecarga. Os limites valem por worker.
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import (
+    ADMISSION_BATCH_CAPACITY,
+    ADMISSION_FORECAST_CAPACITY,
+    ADMISSION_MC_SAMPLES_PER_UNIT,
+    ADMISSION_PREDICT_CAPACITY,
+    ADMISSION_QUEUE_SIZE,
+    ADMISSION_QUEUE_TIMEOUT_MS,
+    ADMISSION_RETRY_AFTER_S,
+)
+from app.middleware.metrics import (
+    ADMISSION_IN_USE,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_QUEUE_WAIT,
+    ADMISSION_SHED,
+)
+
+# Rota → pool (paths exatos: o app usa redirect_slashes=False)
+_ROUTE_POOLS = {
+    "/predict": "predict",
+    "/predict/live": "predict",
+    "/predict/forecast": "forecast",
+    "/predict/batch": "batch",
+    "/predict/backtest": "batch",
+}
+
+_FORECAST_DEFAULT_DAYS = 5  # mesmo padrão de ForecastRequest.days
+
+# Rotas cujo peso depende do corpo → dias padrão (None: um único passo, sem `days`)
+_WEIGHTED_ROUTES = {
+    "/predict": None,
+    "/predict/forecast": _FORECAST_DEFAULT_DAYS,
+}
+
+
+class WeightedLimiter:
+    """Semáforo com pesos e fila FIFO limitada (um por pool, no event loop)."""
+
+    def __init__(self, name: str, capacity: int, max_queue: int) -> None:
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.max_queue = max(0, max_queue)
+        self._in_use = 0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+        self._in_use_gauge = ADMISSION_IN_USE.labels(pool=name)
+        self._queue_gauge = ADMISSION_QUEUE_DEPTH.labels(pool=name)
+        self._queue_wait = ADMISSION_QUEUE_WAIT.labels(pool=name)
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def clamp(self, weight: int) -> int:
+        """Peso efetivo: uma requisição maior que o pool ainda cabe sozinha nele."""
+        return min(max(1, weight), self.capacity)
+
+    async def acquire(self, weight: int, timeout: float) -> bool:
+        """Reserva `weight` unidades; False se a fila estiver cheia ou o prazo vencer."""
+        if not self._waiters and self._in_use + weight <= self.capacity:
+            self._take(weight)
+            return True
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_SHED.labels(pool=self.name, reason="queue_full").inc()
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (weight, future)
+        self._waiters.append(waiter)
+        self._queue_gauge.set(len(self._waiters))
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException as exc:
+            if future.done() and not future.cancelled():
+                # Liberado no mesmo instante do prazo/cancelamento: a vaga já é nossa
+                if isinstance(exc, asyncio.TimeoutError):
+                    self._queue_wait.observe(time.perf_counter() - started)
+                    return True
+                self.release(weight)
+                raise
+            self._waiters.remove(waiter)
+            self._queue_gauge.set(len(self._waiters))
+            # O fim da fila pode ter ficado livre para avançar
+            self._wake()
+            if isinstance(exc, asyncio.TimeoutError):
+                ADMISSION_SHED.labels(pool=self.name, reason="timeout").inc()
+                return False
+            raise
+        self._queue_wait.observe(time.perf_counter() - started)
+        return True
+
+    def release(self, weight: int) -> None:
+        self._in_use -= weight
+        self._in_use_gauge.set(self._in_use)
+        self._wake()
+
+    def _take(self, weight: int) -> None:
+        self._in_use += weight
+        self._in_use_gauge.set(self._in_use)
+
+    def _wake(self) -> None:
+        # FIFO estrito: um forecast longo na frente não é ultrapassado para sempre
+        while self._waiters and self._in_use + self._waiters[0][0] <= self.capacity:
+            weight, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._take(weight)
+            future.set_result(None)
+        self._queue_gauge.set(len(self._waiters))
+
+
+async def _buffer_body(receive: Receive) -> tuple[bytes, Receive]:
+    """Lê o corpo inteiro e devolve um `receive` que o reentrega à aplicação."""
+    messages: list[Message] = []
+    chunks: list[bytes] = []
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+
+    async def replay() -> Message:
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return b"".join(chunks), replay
+
+
+def _request_weight(body: bytes, default_days) -> int:
+    """
+    Peso = dias × ⌈mc_samples / ADMISSION_MC_SAMPLES_PER_UNIT⌉ (corpo inválido
+    pesa 1 e cai no 422). Em /predict sem `mc_samples`, nem decodifica o JSON.
+    """
+    if default_days is None and b"mc_samples" not in body:
+        return 1
+    try:
+        payload = json.loads(body)
+        days = int(payload.get("days", default_days)) if default_days is not None else 1
+        samples = int(payload.get("mc_samples") or 1)
+    except (ValueError, TypeError, AttributeError):
+        return 1
+    return max(1, days) * max(1, math.ceil(samples / ADMISSION_MC_SAMPLES_PER_UNIT))
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI que limita o trabalho em andamento nas rotas /predict*."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.timeout = ADMISSION_QUEUE_TIMEOUT_MS / 1000
+        self.limiters = {
+            name: WeightedLimiter(name, capacity, ADMISSION_QUEUE_SIZE)
+            for name, capacity in (
+                ("predict", ADMISSION_PREDICT_CAPACITY),
+                ("forecast", ADMISSION_FORECAST_CAPACITY),
+                ("batch", ADMISSION_BATCH_CAPACITY),
+            )
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        pool = _ROUTE_POOLS.get(scope["path"]) if scope["type"] == "http" else None
+        if pool is None or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[pool]
+        weight = 1
+        if scope["path"] in _WEIGHTED_ROUTES:
+            body, receive = await _buffer_body(receive)
+            weight = _request_weight(body, _WEIGHTED_ROUTES[scope["path"]])
+        weight = limiter.clamp(weight)
+
+        if not await limiter.acquire(weight, self.timeout):
+            await _overloaded(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(weight)
+
+
+async def _overloaded(send: Send) -> None:
+    body = json.dumps({"detail": "Server is overloaded, retry later."}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(ADMISSION_RETRY_AFTER_S).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,11 +1,26 @@
+import os
 import time
 
 import psutil
-from prometheus_client import Counter, Gauge, Histogram
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import PROMETHEUS_MULTIPROC_DIR
 
 # ── Prometheus Metrics Definitions ────────────────────────────────────────────
+# Com PROMETHEUS_MULTIPROC_DIR definido (vários workers), os valores ficam em
+# arquivos mmap por processo e são agregados no scrape; `multiprocess_mode`
+# define como cada gauge é combinado entre os workers vivos.
 
 REQUEST_COUNT = Counter(
     "http_requests_total",
@@ -23,7 +38,7 @@ REQUEST_DURATION = Histogram(
 PREDICTION_COUNT = Counter(
     "predictions_total",
     "Total de predições realizadas pela API",
-    ["prediction_type"],  # "manual", "live", "forecast"
+    ["prediction_type"],  # "manual", "batch", "live", "forecast", "backtest"
 )
 
 PREDICTION_DURATION = Histogram(
@@ -32,60 +47,362 @@ PREDICTION_DURATION = Histogram(
     buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0],
 )
 
+REQUEST_STAGE_DURATION = Histogram(
+    "request_stage_duration_seconds",
+    "Duração de cada etapa de uma requisição (soma por requisição)",
+    ["endpoint", "stage"],  # stage: "validation", "fetch_prices", "normalize",
+    # "inference", "dates", "serialization"
+    buckets=[0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+)
+
+MC_DROPOUT_SAMPLES = Histogram(
+    "mc_dropout_samples",
+    "Passes estocásticos (K) por requisição com intervalo MC dropout",
+    buckets=[10, 25, 50, 100, 250, 500, 1000],
+)
+
+MC_DROPOUT_DURATION = Histogram(
+    "mc_dropout_duration_seconds",
+    "Duração dos K passes estocásticos em lote (todos os dias, no forecast)",
+    ["prediction_type"],  # "manual", "forecast"
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0],
+)
+
 MODEL_LOAD_SUCCESS = Gauge(
     "model_loaded",
     "Indica se o modelo LSTM está carregado (1 = sim, 0 = não)",
+    multiprocess_mode="livemin",
+)
+
+MODEL_READY = Gauge(
+    "model_ready",
+    "Indica se o modelo terminou o warm-up e recebe tráfego (1 = sim, 0 = não)",
+    multiprocess_mode="livemin",
 )
 
-CPU_USAGE = Gauge(
-    "process_cpu_usage_percent",
-    "Uso de CPU pelo processo da API (%)",
+MODEL_STARTUP_PHASE_SECONDS = Gauge(
+    "model_startup_phase_seconds",
+    "Duração de cada fase da inicialização do modelo",
+    ["phase"],  # "import", "load", "trace", "warmup"
+    multiprocess_mode="livemax",
 )
 
-MEMORY_USAGE_BYTES = Gauge(
-    "process_memory_usage_bytes",
-    "Uso de memória RAM pelo processo da API (bytes)",
+MODEL_REGISTRY_MODELS = Gauge(
+    "model_registry_models",
+    "Número de modelos carregados no registro",
+    multiprocess_mode="livemax",
+)
+
+MODEL_RELOADS = Counter(
+    "model_reloads_total",
+    "Cargas de versões de modelo pelo registro (inicial e recarga a quente)",
+    ["result"],  # "loaded", "failed"
 )
 
 ACTIVE_REQUESTS = Gauge(
     "http_active_requests",
     "Número de requisições HTTP em andamento",
+    multiprocess_mode="livesum",
+)
+
+INFERENCE_BATCH_SIZE = Histogram(
+    "inference_batch_size",
+    "Número de janelas agrupadas em cada forward pass do micro-batching",
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256],
+)
+
+INFERENCE_QUEUE_WAIT = Histogram(
+    "inference_queue_wait_seconds",
+    "Tempo de espera na fila do micro-batching até o início do forward pass",
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5],
+)
+
+ADMISSION_IN_USE = Gauge(
+    "admission_in_use",
+    "Unidades de trabalho em andamento em cada pool do controle de admissão",
+    ["pool"],  # "predict", "forecast", "batch"
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requisições aguardando capacidade em cada pool do controle de admissão",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Espera na fila de admissão até a requisição ser admitida",
+    ["pool"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
+)
+
+ADMISSION_SHED = Counter(
+    "admission_shed_total",
+    "Requisições rejeitadas com 503 pelo controle de admissão",
+    ["pool", "reason"],  # reason: "queue_full", "timeout"
+)
+
+RESULT_CACHE_LOOKUPS = Counter(
+    "inference_result_cache_lookups_total",
+    "Consultas ao cache de resultados de inferência (janelas repetidas)",
+    ["model", "result"],  # result: "hit", "miss"
+)
+
+RESULT_CACHE_EVICTIONS = Counter(
+    "inference_result_cache_evictions_total",
+    "Entradas removidas do cache de resultados por LRU",
+    ["model"],
+)
+
+RESULT_CACHE_ENTRIES = Gauge(
+    "inference_result_cache_entries",
+    "Resultados de inferência em cache",
+    ["model"],
+    multiprocess_mode="livesum",
+)
+
+RESULT_CACHE_BYTES = Gauge(
+    "inference_result_cache_bytes",
+    "Memória estimada ocupada pelo cache de resultados",
+    ["model"],
+    multiprocess_mode="livesum",
+)
+
+PRICE_CACHE_HITS = Counter(
+    "price_cache_hits_total",
+    "Consultas a fetch_prices atendidas pelo cache em memória",
+)
+
+PRICE_CACHE_MISSES = Counter(
+    "price_cache_misses_total",
+    "Consultas a fetch_prices que exigiram download do Yahoo Finance",
+)
+
+PRICE_CACHE_EVICTIONS = Counter(
+    "price_cache_evictions_total",
+    "Entradas removidas do cache de preços",
+    ["reason"],  # "lru", "expired"
+)
+
+PRICE_CACHE_ENTRIES = Gauge(
+    "price_cache_entries",
+    "Número de janelas de preços em cache",
+    multiprocess_mode="livesum",
+)
+
+PRICE_FETCH_COALESCED_WAITERS = Gauge(
+    "price_fetch_coalesced_waiters",
+    "Chamadores extras atendidos pelo último download coalescido de fetch_prices",
+    multiprocess_mode="livemax",
+)
+
+PRICE_FETCH_COALESCED = Counter(
+    "price_fetch_coalesced_total",
+    "Chamadas a fetch_prices que reaproveitaram um download já em andamento",
+)
+
+PREDICTION_TABLE_ENTRIES = Gauge(
+    "prediction_table_entries",
+    "Símbolos com predição pré-computada na tabela",
+    multiprocess_mode="livemax",
+)
+
+PREDICTION_TABLE_UPDATED = Gauge(
+    "prediction_table_updated_timestamp_seconds",
+    "Instante (Unix) em que a entrada do símbolo foi calculada; idade = time() - valor",
+    ["symbol"],
+    multiprocess_mode="livemin",
+)
+
+PREDICTION_TABLE_LOOKUPS = Counter(
+    "prediction_table_lookups_total",
+    "Consultas à tabela de predições pré-computadas",
+    ["result"],  # "hit", "miss"
+)
+
+PREDICTION_TABLE_REFRESH_DURATION = Histogram(
+    "prediction_table_refresh_duration_seconds",
+    "Duração de um refresh completo da tabela (download + inferência da watchlist)",
+    buckets=[0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0],
+)
+
+WS_CONNECTIONS = Gauge(
+    "ws_connections",
+    "Conexões WebSocket abertas no feed de predições",
+    multiprocess_mode="livesum",
+)
+
+WS_SUBSCRIPTIONS = Gauge(
+    "ws_subscriptions",
+    "Assinaturas (conexão × símbolo) ativas no feed de predições",
+    multiprocess_mode="livesum",
+)
+
+WS_TOPICS = Gauge(
+    "ws_topics",
+    "Símbolos com loop de refresh ativo (ao menos um assinante)",
+    multiprocess_mode="livesum",
+)
+
+WS_FANOUT_LATENCY = Histogram(
+    "ws_fanout_latency_seconds",
+    "Tempo entre a publicação de uma atualização e o envio a cada assinante",
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0],
+)
+
+WS_DROPPED_MESSAGES = Counter(
+    "ws_dropped_messages_total",
+    "Mensagens descartadas porque a fila de um assinante lento estava cheia",
+)
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "executor_queue_depth",
+    "Tarefas aguardando uma thread livre no executor",
+    ["pool"],  # "io", "inference"
+    multiprocess_mode="livesum",
 )
 
+EXECUTOR_QUEUE_WAIT = Histogram(
+    "executor_queue_wait_seconds",
+    "Tempo entre a submissão de uma tarefa e o início da execução",
+    ["pool"],
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+)
+
+
+# ── System metrics (coletadas no momento do scrape) ─────────────────────────────
+
+class SystemMetricsCollector:
+    """
+    Collector customizado: CPU e memória são lidas quando o Prometheus faz o
+    scrape de /metrics, e não no caminho de cada requisição.
+    """
+
+    def __init__(self) -> None:
+        self._process = psutil.Process()
+
+    def _workers(self) -> list[psutil.Process]:
+        """Este processo ou, em modo multiprocess, todos os workers irmãos."""
+        if not PROMETHEUS_MULTIPROC_DIR:
+            return [self._process]
+        try:
+            parent = self._process.parent()
+            cmdline = self._process.cmdline()
+            siblings = [p for p in parent.children() if p.cmdline() == cmdline] if parent else []
+        except psutil.Error:
+            siblings = []
+        return siblings or [self._process]
+
+    def collect(self):
+        cpu = GaugeMetricFamily(
+            "process_cpu_usage_percent",
+            "Uso de CPU pelo processo da API (%)",
+        )
+        memory = GaugeMetricFamily(
+            "process_memory_usage_bytes",
+            "Uso de memória RAM pelo processo da API (bytes; soma dos workers)",
+        )
+        try:
+            cpu.add_metric([], psutil.cpu_percent(interval=None))
+            memory.add_metric([], sum(p.memory_info().rss for p in self._workers()))
+        except Exception:
+            return
+        yield cpu
+        yield memory
+
+
+SYSTEM_METRICS = SystemMetricsCollector()
+REGISTRY.register(SYSTEM_METRICS)
+
+
+def render_metrics() -> bytes:
+    """Exposição de /metrics: registro do processo ou agregado de todos os workers."""
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(SYSTEM_METRICS)
+    return generate_latest(registry)
+
+
+def mark_worker_dead() -> None:
+    """Remove os gauges `live*` deste worker da agregação (chamar no shutdown)."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
 
 # ── Middleware ─────────────────────────────────────────────────────────────────
 
-class MetricsMiddleware(BaseHTTPMiddleware):
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Template da rota atendida (ex: "/predict/live"), nunca o path bruto de uma
+    requisição sem rota — mantém a cardinalidade dos labels limitada às rotas
+    declaradas.
     """
-    Middleware que intercepta todas as requisições para:
-    - Registrar contagem e duração por endpoint/método/status.
-    - Manter métricas de utilização de CPU e memória atualizadas.
+    if scope.get("route") is None and not _matches_any_route(scope):
+        return UNMATCHED_ROUTE
+
+    # O path de uma requisição roteada só varia nos path params: troca cada
+    # segmento pelo nome do parâmetro correspondente.
+    path = scope["path"]
+    params = scope.get("path_params")
+    if params:
+        names = {str(value): f"{{{name}}}" for name, value in params.items()}
+        path = "/".join(names.get(segment, segment) for segment in path.split("/"))
+    return path
+
+
+def _matches_any_route(scope: Scope) -> bool:
+    # Versões do Starlette que não gravam a rota atendida no scope
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return True
+    return False
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro que intercepta todas as requisições HTTP para:
+    - Registrar contagem e duração por rota/método/status.
     - Rastrear requisições ativas simultâneas.
+
+    CPU e memória ficam a cargo do `SystemMetricsCollector`.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-        method = request.method
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
         ACTIVE_REQUESTS.inc()
         start = time.perf_counter()
 
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         finally:
             ACTIVE_REQUESTS.dec()
-
-        duration = time.perf_counter() - start
-        status = str(response.status_code)
-
-        REQUEST_COUNT.labels(method=method, endpoint=path, status_code=status).inc()
-        REQUEST_DURATION.labels(method=method, endpoint=path).observe(duration)
-
-        # Atualiza métricas de sistema (leve, sem bloqueio de I/O)
-        try:
-            CPU_USAGE.set(psutil.cpu_percent(interval=None))
-            MEMORY_USAGE_BYTES.set(psutil.Process().memory_info().rss)
-        except Exception:
-            pass
-
-        return response
+            duration = time.perf_counter() - start
+            endpoint = route_template(scope)
+            REQUEST_COUNT.labels(
+                method=method, endpoint=endpoint, status_code=str(status_code)
+            ).inc()
+            REQUEST_DURATION.labels(method=method, endpoint=endpoint).observe(duration)
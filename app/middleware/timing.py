@@ -0,0 +1,115 @@
+"""
+Tempo por etapa de cada requisição, por endpoint.
+
+`TimedRoute` (route_class dos routers) marca o início do handler, a entrada
+e a saída da função do endpoint. Assim separa a validação (leitura do corpo
++ Pydantic, antes do endpoint) da serialização (validação do response_model
++ JSON, depois dele). Dentro do endpoint, `stage("nome")` mede as etapas
+intermediárias (busca de preços, normalização, inferência, datas).
+
+As marcas da requisição vivem em um contextvar, propagado também para os
+executores (`run_io`/`run_inference`). Fora de uma requisição (warm-up,
+scheduler, task do micro-batching, corpo de respostas em streaming) `stage`
+não registra nada.
+"""
+
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.middleware.metrics import REQUEST_STAGE_DURATION, route_template
+
+_MARKS: ContextVar[Optional["_Marks"]] = ContextVar("request_marks", default=None)
+
+
+class _Marks:
+    """Marcas de tempo e durações acumuladas por etapa de uma requisição."""
+
+    __slots__ = ("entered", "returned", "stages")
+
+    def __init__(self) -> None:
+        self.entered: Optional[float] = None
+        self.returned: Optional[float] = None
+        self.stages: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Soma a duração do bloco à etapa `name` da requisição corrente.
+
+    Etapas repetidas (um forward pass por dia do forecast) acumulam e viram
+    uma única observação ao fim da requisição. Fora de requisições é no-op.
+    """
+    marks = _MARKS.get()
+    if marks is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        marks.add(name, time.perf_counter() - t0)
+
+
+def _mark_endpoint(endpoint: Callable) -> Callable:
+    """Envolve o endpoint async para marcar entrada e saída (idempotente)."""
+    if getattr(endpoint, "__timed_endpoint__", False) or not asyncio.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        marks = _MARKS.get()
+        if marks is not None:
+            marks.entered = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            if marks is not None:
+                marks.returned = time.perf_counter()
+
+    wrapper.__timed_endpoint__ = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute que registra em REQUEST_STAGE_DURATION as etapas de cada requisição."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs) -> None:
+        super().__init__(path, _mark_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Response]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            marks = _Marks()
+            token = _MARKS.set(marks)
+            started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                finished = time.perf_counter()
+                _MARKS.reset(token)
+                if marks.entered is None:
+                    # Corpo inválido (422): a requisição não passou da validação
+                    marks.add("validation", finished - started)
+                else:
+                    marks.add("validation", marks.entered - started)
+                    if marks.returned is not None:
+                        marks.add("serialization", finished - marks.returned)
+                # Mesmo label de http_request_duration_seconds (path completo, com prefixo)
+                endpoint = route_template(request.scope)
+                for name, seconds in marks.stages.items():
+                    REQUEST_STAGE_DURATION.labels(endpoint=endpoint, stage=name).observe(seconds)
+
+        return timed_handler
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Response
 
 from app.schemas.prediction import HealthResponse
 
@@ -36,19 +36,22 @@ async def root():
     summary="Verificação de saúde da API",
     tags=["Health"],
 )
-async def health_check(request: Request):
+async def health_check(request: Request, response: Response):
     """
     Retorna o status de saúde da API.
 
-    - **healthy**: modelo carregado e API pronta.
-    - **degraded**: API iniciada mas modelo ainda não disponível.
+    - **healthy**: modelo carregado, aquecido e API pronta (HTTP 200).
+    - **degraded**: API iniciada mas modelo ainda carregando/aquecendo (HTTP 503),
+      para que load balancers não roteiem tráfego para um pod frio.
     """
-    model_loaded = (
-        hasattr(request.app.state, "model_service")
-        and request.app.state.model_service.model is not None
-    )
+    registry = getattr(request.app.state, "model_registry", None)
+    model_svc = registry.default if registry is not None else None
+    model_loaded = model_svc is not None and model_svc.model is not None
+    ready = model_svc is not None and model_svc.ready
+    if not ready:
+        response.status_code = 503
     return HealthResponse(
-        status="healthy" if model_loaded else "degraded",
+        status="healthy" if ready else "degraded",
         model_loaded=model_loaded,
         timestamp=datetime.utcnow().isoformat() + "Z",
     )
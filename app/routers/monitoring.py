@@ -1,8 +1,15 @@
+import asyncio
+import hmac
 import os
 from datetime import datetime
+from typing import Optional
 
 import psutil
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from app.config import PROFILE_MAX_SECONDS, PROFILE_TOKEN
+from app.services.profiler import ProfilerBusy, collapse, sample_stacks
 
 router = APIRouter()
 
@@ -20,7 +27,8 @@ async def monitoring_stats(request: Request):
     process = psutil.Process()
     mem = process.memory_info()
 
-    model_svc = getattr(request.app.state, "model_service", None)
+    registry = getattr(request.app.state, "model_registry", None)
+    model_svc = registry.default if registry is not None else None
     model_loaded = model_svc is not None and model_svc.model is not None
 
     return {
@@ -36,10 +44,17 @@ async def monitoring_stats(request: Request):
         "model": {
             "loaded": model_loaded,
             "load_time_ms": model_svc.load_time_ms if model_loaded else None,
+            "ready": model_svc is not None and model_svc.ready,
+            "startup_phases_ms": model_svc.startup_phases_ms if model_svc else {},
+            "name": model_svc.name if model_svc else None,
+            "version": model_svc.version if model_svc else None,
         },
         "monitoring_endpoints": {
             "prometheus_metrics": "/metrics",
             "model_info": "/monitoring/model/info",
+            "models": "/monitoring/models",
+            "prediction_table": "/monitoring/predictions",
+            "profile": "/monitoring/profile",
         },
     }
 
@@ -47,14 +62,25 @@ async def monitoring_stats(request: Request):
 @router.get(
     "/model/info",
     summary="Metadados e performance do modelo LSTM",
-    description="Retorna arquitetura, hiperparâmetros, métricas de teste e informações de treinamento.",
+    description=(
+        "Retorna arquitetura, hiperparâmetros, métricas de teste e informações de "
+        "treinamento do modelo padrão ou do modelo `?model=nome[@versão]`."
+    ),
     tags=["Monitoring"],
 )
-async def model_info(request: Request):
-    model_svc = request.app.state.model_service
+async def model_info(request: Request, model: Optional[str] = None):
+    registry = request.app.state.model_registry
+    try:
+        model_svc = registry.resolve(model)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+    except LookupError:
+        raise HTTPException(status_code=503, detail="Model is still loading.")
     meta = model_svc.metadata
 
     return {
+        "model": model_svc.name,
+        "version": model_svc.version,
         "symbol": meta.get("symbol"),
         "architecture": meta.get("architecture"),
         "look_back_days": meta.get("look_back"),
@@ -79,3 +105,91 @@ async def model_info(request: Request):
         "tf_version": meta.get("tf_version"),
         "model_load_time_ms": model_svc.load_time_ms,
     }
+
+
+@router.get(
+    "/models",
+    summary="Modelos carregados no registro",
+    description=(
+        "Lista os modelos servidos (nome, versão, símbolo, artefato e horário da carga). "
+        "Novas versões colocadas no diretório de modelos são carregadas e trocadas "
+        "sem reiniciar a API."
+    ),
+    tags=["Monitoring"],
+)
+async def list_models(request: Request):
+    registry = request.app.state.model_registry
+    return {
+        "default": registry.default_name,
+        "models": [
+            {
+                "name": svc.name,
+                "version": svc.version,
+                "symbol": svc.metadata.get("symbol"),
+                "path": svc.model_path,
+                "backend": svc.backend,
+                "precision": svc.precision,
+                "weights_bytes": getattr(svc.model, "weights_nbytes", None),
+                "ready": svc.ready,
+                "loaded_at": svc.loaded_at,
+            }
+            for _, svc in sorted(registry.services().items())
+        ],
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+@router.get(
+    "/predictions",
+    summary="Tabela de predições pré-computadas",
+    description=(
+        "Símbolos da watchlist com predição pré-computada: modelo, data do último "
+        "fechamento usado, idade da entrada e se ainda vale para o pregão corrente."
+    ),
+    tags=["Monitoring"],
+)
+async def prediction_table(request: Request):
+    table = request.app.state.prediction_table
+    return {
+        "session": table.session.isoformat() if table.session else None,
+        "refreshed_at": table.refreshed_at.isoformat() if table.refreshed_at else None,
+        "entries": table.staleness(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+@router.get(
+    "/profile",
+    summary="Profiler por amostragem (pilhas no formato flamegraph)",
+    description=(
+        "Amostra as pilhas de todas as threads do processo por `seconds` segundos "
+        f"(máximo {PROFILE_MAX_SECONDS:g}) e devolve as pilhas no formato *collapsed* "
+        "(`thread;arquivo:função;... amostras`), pronto para flamegraph.pl ou "
+        "speedscope. Desativado se `PROFILE_TOKEN` não estiver definido; exige o "
+        "token no header `X-Profile-Token`. Só um profile roda por vez (409). "
+        "Com vários workers, amostra apenas o processo que atendeu a requisição."
+    ),
+    response_class=PlainTextResponse,
+    tags=["Monitoring"],
+)
+async def profile(
+    request: Request,
+    seconds: float = Query(5.0, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    idle: bool = False,
+):
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = request.headers.get("x-profile-token", "")
+    if not hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid profile token.")
+
+    try:
+        stacks, rounds = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000, idle)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+    return PlainTextResponse(
+        collapse(stacks),
+        headers={"X-Profile-Samples": str(rounds), "X-Profile-Pid": str(os.getpid())},
+    )
@@ -1,44 +1,145 @@
+import asyncio
+import json
 import logging
+import time
 from datetime import datetime
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, HTTPException, Request
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from app.middleware.metrics import PREDICTION_COUNT, PREDICTION_DURATION
+from app.config import (
+    BACKTEST_CHUNK_SIZE,
+    BATCH_REQUEST_MAX_ITEMS,
+    FORECAST_MAX_DAYS,
+    LOOK_BACK,
+    WS_MAX_SYMBOLS,
+    WS_QUEUE_SIZE,
+)
+from app.middleware.metrics import PREDICTION_COUNT, PREDICTION_DURATION, WS_CONNECTIONS
+from app.middleware.timing import TimedRoute, stage
+from app.schemas.encoding import MSGPACK_RESPONSE, dumps, render
 from app.schemas.prediction import (
+    BacktestRequest,
+    BacktestResponse,
+    BatchPredictionItem,
+    BatchPredictionResponse,
     ForecastRequest,
     ForecastResponse,
     ForecastDay,
+    PredictBatchRequest,
     PredictLiveRequest,
     PredictManualRequest,
     PredictionResponse,
 )
-from app.services.data_service import fetch_prices, next_business_day
+from app.services.backtest import MetricsAccumulator, backtest_windows
+from app.services.data_service import fetch_history, fetch_prices, next_business_day
+from app.services.executor_service import run_inference, run_io
+from app.services.market_calendar import last_closed_session, session_dates_after
+from app.services.prediction_table import model_label
+from app.services.subscription_hub import Subscriber, SubscriptionHub
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 
 
+def _model_service(request: Request, model: Optional[str] = None, symbol: Optional[str] = None):
+    """
+    Modelo do registro que atende a requisição (por nome/versão ou símbolo).
+
+    404 para modelo desconhecido; 503 enquanto o modelo padrão carrega/aquece.
+    """
+    registry = getattr(request.app.state, "model_registry", None)
+    try:
+        if registry is None:
+            raise LookupError("Model registry not initialised.")
+        return registry.resolve(model, symbol)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+    except LookupError:
+        raise HTTPException(
+            status_code=503,
+            detail="Model is still loading; try again shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+
+def _precomputed(request: Request, symbol: str, model_svc) -> Optional[dict]:
+    """Entrada da tabela pré-computada para o símbolo e modelo, se válida."""
+    table = getattr(request.app.state, "prediction_table", None)
+    return table.lookup(symbol, model_label(model_svc)) if table is not None else None
+
+
+# ── Respostas em streaming ─────────────────────────────────────────────────────
+
+_NDJSON_CONTENT_TYPE = "application/x-ndjson"
+_SSE_CONTENT_TYPE = "text/event-stream"
+
+
+def _stream_format(request: Request) -> Optional[str]:
+    """Formato de streaming pedido no `Accept` (NDJSON ou SSE), se algum."""
+    accept = request.headers.get("accept", "")
+    if _NDJSON_CONTENT_TYPE in accept:
+        return _NDJSON_CONTENT_TYPE
+    if _SSE_CONTENT_TYPE in accept:
+        return _SSE_CONTENT_TYPE
+    return None
+
+
+def _stream_event(media_type: str, event: str, payload: dict) -> bytes:
+    """Uma linha NDJSON ou um evento SSE (`event:` + `data:`)."""
+    data = dumps(payload)
+    if media_type == _SSE_CONTENT_TYPE:
+        return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+    return data + b"\n"
+
+
+def _streaming_response(events: AsyncIterator[bytes], media_type: str) -> StreamingResponse:
+    # Sem buffering em proxies: cada evento sai assim que é produzido
+    return StreamingResponse(
+        events,
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _respond(request: Request, response):
+    """Modelo de resposta pelo caminho padrão ou já serializado (FAST_RESPONSES)."""
+    with stage("serialization"):
+        return render(request, response)
+
+
 # ── POST /predict ──────────────────────────────────────────────────────────────
 
 @router.post(
     "",
     response_model=PredictionResponse,
+    responses={200: {"content": MSGPACK_RESPONSE}},
     summary="Predição — entrada manual",
     description=(
         "Prediz o preço de fechamento do próximo dia útil a partir de "
         "**60 preços históricos fornecidos pelo usuário** (ordenados do mais antigo "
-        "ao mais recente)."
+        "ao mais recente).\n\n"
+        "Com `mc_samples`, também retorna um intervalo de incerteza por MC dropout "
+        "(K passes estocásticos em um único lote) nos `quantiles` pedidos."
     ),
 )
 async def predict_manual(request: Request, body: PredictManualRequest):
+    model_svc = _model_service(request, body.model, body.symbol)
     try:
-        model_svc = request.app.state.model_service
-        result = model_svc.predict(body.prices)
+        result = await model_svc.predict_async(body.prices)
+        uncertainty = None
+        if body.mc_samples:
+            uncertainty = await run_inference(
+                model_svc.predict_interval, body.prices, body.mc_samples, body.quantiles
+            )
 
         PREDICTION_COUNT.labels(prediction_type="manual").inc()
         PREDICTION_DURATION.observe(result["inference_time_ms"] / 1000)
 
-        return PredictionResponse(
+        response = PredictionResponse(
             symbol=body.symbol or "N/A",
             predicted_price=result["predicted_price"],
             predicted_ratio=result["predicted_ratio"],
@@ -48,8 +149,11 @@ async def predict_manual(request: Request, body: PredictManualRequest):
             prediction_for_date="N/A (data não fornecida)",
             last_data_date="N/A (data não fornecida)",
             inference_time_ms=result["inference_time_ms"],
+            uncertainty=uncertainty,
+            model=model_label(model_svc),
             timestamp=datetime.utcnow().isoformat() + "Z",
         )
+        return _respond(request, response)
     except ValueError as exc:
         raise HTTPException(status_code=422, detail=str(exc))
     except Exception as exc:
@@ -57,29 +161,151 @@ async def predict_manual(request: Request, body: PredictManualRequest):
         raise HTTPException(status_code=500, detail="Prediction failed.") from exc
 
 
+# ── POST /predict/batch ────────────────────────────────────────────────────────
+
+_BINARY_CONTENT_TYPE = "application/octet-stream"
+
+
+def _decode_binary_windows(payload: bytes) -> np.ndarray:
+    """Decodifica float32 little-endian contíguos em um array (N, LOOK_BACK)."""
+    frame_bytes = LOOK_BACK * 4
+    if not payload or len(payload) % frame_bytes != 0:
+        raise ValueError(
+            f"Binary body must contain N x {LOOK_BACK} little-endian float32 values "
+            f"({frame_bytes} bytes per window), got {len(payload)} bytes."
+        )
+    windows = np.frombuffer(payload, dtype="<f4").reshape(-1, LOOK_BACK)
+    if len(windows) > BATCH_REQUEST_MAX_ITEMS:
+        raise ValueError(
+            f"Batch too large: {len(windows)} windows (max {BATCH_REQUEST_MAX_ITEMS})."
+        )
+    return windows.astype(np.float64)
+
+
+@router.post(
+    "/batch",
+    response_model=BatchPredictionResponse,
+    responses={200: {"content": MSGPACK_RESPONSE}},
+    summary="Predição em lote (várias janelas)",
+    description=(
+        "Prediz o próximo fechamento para **N janelas de 60 preços** em um único "
+        "forward pass. Aceita JSON (`PredictBatchRequest`) ou `application/octet-stream` "
+        "com N × 60 valores float32 little-endian contíguos (modelo via `?model=`). "
+        "Os resultados seguem a "
+        "ordem da requisição; janelas inválidas retornam `status=\"error\"` sem "
+        "falhar o lote."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"$ref": "#/components/schemas/PredictBatchRequest"}
+                },
+                _BINARY_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+async def predict_batch(request: Request):
+    content_type = request.headers.get("content-type", "")
+
+    try:
+        # Corpo lido e validado à mão: conta como a etapa "validation"
+        with stage("validation"):
+            payload = await request.body()
+            if content_type.startswith(_BINARY_CONTENT_TYPE):
+                rows = _decode_binary_windows(payload)
+                symbols, model = None, request.query_params.get("model")
+            else:
+                body = PredictBatchRequest.model_validate_json(payload)
+                rows, symbols, model = body.windows, body.symbols, body.model
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    if symbols is not None and len(symbols) != len(rows):
+        raise HTTPException(
+            status_code=422,
+            detail=f"'symbols' has {len(symbols)} entries but 'windows' has {len(rows)}.",
+        )
+
+    model_svc = _model_service(request, model)
+    try:
+        windows, valid_idx, errors = model_svc.validate_windows(rows)
+
+        inference_ms = 0.0
+        predictions = {}
+        if len(windows):
+            predictions = await run_inference(model_svc.predict_windows, windows)
+            inference_ms = predictions.pop("inference_time_ms")
+            PREDICTION_COUNT.labels(prediction_type="batch").inc(len(windows))
+            PREDICTION_DURATION.observe(inference_ms / 1000)
+
+        results: list[BatchPredictionItem] = [None] * len(rows)
+        columns = {field: values.tolist() for field, values in predictions.items()}
+        for pos, idx in enumerate(valid_idx.tolist()):
+            results[idx] = BatchPredictionItem(
+                index=idx,
+                symbol=(symbols[idx] if symbols else None) or "N/A",
+                status="ok",
+                **{field: values[pos] for field, values in columns.items()},
+            )
+        for idx, message in errors.items():
+            results[idx] = BatchPredictionItem(
+                index=idx,
+                symbol=(symbols[idx] if symbols else None) or "N/A",
+                status="error",
+                error=message,
+            )
+
+        response = BatchPredictionResponse(
+            count=len(rows),
+            succeeded=len(windows),
+            failed=len(errors),
+            results=results,
+            inference_time_ms=inference_ms,
+            model=model_label(model_svc),
+            timestamp=datetime.utcnow().isoformat() + "Z",
+        )
+        return _respond(request, response)
+    except Exception as exc:
+        logger.exception("Error in predict_batch")
+        raise HTTPException(status_code=500, detail="Batch prediction failed.") from exc
+
+
 # ── POST /predict/live ─────────────────────────────────────────────────────────
 
 @router.post(
     "/live",
     response_model=PredictionResponse,
+    responses={200: {"content": MSGPACK_RESPONSE}},
     summary="Predição — dados ao vivo (Yahoo Finance)",
     description=(
         "Busca automaticamente os **últimos 60 dias de fechamento** do Yahoo Finance "
-        "para o símbolo informado e retorna a previsão do próximo dia útil."
+        "para o símbolo informado e retorna a previsão do próximo dia útil. Símbolos "
+        "da watchlist são servidos da tabela pré-computada após cada fechamento."
     ),
 )
 async def predict_live(request: Request, body: PredictLiveRequest):
+    model_svc = _model_service(request, body.model, body.symbol)
     try:
-        data = fetch_prices(body.symbol)
-        model_svc = request.app.state.model_service
-        result = model_svc.predict(data["prices"])
+        entry = _precomputed(request, body.symbol, model_svc)
+        if entry is not None:
+            data, result = entry["window"], entry["prediction"]
+        else:
+            with stage("fetch_prices"):
+                data = await run_io(fetch_prices, body.symbol)
+            result = await model_svc.predict_async(data["prices"])
+            PREDICTION_DURATION.observe(result["inference_time_ms"] / 1000)
 
         PREDICTION_COUNT.labels(prediction_type="live").inc()
-        PREDICTION_DURATION.observe(result["inference_time_ms"] / 1000)
 
-        pred_date = next_business_day(data["last_date"])
+        with stage("dates"):
+            pred_date = next_business_day(data["last_date"])
 
-        return PredictionResponse(
+        response = PredictionResponse(
             symbol=body.symbol,
             predicted_price=result["predicted_price"],
             predicted_ratio=result["predicted_ratio"],
@@ -89,8 +315,10 @@ async def predict_live(request: Request, body: PredictLiveRequest):
             prediction_for_date=pred_date,
             last_data_date=data["last_date"],
             inference_time_ms=result["inference_time_ms"],
+            model=model_label(model_svc),
             timestamp=datetime.utcnow().isoformat() + "Z",
         )
+        return _respond(request, response)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
@@ -101,48 +329,243 @@ async def predict_live(request: Request, body: PredictLiveRequest):
         ) from exc
 
 
+# ── WS /predict/ws ─────────────────────────────────────────────────────────────
+
+def _ws_symbols(value) -> list[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError("'symbols' must be a list of strings.")
+    return [symbol.strip().upper() for symbol in value if symbol.strip()]
+
+
+def _ws_handle(hub: SubscriptionHub, subscriber: Subscriber, action: str, symbols: list[str]) -> None:
+    if action == "subscribe":
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in subscriber.symbols]
+        if len(subscriber.symbols) + len(new) > WS_MAX_SYMBOLS:
+            raise ValueError(f"At most {WS_MAX_SYMBOLS} symbols per connection.")
+        for symbol in new:
+            hub.subscribe(subscriber, symbol)
+    elif action == "unsubscribe":
+        for symbol in symbols:
+            hub.unsubscribe(subscriber, symbol)
+    else:
+        raise ValueError("'action' must be 'subscribe' or 'unsubscribe'.")
+    subscriber.deliver({"type": "subscriptions", "symbols": sorted(subscriber.symbols)})
+
+
+async def _ws_sender(websocket: WebSocket, subscriber: Subscriber) -> None:
+    while True:
+        message, published_at = await subscriber.next_message()
+        await websocket.send_text(json.dumps(message))
+        subscriber.delivered(published_at)
+
+
+async def _ws_stop_sender(sender: asyncio.Task) -> None:
+    """Cancela e aguarda o sender (sem deixar exceção de task não recuperada)."""
+    sender.cancel()
+    try:
+        await sender
+    except (asyncio.CancelledError, WebSocketDisconnect):
+        pass
+    except Exception:
+        logger.warning("WebSocket sender failed", exc_info=True)
+
+
+@router.websocket("/ws")
+async def live_feed(websocket: WebSocket):
+    """
+    Feed de predições ao vivo para vários símbolos.
+
+    O cliente envia `{"action": "subscribe" | "unsubscribe", "symbols": [...]}`
+    (ou já conecta com `?symbols=PETR4.SA,VALE3.SA`) e recebe uma mensagem
+    `{"type": "prediction", ...}` — mesmos campos de /predict/live — sempre que
+    houver predição nova para um símbolo inscrito.
+    """
+    hub: SubscriptionHub = websocket.app.state.subscription_hub
+    await websocket.accept()
+    subscriber = Subscriber(WS_QUEUE_SIZE)
+    sender = asyncio.create_task(_ws_sender(websocket, subscriber))
+    receive: Optional[asyncio.Future] = None
+    WS_CONNECTIONS.inc()
+    try:
+        initial = websocket.query_params.get("symbols")
+        if initial:
+            try:
+                _ws_handle(hub, subscriber, "subscribe", _ws_symbols(initial))
+            except ValueError as exc:
+                subscriber.deliver({"type": "error", "detail": str(exc)})
+
+        while True:
+            receive = asyncio.ensure_future(websocket.receive_text())
+            await asyncio.wait((receive, sender), return_when=asyncio.FIRST_COMPLETED)
+            if not receive.done():
+                # O envio falhou (cliente caiu entre duas mensagens): encerra a conexão
+                receive.cancel()
+                break
+            raw = receive.result()
+            try:
+                request = json.loads(raw)
+                if not isinstance(request, dict):
+                    raise ValueError("Expected a JSON object.")
+                _ws_handle(hub, subscriber, request.get("action"), _ws_symbols(request.get("symbols", [])))
+            except ValueError as exc:
+                subscriber.deliver({"type": "error", "detail": str(exc)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if receive is not None:
+            receive.cancel()
+        await _ws_stop_sender(sender)
+        hub.unsubscribe_all(subscriber)
+        WS_CONNECTIONS.dec()
+
+
 # ── POST /predict/forecast ─────────────────────────────────────────────────────
 
+async def _stream_forecast(
+    model_svc,
+    body: ForecastRequest,
+    data: dict,
+    precomputed: Optional[list],
+    media_type: str,
+) -> AsyncIterator[bytes]:
+    """
+    Cabeçalho (`meta`), um evento por dia assim que previsto (`day`) e `end`.
+
+    Cada passo do forecast roda no executor de inferência; só a janela
+    corrente fica em memória, qualquer que seja o horizonte. Com
+    `mc_samples`, cada dia traz também as bandas MC dropout.
+    """
+    symbol, days = body.symbol, body.days
+    yield _stream_event(
+        media_type,
+        "meta",
+        {
+            "symbol": symbol,
+            "base_price": round(data["last_price"], 4),
+            "base_date": data["last_date"],
+            "forecast_days": days,
+            "model": model_label(model_svc),
+        },
+    )
+    try:
+        if precomputed is not None:
+            steps = iter(precomputed)
+        else:
+            steps = model_svc.forecast_steps(data["prices"], days)
+        bands = None
+        if body.mc_samples:
+            bands = model_svc.forecast_interval_steps(
+                data["prices"], days, body.mc_samples, body.quantiles
+            )
+        dates = session_dates_after(data["last_date"], days)
+        for day_date in dates:
+            if precomputed is not None:
+                item = next(steps, None)
+            else:
+                item = await run_inference(next, steps, None)
+            if item is None:
+                break
+            if bands is not None:
+                item = {**item, "quantiles": await run_inference(next, bands, None)}
+            yield _stream_event(media_type, "day", {**item, "date": day_date})
+        if bands is not None:
+            # Esgota o gerador para registrar o custo do MC dropout
+            await run_inference(next, bands, None)
+
+        PREDICTION_COUNT.labels(prediction_type="forecast").inc()
+        yield _stream_event(media_type, "end", {"forecast_days": days})
+    except Exception:
+        # Cabeçalhos já enviados: o erro vai como último evento do stream
+        logger.exception("Error streaming forecast for symbol '%s'", symbol)
+        yield _stream_event(media_type, "error", {"error": "Forecast failed."})
+
+
 @router.post(
     "/forecast",
     response_model=ForecastResponse,
     summary="Previsão multi-step (N dias à frente)",
     description=(
         "Busca os últimos 60 dias de histórico do Yahoo Finance e realiza **previsão "
-        "iterativa** para N dias úteis à frente (máximo 30). Cada preço previsto "
-        "alimenta a janela do dia seguinte."
+        f"iterativa** para N dias úteis à frente (máximo {FORECAST_MAX_DAYS}). Cada preço "
+        "previsto alimenta a janela do dia seguinte. Símbolos da watchlist são servidos "
+        "da tabela pré-computada após cada fechamento.\n\n"
+        "Com `Accept: application/x-ndjson` ou `Accept: text/event-stream`, cada dia é "
+        "enviado assim que previsto (evento `meta`, um `day` por dia e `end`) e o "
+        "horizonte pode chegar ao limite de streaming.\n\n"
+        "Com `mc_samples`, K trajetórias estocásticas (MC dropout) avançam em lockstep, "
+        "com um forward pass em lote por dia, e cada dia traz as bandas dos `quantiles`."
     ),
+    responses={200: {"content": {_NDJSON_CONTENT_TYPE: {}, _SSE_CONTENT_TYPE: {}, **MSGPACK_RESPONSE}}},
 )
 async def forecast(request: Request, body: ForecastRequest):
+    model_svc = _model_service(request, body.model, body.symbol)
+    media_type = _stream_format(request)
+    if media_type is None and body.days > FORECAST_MAX_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"'days' above {FORECAST_MAX_DAYS} requires a streaming response "
+                f"(Accept: {_NDJSON_CONTENT_TYPE} or {_SSE_CONTENT_TYPE})."
+            ),
+        )
+
     try:
-        data = fetch_prices(body.symbol)
-        model_svc = request.app.state.model_service
-        raw_forecasts = model_svc.forecast(data["prices"], body.days)
+        entry = _precomputed(request, body.symbol, model_svc)
+        precomputed = None
+        if entry is not None and len(entry["forecast"]) >= body.days:
+            data, precomputed = entry["window"], entry["forecast"][: body.days]
+        else:
+            with stage("fetch_prices"):
+                data = await run_io(fetch_prices, body.symbol)
+
+        if media_type is not None:
+            return _streaming_response(
+                _stream_forecast(model_svc, body, data, precomputed, media_type),
+                media_type,
+            )
+
+        raw_forecasts = precomputed
+        if raw_forecasts is None:
+            raw_forecasts = await run_inference(model_svc.forecast, data["prices"], body.days)
+        interval = None
+        if body.mc_samples:
+            interval = await run_inference(
+                model_svc.forecast_interval, data["prices"], body.days, body.mc_samples, body.quantiles
+            )
 
         PREDICTION_COUNT.labels(prediction_type="forecast").inc()
 
-        forecast_days: list[ForecastDay] = []
-        current_date = data["last_date"]
-        for item in raw_forecasts:
-            next_date = next_business_day(current_date)
-            forecast_days.append(
-                ForecastDay(
-                    day=item["day"],
-                    date=next_date,
-                    predicted_price=item["predicted_price"],
-                    expected_change_pct=item["expected_change_pct"],
-                )
+        with stage("dates"):
+            dates = session_dates_after(data["last_date"], len(raw_forecasts))
+
+        forecast_days = [
+            ForecastDay(
+                day=item["day"],
+                date=dates[day_idx],
+                predicted_price=item["predicted_price"],
+                expected_change_pct=item["expected_change_pct"],
+                quantiles=interval["days"][day_idx] if interval is not None else None,
             )
-            current_date = next_date
+            for day_idx, item in enumerate(raw_forecasts)
+        ]
 
-        return ForecastResponse(
+        response = ForecastResponse(
             symbol=body.symbol,
             base_price=round(data["last_price"], 4),
             base_date=data["last_date"],
             forecast_days=body.days,
             forecast=forecast_days,
+            uncertainty=(
+                {key: interval[key] for key in ("samples", "inference_time_ms", "samples_per_second")}
+                if interval is not None
+                else None
+            ),
+            model=model_label(model_svc),
             timestamp=datetime.utcnow().isoformat() + "Z",
         )
+        return _respond(request, response)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
@@ -151,3 +574,114 @@ async def forecast(request: Request, body: ForecastRequest):
             status_code=500,
             detail=f"Forecast failed for symbol '{body.symbol}': {exc}",
         ) from exc
+
+
+# ── POST /predict/backtest ─────────────────────────────────────────────────────
+
+
+def _backtest_points(dates: np.ndarray, actual: np.ndarray, predicted: np.ndarray) -> list[dict]:
+    return [
+        {"date": day, "actual_price": round(a, 4), "predicted_price": round(p, 4)}
+        for day, a, p in zip(
+            np.datetime_as_string(dates, unit="D").tolist(), actual.tolist(), predicted.tolist()
+        )
+    ]
+
+
+async def _stream_backtest(
+    model_svc, symbol: str, windows: np.ndarray, dates: np.ndarray, actual: np.ndarray
+) -> AsyncIterator[bytes]:
+    """Um objeto JSON por pregão, em blocos de BACKTEST_CHUNK_SIZE; a última linha traz as métricas."""
+    metrics = MetricsAccumulator()
+    inference_ms = 0.0
+    try:
+        for lo in range(0, len(windows), BACKTEST_CHUNK_SIZE):
+            hi = lo + BACKTEST_CHUNK_SIZE
+            t0 = time.perf_counter()
+            ratios, _ = await run_inference(model_svc.predict_ratios, windows[lo:hi])
+            inference_ms += (time.perf_counter() - t0) * 1000
+            predicted = ratios * windows[lo:hi, 0]
+            metrics.update(actual[lo:hi], predicted)
+            points = _backtest_points(dates[lo:hi], actual[lo:hi], predicted)
+            yield b"".join(dumps(point) + b"\n" for point in points)
+
+        PREDICTION_COUNT.labels(prediction_type="backtest").inc(metrics.count)
+        summary = {
+            "symbol": symbol,
+            "count": metrics.count,
+            "metrics": metrics.result(),
+            "inference_time_ms": round(inference_ms, 2),
+            "model": model_label(model_svc),
+        }
+        yield dumps({"summary": summary}) + b"\n"
+    except Exception:
+        # Cabeçalhos já enviados: o erro vai como última linha do stream
+        logger.exception("Error streaming backtest for symbol '%s'", symbol)
+        yield dumps({"error": "Backtest failed."}) + b"\n"
+
+
+@router.post(
+    "/backtest",
+    response_model=BacktestResponse,
+    summary="Backtest walk-forward (intervalo de datas)",
+    description=(
+        "Prevê cada pregão de `start_date` a `end_date` a partir dos 60 fechamentos "
+        "anteriores e compara com o fechamento real, com MAE/RMSE/MAPE/R² no formato "
+        "de `metrics_test`. Todas as janelas são montadas de uma vez e inferidas em "
+        "lotes. Com `Accept: application/x-ndjson` a resposta é enviada em streaming "
+        "(um pregão por linha, métricas na última linha `summary`)."
+    ),
+    responses={200: {"content": {_NDJSON_CONTENT_TYPE: {}, **MSGPACK_RESPONSE}}},
+)
+async def backtest(request: Request, body: BacktestRequest):
+    model_svc = _model_service(request, body.model, body.symbol)
+    end_date = body.end_date or last_closed_session()
+    if end_date < body.start_date:
+        raise HTTPException(status_code=422, detail="'end_date' must not be before 'start_date'.")
+
+    try:
+        with stage("fetch_prices"):
+            dates, closes = await run_io(fetch_history, body.symbol, body.start_date, end_date)
+        windows, target_dates, actual = backtest_windows(dates, closes, body.start_date, end_date)
+        if not len(windows):
+            raise ValueError(
+                f"No sessions with {LOOK_BACK} prior closes for '{body.symbol}' "
+                f"between {body.start_date} and {end_date}."
+            )
+
+        if _stream_format(request) == _NDJSON_CONTENT_TYPE:
+            return _streaming_response(
+                _stream_backtest(model_svc, body.symbol, windows, target_dates, actual),
+                _NDJSON_CONTENT_TYPE,
+            )
+
+        t0 = time.perf_counter()
+        ratios, _ = await run_inference(model_svc.predict_ratios, windows)
+        inference_ms = round((time.perf_counter() - t0) * 1000, 2)
+        # Sem arredondar: as métricas usam o valor previsto exato
+        predicted = ratios * windows[:, 0]
+
+        metrics = MetricsAccumulator()
+        metrics.update(actual, predicted)
+        PREDICTION_COUNT.labels(prediction_type="backtest").inc(metrics.count)
+
+        response = BacktestResponse(
+            symbol=body.symbol,
+            start_date=str(target_dates[0]),
+            end_date=str(target_dates[-1]),
+            count=metrics.count,
+            metrics=metrics.result(),
+            points=_backtest_points(target_dates, actual, predicted),
+            inference_time_ms=inference_ms,
+            model=model_label(model_svc),
+            timestamp=datetime.utcnow().isoformat() + "Z",
+        )
+        return _respond(request, response)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        logger.exception("Error in backtest for symbol '%s'", body.symbol)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Backtest failed for symbol '{body.symbol}': {exc}",
+        ) from exc
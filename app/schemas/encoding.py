@@ -0,0 +1,86 @@
+"""
+Serialização das respostas de predição (caminho rápido, opcional).
+
+Com FAST_RESPONSES=true:
+
+- `render` devolve a resposta já pronta em vez do modelo Pydantic: o modelo
+  montado (e validado) pelo handler é serializado uma única vez pelo núcleo
+  do Pydantic, sem a revalidação contra o `response_model` nem o
+  `jsonable_encoder` + `json.dumps` das versões do FastAPI que os fazem.
+  Clientes com `Accept: application/msgpack` recebem MessagePack.
+- `dumps` codifica os eventos NDJSON/SSE (dicts) com orjson.
+
+orjson e msgpack são opcionais: sem orjson os eventos saem pelo `json`; sem
+msgpack o pedido de MessagePack recebe JSON.
+
+Para respostas com modelo, orjson não entra: `model_dump()` + orjson é mais
+lento que o serializador do Pydantic (ver `benchmarks.micro --only encoding`).
+"""
+
+import json
+from typing import Optional
+
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config import FAST_RESPONSES
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: eventos pelo módulo json
+    orjson = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+_MSGPACK_ACCEPT = (MSGPACK_CONTENT_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+# Formato alternativo documentado no OpenAPI das rotas (só com o caminho rápido)
+MSGPACK_RESPONSE = {MSGPACK_CONTENT_TYPE: {}} if FAST_RESPONSES else {}
+
+_msgpack = None
+
+
+def _load_msgpack():
+    """Importa msgpack na primeira requisição que o pede (None se ausente)."""
+    global _msgpack
+    if _msgpack is None:
+        try:
+            import msgpack  # lazy import
+        except ImportError:
+            _msgpack = False
+        else:
+            _msgpack = msgpack
+    return _msgpack or None
+
+
+def negotiate(accept: str) -> str:
+    """Content-Type da resposta a partir do `Accept` (MessagePack só se instalado)."""
+    if any(media in accept for media in _MSGPACK_ACCEPT) and _load_msgpack() is not None:
+        return MSGPACK_CONTENT_TYPE
+    return JSON_CONTENT_TYPE
+
+
+def encode(model: BaseModel, media_type: str = JSON_CONTENT_TYPE) -> bytes:
+    """Bytes da resposta no formato pedido, sem revalidar o modelo."""
+    if media_type == MSGPACK_CONTENT_TYPE:
+        return _load_msgpack().packb(model.model_dump(), use_bin_type=True)
+    return model.__pydantic_serializer__.to_json(model)
+
+
+def render(request: Request, model: BaseModel, enabled: Optional[bool] = None):
+    """
+    Resposta do handler: o próprio `model` (caminho padrão do FastAPI) ou,
+    com FAST_RESPONSES, um `Response` já serializado no formato negociado.
+    """
+    if not (FAST_RESPONSES if enabled is None else enabled):
+        return model
+    media_type = negotiate(request.headers.get("accept", ""))
+    return Response(encode(model, media_type), media_type=media_type, headers={"Vary": "Accept"})
+
+
+def dumps(payload: dict, enabled: Optional[bool] = None) -> bytes:
+    """JSON de um evento de streaming (orjson com FAST_RESPONSES, se instalado)."""
+    if orjson is not None and (FAST_RESPONSES if enabled is None else enabled):
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
@@ -1,5 +1,27 @@
+from datetime import date
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Annotated, List, Optional
+
+from app.config import (
+    BATCH_REQUEST_MAX_ITEMS,
+    FORECAST_MAX_DAYS,
+    FORECAST_STREAM_MAX_DAYS,
+    MC_DROPOUT_MAX_SAMPLES,
+    MC_DROPOUT_QUANTILES,
+)
+
+Quantile = Annotated[float, Field(gt=0.0, lt=1.0)]
+
+# Seleção de modelo, comum a todas as rotas de predição
+ModelName = Annotated[
+    Optional[str],
+    Field(
+        description=(
+            "Modelo do registro (`nome` ou `nome@versão`, ex: lstm_petr4_best, se listado "
+            "em `MODELS`). Padrão: modelo do símbolo, se houver, senão o modelo principal"
+        ),
+    ),
+]
 
 
 # ── Requests ───────────────────────────────────────────────────────────────────
@@ -16,6 +38,22 @@ class PredictManualRequest(BaseModel):
         default="PETR4.SA",
         description="Símbolo da ação (apenas para identificação na resposta)",
     )
+    model: ModelName = None
+    mc_samples: Optional[int] = Field(
+        default=None,
+        ge=2,
+        le=MC_DROPOUT_MAX_SAMPLES,
+        description=(
+            "Ativa o intervalo de incerteza: K passes com o dropout de treino ligado "
+            "(MC dropout), executados em um único lote"
+        ),
+    )
+    quantiles: List[Quantile] = Field(
+        default_factory=lambda: list(MC_DROPOUT_QUANTILES),
+        min_length=1,
+        max_length=9,
+        description="Quantis das bandas de incerteza (usados só com `mc_samples`)",
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -33,6 +71,7 @@ class PredictLiveRequest(BaseModel):
         default="PETR4.SA",
         description="Símbolo da ação no Yahoo Finance (ex: PETR4.SA, VALE3.SA)",
     )
+    model: ModelName = None
 
     model_config = {
         "json_schema_extra": {"example": {"symbol": "PETR4.SA"}}
@@ -48,8 +87,27 @@ class ForecastRequest(BaseModel):
     days: int = Field(
         default=5,
         ge=1,
-        le=30,
-        description="Número de dias úteis a prever (1–30)",
+        le=FORECAST_STREAM_MAX_DAYS,
+        description=(
+            f"Número de dias úteis a prever (1–{FORECAST_MAX_DAYS}; até "
+            f"{FORECAST_STREAM_MAX_DAYS} com resposta em streaming)"
+        ),
+    )
+    model: ModelName = None
+    mc_samples: Optional[int] = Field(
+        default=None,
+        ge=2,
+        le=MC_DROPOUT_MAX_SAMPLES,
+        description=(
+            "Ativa o intervalo de incerteza: K passes com o dropout de treino ligado "
+            "(MC dropout), executados em um único lote"
+        ),
+    )
+    quantiles: List[Quantile] = Field(
+        default_factory=lambda: list(MC_DROPOUT_QUANTILES),
+        min_length=1,
+        max_length=9,
+        description="Quantis das bandas de incerteza (usados só com `mc_samples`)",
     )
 
     model_config = {
@@ -57,8 +115,76 @@ class ForecastRequest(BaseModel):
     }
 
 
+class PredictBatchRequest(BaseModel):
+    """Predição em lote: várias janelas de 60 preços em uma única requisição."""
+    windows: List[List[float]] = Field(
+        ...,
+        min_length=1,
+        max_length=BATCH_REQUEST_MAX_ITEMS,
+        description=(
+            "Lista de janelas, cada uma com exatamente 60 preços de fechamento "
+            "(do mais antigo ao mais recente). Janelas inválidas são reportadas "
+            "individualmente, sem falhar o lote."
+        ),
+    )
+    symbols: Optional[List[Optional[str]]] = Field(
+        default=None,
+        description="Símbolo de cada janela (opcional, mesma ordem de `windows`)",
+    )
+    model: ModelName = None
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "symbols": ["PETR4.SA", "VALE3.SA"],
+                "windows": [[28.5] * 30 + [30.0] * 30, [60.0] * 60],
+            }
+        }
+    }
+
+
+class BacktestRequest(BaseModel):
+    """Backtest walk-forward de um símbolo em um intervalo de datas."""
+    symbol: str = Field(
+        default="PETR4.SA",
+        description="Símbolo da ação no Yahoo Finance",
+    )
+    start_date: date = Field(description="Primeiro pregão previsto (YYYY-MM-DD)")
+    end_date: Optional[date] = Field(
+        default=None,
+        description="Último pregão previsto (padrão: último pregão encerrado)",
+    )
+    model: ModelName = None
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {"symbol": "PETR4.SA", "start_date": "2024-01-01", "end_date": "2024-06-28"}
+        }
+    }
+
+
 # ── Responses ──────────────────────────────────────────────────────────────────
 
+class QuantileBand(BaseModel):
+    """Preço em um quantil da distribuição MC dropout."""
+    quantile: float
+    predicted_price: float
+
+
+class MCDropoutCost(BaseModel):
+    """Custo dos passes estocásticos, para escolher K."""
+    samples: int = Field(description="Passes estocásticos (K)")
+    inference_time_ms: float = Field(description="Tempo total dos K passes em lote (ms)")
+    samples_per_second: float = Field(description="Amostras (ou trajetórias) por segundo")
+
+
+class UncertaintyEstimate(MCDropoutCost):
+    """Distribuição MC dropout do preço do próximo dia."""
+    mean_price: float
+    std_price: float
+    quantiles: List[QuantileBand]
+
+
 class PredictionResponse(BaseModel):
     """Resposta de uma predição de próximo dia."""
     symbol: str
@@ -70,6 +196,10 @@ class PredictionResponse(BaseModel):
     prediction_for_date: str = Field(description="Data alvo da previsão (próximo dia útil)")
     last_data_date: str = Field(description="Data do último dado utilizado")
     inference_time_ms: float = Field(description="Tempo de inferência do modelo (ms)")
+    uncertainty: Optional[UncertaintyEstimate] = Field(
+        default=None, description="Intervalo MC dropout (só com `mc_samples`)"
+    )
+    model: str = Field(description="Modelo que atendeu a requisição (nome@versão)")
     timestamp: str = Field(description="Timestamp UTC da requisição")
 
 
@@ -79,6 +209,9 @@ class ForecastDay(BaseModel):
     date: str
     predicted_price: float
     expected_change_pct: float
+    quantiles: Optional[List[QuantileBand]] = Field(
+        default=None, description="Bandas MC dropout do dia (só com `mc_samples`)"
+    )
 
 
 class ForecastResponse(BaseModel):
@@ -88,6 +221,62 @@ class ForecastResponse(BaseModel):
     base_date: str = Field(description="Data do último dado real")
     forecast_days: int
     forecast: List[ForecastDay]
+    uncertainty: Optional[MCDropoutCost] = Field(
+        default=None, description="Custo das trajetórias MC dropout (só com `mc_samples`)"
+    )
+    model: str = Field(description="Modelo que atendeu a requisição (nome@versão)")
+    timestamp: str
+
+
+class BatchPredictionItem(BaseModel):
+    """Resultado de uma janela da predição em lote."""
+    index: int = Field(description="Posição da janela na requisição")
+    symbol: str
+    status: str = Field(description="'ok' ou 'error'")
+    predicted_price: Optional[float] = None
+    predicted_ratio: Optional[float] = None
+    reference_price: Optional[float] = None
+    last_known_price: Optional[float] = None
+    expected_change_pct: Optional[float] = None
+    error: Optional[str] = Field(default=None, description="Motivo da falha da janela")
+
+
+class BatchPredictionResponse(BaseModel):
+    """Resposta da predição em lote (resultados na ordem da requisição)."""
+    count: int
+    succeeded: int
+    failed: int
+    results: List[BatchPredictionItem]
+    inference_time_ms: float = Field(description="Tempo do forward pass único do lote (ms)")
+    model: str = Field(description="Modelo que atendeu a requisição (nome@versão)")
+    timestamp: str
+
+
+class BacktestPoint(BaseModel):
+    """Predição de um pregão do backtest contra o fechamento real."""
+    date: str
+    actual_price: float
+    predicted_price: float
+
+
+class BacktestMetrics(BaseModel):
+    """Métricas no formato de `metrics_test` (MAPE em %)."""
+    MAE: Optional[float]
+    RMSE: Optional[float]
+    MAPE: Optional[float]
+    R2: Optional[float]
+
+
+class BacktestResponse(BaseModel):
+    """Resposta do backtest walk-forward."""
+    symbol: str
+    start_date: str = Field(description="Primeiro pregão previsto")
+    end_date: str = Field(description="Último pregão previsto")
+    count: int = Field(description="Número de pregões previstos")
+    metrics: BacktestMetrics
+    points: List[BacktestPoint]
+    inference_time_ms: float = Field(description="Tempo total de inferência (ms)")
+    model: str = Field(description="Modelo que atendeu a requisição (nome@versão)")
     timestamp: str
 
 
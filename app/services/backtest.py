@@ -0,0 +1,82 @@
+"""
+Backtest walk-forward vetorizado.
+
+Todas as janelas deslizantes de um histórico são montadas de uma vez com
+`sliding_window_view` (views sobre o mesmo buffer, sem cópia); a janela que
+termina no pregão t-1 prevê o fechamento de t, exatamente como no treino.
+As métricas seguem o formato de `metrics_test` em `model_metadata.json` e
+podem ser acumuladas por lotes, para respostas em streaming.
+"""
+
+from datetime import date
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.config import LOOK_BACK
+
+
+def backtest_windows(
+    dates: np.ndarray, closes: np.ndarray, start: date, end: date
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Janelas de LOOK_BACK fechamentos anteriores a cada pregão em [start, end].
+
+    Args:
+        dates:  datas dos pregões (datetime64[D], crescente).
+        closes: fechamentos correspondentes.
+
+    Returns:
+        (janelas (N, LOOK_BACK) — views, datas alvo (N,), fechamentos reais (N,))
+
+    Raises:
+        ValueError: histórico com LOOK_BACK fechamentos ou menos (nenhuma janela).
+    """
+    if len(closes) <= LOOK_BACK:
+        raise ValueError(
+            f"Insufficient data for backtest: {len(closes)} closes up to {end}; "
+            f"more than {LOOK_BACK} are required (a {LOOK_BACK}-close window before each session)."
+        )
+    # Janela k cobre closes[k : k + LOOK_BACK] e prevê closes[k + LOOK_BACK]
+    windows = sliding_window_view(closes, LOOK_BACK)[:-1]
+    target_dates = dates[LOOK_BACK:]
+    lo = np.searchsorted(target_dates, np.datetime64(start, "D"), side="left")
+    hi = np.searchsorted(target_dates, np.datetime64(end, "D"), side="right")
+    return windows[lo:hi], target_dates[lo:hi], closes[LOOK_BACK:][lo:hi]
+
+
+class MetricsAccumulator:
+    """
+    MAE, RMSE, MAPE (%) e R² acumulados lote a lote (somas suficientes).
+
+    Recebe as previsões sem arredondamento: o arredondamento é só da resposta.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._abs = 0.0
+        self._sq = 0.0
+        self._ape = 0.0
+        self._y = 0.0
+        self._y2 = 0.0
+
+    def update(self, actual: np.ndarray, predicted: np.ndarray) -> None:
+        error = predicted - actual
+        self.count += len(actual)
+        self._abs += float(np.abs(error).sum())
+        self._sq += float((error ** 2).sum())
+        self._ape += float((np.abs(error) / np.abs(actual)).sum())
+        self._y += float(actual.sum())
+        self._y2 += float((actual ** 2).sum())
+
+    def result(self) -> dict:
+        if not self.count:
+            return {"MAE": None, "RMSE": None, "MAPE": None, "R2": None}
+        n = self.count
+        ss_tot = self._y2 - self._y ** 2 / n
+        return {
+            "MAE": round(self._abs / n, 6),
+            "RMSE": round(float(np.sqrt(self._sq / n)), 6),
+            "MAPE": round(self._ape / n * 100.0, 6),
+            "R2": round(1.0 - self._sq / ss_tot, 6) if ss_tot > 0 else None,
+        }
@@ -1,18 +1,175 @@
 import logging
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
 
-from app.config import LOOK_BACK
+from app.config import (
+    HISTORY_OVERLAP_SESSIONS,
+    HISTORY_START_DATE,
+    HISTORY_STORE_DIR,
+    HISTORY_STORE_ENABLED,
+    LOOK_BACK,
+    PRICE_CACHE_ENABLED,
+    PRICE_CACHE_MAX_ENTRIES,
+    PRICE_CACHE_STALE_TTL_S,
+)
+from app.middleware.metrics import (
+    PRICE_CACHE_ENTRIES,
+    PRICE_CACHE_EVICTIONS,
+    PRICE_CACHE_HITS,
+    PRICE_CACHE_MISSES,
+    PRICE_FETCH_COALESCED,
+    PRICE_FETCH_COALESCED_WAITERS,
+)
+from app.services.history_store import HistoryStore
+from app.services.market_calendar import (
+    last_closed_session,
+    market_now,
+    next_session,
+    next_session_close,
+    sessions_until,
+)
+from app.services.price_source import get_price_source
 
 logger = logging.getLogger(__name__)
 
 
+# ── Cache de janelas de preços ─────────────────────────────────────────────────
+
+class PriceCache:
+    """
+    Cache em memória (thread-safe) das janelas retornadas por `fetch_prices`.
+
+    Cada entrada expira no próximo fechamento de pregão — antes disso o
+    fechamento diário não muda — e o número de entradas é limitado com
+    remoção LRU. Janelas que ainda não chegam ao último pregão encerrado
+    expiram em PRICE_CACHE_STALE_TTL_S (ver `cache_expiry`).
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[tuple, tuple[datetime, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                PRICE_CACHE_MISSES.inc()
+                return None
+            expires_at, value = entry
+            if market_now() >= expires_at:
+                del self._entries[key]
+                PRICE_CACHE_EVICTIONS.labels(reason="expired").inc()
+                PRICE_CACHE_ENTRIES.set(len(self._entries))
+                PRICE_CACHE_MISSES.inc()
+                return None
+            self._entries.move_to_end(key)
+            PRICE_CACHE_HITS.inc()
+            return value
+
+    def put(self, key: tuple, value: dict, expires_at: datetime) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                PRICE_CACHE_EVICTIONS.labels(reason="lru").inc()
+            PRICE_CACHE_ENTRIES.set(len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            PRICE_CACHE_ENTRIES.set(0)
+
+
+price_cache = PriceCache(PRICE_CACHE_MAX_ENTRIES)
+
+
+def cache_expiry(window: dict) -> datetime:
+    """
+    Validade de uma janela em cache: o próximo fechamento se ela já termina
+    no último pregão encerrado; senão (fechamento ainda não publicado pela
+    fonte) um prazo curto, para a próxima requisição tentar de novo.
+    """
+    if window["last_date"] >= last_closed_session().isoformat():
+        return next_session_close()
+    return market_now() + timedelta(seconds=PRICE_CACHE_STALE_TTL_S)
+
+
+# ── Coalescência de downloads concorrentes (single-flight) ─────────────────────
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Garante no máximo uma execução em andamento por chave.
+
+    Chamadores concorrentes com a mesma chave aguardam a execução do primeiro
+    (o "líder") e recebem o mesmo resultado — ou a mesma exceção.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: tuple, fn: Callable[[], dict]) -> dict:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            PRICE_FETCH_COALESCED.inc()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+        finally:
+            with self._lock:
+                del self._flights[key]
+            PRICE_FETCH_COALESCED_WAITERS.set(flight.waiters)
+            flight.done.set()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+
+_price_flights = SingleFlight()
+
+
+# ── Busca de preços ────────────────────────────────────────────────────────────
+
 def fetch_prices(symbol: str, n_prices: int = LOOK_BACK) -> dict:
     """
     Busca os últimos n_prices preços de fechamento de um ativo via Yahoo Finance.
 
+    O resultado fica em cache (por símbolo e n_prices) até o próximo
+    fechamento de pregão (ou por poucos minutos, se ainda não inclui o último
+    pregão encerrado), e chamadas concorrentes para a mesma chave
+    compartilham um único download em andamento.
+
     Args:
         symbol:   Código do ativo (ex: 'PETR4.SA', 'VALE3.SA', 'AAPL').
         n_prices: Número de dias úteis de histórico necessários.
@@ -29,28 +186,78 @@ def fetch_prices(symbol: str, n_prices: int = LOOK_BACK) -> dict:
     Raises:
         ValueError: se não houver dados suficientes para o símbolo.
     """
-    # Busca com buffer para cobrir fins de semana e feriados
-    end = datetime.today()
-    start = end - timedelta(days=n_prices * 4)
+    key = (symbol.upper(), n_prices)
 
-    logger.info("Fetching %d prices for '%s' from %s", n_prices, symbol, start.date())
+    if PRICE_CACHE_ENABLED:
+        cached = price_cache.get(key)
+        if cached is not None:
+            return dict(cached)
 
-    df = yf.download(
-        symbol,
-        start=start.strftime("%Y-%m-%d"),
-        end=end.strftime("%Y-%m-%d"),
-        progress=False,
-        auto_adjust=True,
-    )
+    def load() -> dict:
+        result = _download_prices(symbol, n_prices)
+        if PRICE_CACHE_ENABLED:
+            price_cache.put(key, result, cache_expiry(result))
+        return result
 
-    if df.empty:
-        raise ValueError(f"No market data found for symbol '{symbol}'.")
+    # Chamadas concorrentes para o mesmo símbolo compartilham um único download
+    return dict(_price_flights.do(key, load))
+
+
+_history_store: Optional[HistoryStore] = None
+_history_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    """Histórico local em disco (instância única, usando a fonte configurada)."""
+    global _history_store
+    with _history_lock:
+        if _history_store is None:
+            _history_store = HistoryStore(
+                HISTORY_STORE_DIR, get_price_source(), date.fromisoformat(HISTORY_START_DATE),
+                HISTORY_OVERLAP_SESSIONS,
+            )
+        return _history_store
+
+
+# Pregões além da janela pedida no download: absorvem suspensões do papel e
+# fechamentos extraordinários fora do calendário
+_FETCH_SLACK_SESSIONS = 5
+
+
+def _fetch_start(last_session: date, n_prices: int) -> date:
+    """Início do download que cobre os `n_prices` pregões até `last_session`."""
+    try:
+        return sessions_until(last_session, n_prices + _FETCH_SLACK_SESSIONS)[0].astype(date)
+    except ValueError:
+        # Fora do calendário pré-calculado: buffer em dias corridos
+        return last_session - timedelta(days=n_prices * 4)
+
+
+def _build_window(symbol: str, dates: list[str], prices: list[float]) -> dict:
+    return {
+        "prices": prices,
+        "dates": dates,
+        "symbol": symbol,
+        "last_date": dates[-1],
+        "last_price": prices[-1],
+    }
+
+
+def _download_prices(symbol: str, n_prices: int) -> dict:
+    if HISTORY_STORE_ENABLED:
+        return _load_from_history(symbol, n_prices)
+
+    # `end` é exclusivo: inclui o último pregão já encerrado
+    last_session = last_closed_session()
+    end = last_session + timedelta(days=1)
+    start = _fetch_start(last_session, n_prices)
+
+    logger.info("Fetching %d prices for '%s' from %s", n_prices, symbol, start)
 
-    # yfinance pode retornar MultiIndex de colunas
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = [col[0] for col in df.columns]
+    close = get_price_source().fetch(symbol, start, end)
 
-    close = df["Close"].dropna()
+    if close.empty:
+        raise ValueError(f"No market data found for symbol '{symbol}'.")
 
     if len(close) < n_prices:
         raise ValueError(
@@ -62,17 +269,177 @@ def fetch_prices(symbol: str, n_prices: int = LOOK_BACK) -> dict:
     prices = [float(p) for p in last_n.values]
     dates = [str(d.date()) for d in last_n.index]
 
+    return _build_window(symbol, dates, prices)
+
+
+def _load_from_history(symbol: str, n_prices: int) -> dict:
+    """Janela servida do histórico local, buscando na fonte só a cauda ausente."""
+    store = get_history_store()
+    store.refresh(symbol)
+    dates, closes = store.window(symbol, n_prices)
+
+    if not len(closes):
+        raise ValueError(f"No market data found for symbol '{symbol}'.")
+
+    if len(closes) < n_prices:
+        raise ValueError(
+            f"Insufficient data for '{symbol}': "
+            f"found {len(closes)} trading days, need {n_prices}."
+        )
+
+    return _build_window(symbol, np.datetime_as_string(dates, unit="D").tolist(), closes.tolist())
+
+
+# ── Ingestão em lote (vários símbolos) ─────────────────────────────────────────
+
+def split_windows(close: pd.DataFrame, n_prices: int) -> tuple[dict[str, dict], dict[str, str]]:
+    """
+    Separa um frame largo de fechamentos (datas × símbolos) nas janelas dos
+    últimos `n_prices` pregões de cada símbolo, sem loop por linha.
+
+    Returns:
+        ({símbolo: janela no formato de `fetch_prices`}, {símbolo: motivo da falha})
+    """
+    symbols = list(close.columns)
+    values = close.to_numpy(dtype=np.float64)                  # (T, S)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+
+    missing: dict[str, str] = {}
+    for symbol, count in zip(symbols, counts.tolist()):
+        if count == 0:
+            missing[symbol] = f"No market data found for symbol '{symbol}'."
+        elif count < n_prices:
+            missing[symbol] = (
+                f"Insufficient data for '{symbol}': "
+                f"found {count} trading days, need {n_prices}."
+            )
+
+    ok = counts >= n_prices
+    if not ok.any():
+        return {}, missing
+
+    # Posição de cada observação válida contada a partir do fim da série
+    from_end = np.cumsum(valid[::-1], axis=0)[::-1]
+    selected = (valid & (from_end <= n_prices))[:, ok].T     # (S_ok, T), n_prices True por linha
+    prices = values[:, ok].T[selected].reshape(-1, n_prices)
+    rows = np.broadcast_to(np.arange(len(close))[:, np.newaxis], values.shape)[:, ok].T
+    day_labels = np.datetime_as_string(close.index.values.astype("datetime64[D]"), unit="D")
+    dates = day_labels[rows[selected].reshape(-1, n_prices)]
+
+    windows = {
+        symbol: _build_window(symbol, window_dates.tolist(), window_prices.tolist())
+        for symbol, window_dates, window_prices in zip(
+            [symbol for symbol, keep in zip(symbols, ok) if keep], dates, prices
+        )
+    }
+    return windows, missing
+
+
+def fetch_prices_many(symbols: list[str], n_prices: int = LOOK_BACK) -> dict:
+    """
+    Busca as janelas de vários símbolos com um único download agrupado.
+
+    Símbolos já em cache não são baixados de novo; os demais são buscados
+    juntos na fonte configurada (ou atualizados juntos no histórico local)
+    e entram no cache.
+
+    Returns:
+        {
+            "windows": {símbolo: janela no formato de `fetch_prices`},
+            "missing": {símbolo: motivo},   # sem dados ou histórico insuficiente
+        }
+    """
+    symbols = list(dict.fromkeys(symbols))
+    windows: dict[str, dict] = {}
+    pending: list[str] = []
+
+    for symbol in symbols:
+        cached = price_cache.get((symbol.upper(), n_prices)) if PRICE_CACHE_ENABLED else None
+        if cached is not None:
+            windows[symbol] = dict(cached)
+        else:
+            pending.append(symbol)
+
+    missing: dict[str, str] = {}
+    if pending:
+        if HISTORY_STORE_ENABLED:
+            store = get_history_store()
+            store.refresh_many(pending)
+            close = pd.DataFrame(
+                {
+                    symbol: pd.Series(closes, index=pd.DatetimeIndex(dates))
+                    for symbol in pending
+                    for dates, closes in [store.window(symbol, n_prices)]
+                }
+            ).reindex(columns=pending)
+        else:
+            last_session = last_closed_session()
+            end = last_session + timedelta(days=1)
+            start = _fetch_start(last_session, n_prices)
+            logger.info("Fetching %d prices for %d symbols from %s", n_prices, len(pending), start)
+            close = get_price_source().fetch_many(pending, start, end)
+
+        fetched, missing = split_windows(close, n_prices)
+        for symbol, window in fetched.items():
+            if PRICE_CACHE_ENABLED:
+                price_cache.put((symbol.upper(), n_prices), window, cache_expiry(window))
+            windows[symbol] = dict(window)
+
     return {
-        "prices": prices,
-        "dates": dates,
-        "symbol": symbol,
-        "last_date": dates[-1],
-        "last_price": prices[-1],
+        "windows": {symbol: windows[symbol] for symbol in symbols if symbol in windows},
+        "missing": missing,
     }
 
 
+def prewarm_price_cache(symbols: list[str], n_prices: int = LOOK_BACK) -> dict[str, str]:
+    """
+    Pré-carrega no cache as janelas de uma watchlist inteira (job agendado).
+
+    Returns:
+        {símbolo: motivo} dos símbolos que não puderam ser carregados.
+    """
+    result = fetch_prices_many(symbols, n_prices)
+    logger.info(
+        "Price cache pre-warmed: %d symbols loaded, %d missing",
+        len(result["windows"]), len(result["missing"]),
+    )
+    return result["missing"]
+
+
+def fetch_history(symbol: str, start: date, end: date, lookback: int = LOOK_BACK) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fechamentos de `symbol` até `end`, incluindo os `lookback` pregões
+    anteriores a `start` (janela inicial de um backtest). Sem cache.
+
+    Returns:
+        (datas datetime64[D] crescentes, fechamentos float64)
+
+    Raises:
+        ValueError: se não houver dados para o símbolo no intervalo.
+    """
+    if HISTORY_STORE_ENABLED:
+        store = get_history_store()
+        store.refresh(symbol)
+        dates, closes = store.history(symbol)
+        lo = max(np.searchsorted(dates, np.datetime64(start, "D")) - lookback, 0)
+        hi = np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+        dates, closes = dates[lo:hi], closes[lo:hi]
+    else:
+        # `lookback` pregões antes de `start`, pelo calendário da B3
+        fetch_start = _fetch_start(start - timedelta(days=1), lookback)
+        logger.info("Fetching history for '%s' from %s to %s", symbol, fetch_start, end)
+        close = get_price_source().fetch(symbol, fetch_start, end + timedelta(days=1))
+        dates = close.index.values.astype("datetime64[D]")
+        closes = close.to_numpy(dtype=np.float64)
+        lo = max(np.searchsorted(dates, np.datetime64(start, "D")) - lookback, 0)
+        dates, closes = dates[lo:], closes[lo:]
+
+    if not len(closes):
+        raise ValueError(f"No market data found for symbol '{symbol}' up to {end}.")
+    return dates, closes
+
+
 def next_business_day(from_date_str: str) -> str:
-    """Retorna a próxima data útil após a data fornecida (formato 'YYYY-MM-DD')."""
-    ts = pd.Timestamp(from_date_str)
-    next_bd = ts + pd.tseries.offsets.BDay(1)
-    return str(next_bd.date())
+    """Retorna o próximo pregão da B3 após a data fornecida (formato 'YYYY-MM-DD')."""
+    return next_session(from_date_str)
@@ -0,0 +1,82 @@
+"""
+Camada de execução para trabalho bloqueante chamado pelos handlers async.
+
+- `run_io`:        pool limitado de threads para I/O (downloads do yfinance).
+- `run_inference`: executor dedicado ao modelo (CPU-bound).
+
+Assim uma chamada lenta não congela o event loop — /health e /metrics
+continuam respondendo — e a concorrência escala com o tamanho dos pools.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from app.config import INFERENCE_WORKERS, IO_POOL_SIZE
+from app.middleware.metrics import EXECUTOR_QUEUE_DEPTH, EXECUTOR_QUEUE_WAIT
+
+T = TypeVar("T")
+
+
+class InstrumentedExecutor:
+    """ThreadPoolExecutor criado sob demanda, com profundidade de fila e espera exportadas."""
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queue_depth = EXECUTOR_QUEUE_DEPTH.labels(pool=name)
+        self._queue_wait = EXECUTOR_QUEUE_WAIT.labels(pool=name)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+            return self._pool
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Executa `fn(*args, **kwargs)` no pool, preservando os contextvars do chamador."""
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        submitted_at = time.perf_counter()
+        self._queue_depth.inc()
+
+        def task() -> T:
+            self._queue_depth.dec()
+            self._queue_wait.observe(time.perf_counter() - submitted_at)
+            return call()
+
+        return await loop.run_in_executor(self._get_pool(), task)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+io_executor = InstrumentedExecutor("io", IO_POOL_SIZE)
+inference_executor = InstrumentedExecutor("inference", INFERENCE_WORKERS)
+
+
+async def run_io(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Executa uma chamada de I/O bloqueante fora do event loop."""
+    return await io_executor.run(fn, *args, **kwargs)
+
+
+async def run_inference(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Executa uma chamada ao modelo no executor de inferência."""
+    return await inference_executor.run(fn, *args, **kwargs)
+
+
+def shutdown_executors() -> None:
+    io_executor.shutdown()
+    inference_executor.shutdown()
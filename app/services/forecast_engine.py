@@ -0,0 +1,90 @@
+"""
+Motor de previsão multi-step com janela em ring buffer.
+
+A janela de LOOK_BACK preços de cada série fica em um buffer pré-alocado de
+tamanho 2 × LOOK_BACK: cada novo valor é escrito nas duas metades, de modo que
+a janela corrente é sempre uma fatia contígua (sem cópias nem listas Python).
+Várias séries (símbolos ou cenários) avançam em lockstep, com um único forward
+pass por passo para o lote inteiro.
+"""
+
+from typing import Callable, Iterator
+
+import numpy as np
+
+InferFn = Callable[[np.ndarray], np.ndarray]
+NormalizeFn = Callable[[np.ndarray], np.ndarray]
+
+
+def normalize_windows(windows: np.ndarray) -> np.ndarray:
+    """Divide cada janela (n_series, look_back) pelo seu primeiro preço."""
+    return windows / windows[:, :1]
+
+
+class RingWindow:
+    """Janelas deslizantes de shape (n_series, size) sobre um buffer duplicado."""
+
+    def __init__(self, history: np.ndarray) -> None:
+        history = np.asarray(history, dtype=np.float64)
+        n_series, size = history.shape
+        self.size = size
+        self._buf = np.empty((n_series, 2 * size), dtype=np.float64)
+        self._buf[:, :size] = history
+        self._buf[:, size:] = history
+        self._start = 0
+
+    def view(self) -> np.ndarray:
+        """Janela corrente (do mais antigo ao mais recente) — view, sem cópia."""
+        return self._buf[:, self._start : self._start + self.size]
+
+    def push(self, values: np.ndarray) -> None:
+        """Descarta o valor mais antigo de cada série e acrescenta `values`."""
+        self._buf[:, self._start] = values
+        self._buf[:, self._start + self.size] = values
+        self._start = (self._start + 1) % self.size
+
+
+def iter_forecast(
+    infer_fn: InferFn,
+    histories: np.ndarray,
+    days: int,
+    normalize: NormalizeFn = normalize_windows,
+) -> Iterator[np.ndarray]:
+    """
+    Gera, passo a passo, os preços previstos para cada série.
+
+    Args:
+        infer_fn:  forward pass de um lote normalizado (batch, look_back) → ratios (batch,).
+        histories: array (n_series, look_back) com as últimas janelas reais.
+        days:      número de passos à frente.
+        normalize: normalização de cada janela antes do forward pass.
+
+    Yields:
+        Array (n_series,) com os preços previstos do passo corrente.
+    """
+    ring = RingWindow(histories)
+    for _ in range(days):
+        window = ring.view()
+        preds = np.asarray(infer_fn(normalize(window)), dtype=np.float64) * window[:, 0]
+        ring.push(preds)
+        yield preds
+
+
+def forecast_paths(
+    infer_fn: InferFn,
+    histories: np.ndarray,
+    days: int,
+    normalize: NormalizeFn = normalize_windows,
+) -> np.ndarray:
+    """Trajetórias completas: array (n_series, days) de preços previstos."""
+    histories = np.asarray(histories, dtype=np.float64)
+    paths = np.empty((histories.shape[0], days), dtype=np.float64)
+    for day_idx, preds in enumerate(iter_forecast(infer_fn, histories, days, normalize)):
+        paths[:, day_idx] = preds
+    return paths
+
+
+def step_changes_pct(last_prices: np.ndarray, paths: np.ndarray) -> np.ndarray:
+    """Variação % de cada passo em relação ao preço do passo anterior."""
+    previous = np.concatenate([np.asarray(last_prices)[:, np.newaxis], paths[:, :-1]], axis=1)
+    return (paths / previous - 1.0) * 100.0
@@ -0,0 +1,247 @@
+"""
+Histórico local de fechamentos diários, persistido em disco por símbolo.
+
+Cada símbolo ocupa um único array NumPy estruturado, em ordem crescente de data:
+
+    <root>/<SYMBOL>/history.npy   [("date", datetime64[D]), ("close", float64)]
+
+Datas e fechamentos ficam no mesmo arquivo para serem trocados juntos: cada
+gravação é um único rename atômico (arquivo temporário + `os.replace`), e um
+leitor em outro worker nunca combina datas de uma versão com fechamentos de
+outra. O arquivo é aberto com memory-map; `window()` devolve fatias (views)
+sem cópia, e o mapeamento é reaberto quando o arquivo muda no disco.
+`refresh()` busca na fonte a cauda posterior à última data gravada mais uma
+sobreposição com os últimos pregões já gravados.
+
+A fonte devolve fechamentos ajustados (proventos e desdobramentos): a cada
+evento corporativo toda a série anterior muda de base. Quando os fechamentos
+da sobreposição não batem com os gravados, o histórico inteiro é baixado de
+novo e substituído, para as janelas continuarem na mesma base de um
+download novo (e do treino).
+"""
+
+import logging
+import os
+import re
+import threading
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.market_calendar import last_closed_session
+from app.services.price_source import PriceSource
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+# Tolerância relativa ao comparar a sobreposição (ruído de ponto flutuante da fonte)
+_OVERLAP_RTOL = 1e-6
+
+HISTORY_DTYPE = np.dtype([("date", "datetime64[D]"), ("close", np.float64)])
+_HISTORY_FILE = "history.npy"
+# Formato anterior (dois arquivos): ainda lido, substituído na próxima gravação
+_LEGACY_FILES = ("dates.npy", "closes.npy")
+
+
+class HistoryStore:
+    """Armazém colunar de fechamentos com append incremental."""
+
+    def __init__(
+        self, root: str, source: PriceSource, start_date: date, overlap_sessions: int = 5
+    ) -> None:
+        self.root = root
+        self.source = source
+        self.start_date = start_date
+        self.overlap_sessions = max(1, overlap_sessions)
+        # {símbolo: ((inode, mtime) de history.npy, (datas, fechamentos))}
+        self._arrays: dict[str, tuple[Optional[tuple], tuple[np.ndarray, np.ndarray]]] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    # ── Arquivos ───────────────────────────────────────────────────────────────
+
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.root, _UNSAFE_CHARS.sub("_", symbol.upper()))
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(symbol.upper(), threading.Lock())
+
+    def _open(self, symbol: str) -> tuple[np.ndarray, np.ndarray]:
+        key = symbol.upper()
+        directory = self._dir(symbol)
+        path = os.path.join(directory, _HISTORY_FILE)
+        try:
+            stat = os.stat(path)
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            stamp = None
+        cached = self._arrays.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        if stamp is not None:
+            history = np.load(path, mmap_mode="r")
+            arrays = (history["date"], history["close"])
+        else:
+            arrays = self._open_legacy(directory)
+        self._arrays[key] = (stamp, arrays)
+        return arrays
+
+    @staticmethod
+    def _open_legacy(directory: str) -> tuple[np.ndarray, np.ndarray]:
+        try:
+            dates, closes = (
+                np.load(os.path.join(directory, name), mmap_mode="r") for name in _LEGACY_FILES
+            )
+        except FileNotFoundError:
+            return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=np.float64)
+        n = min(len(dates), len(closes))
+        return dates[:n], closes[:n]
+
+    @staticmethod
+    def _write_atomic(path: str, array: np.ndarray) -> None:
+        # Nome único por processo: vários workers podem gravar o mesmo símbolo
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+
+    # ── API ────────────────────────────────────────────────────────────────────
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        dates, _ = self._open(symbol)
+        return dates[-1].astype(date) if len(dates) else None
+
+    def _start_for(self, dates: np.ndarray) -> date:
+        """Início do download: os últimos `overlap_sessions` pregões gravados (ou `start_date`)."""
+        if not len(dates):
+            return self.start_date
+        return dates[-min(self.overlap_sessions, len(dates))].astype(date)
+
+    @staticmethod
+    def _adjusted(dates: np.ndarray, closes: np.ndarray, tail: pd.Series) -> bool:
+        """True se os fechamentos de `tail` já gravados mudaram (série reajustada pela fonte)."""
+        if not len(dates):
+            return False
+        tail_dates = tail.index.values.astype("datetime64[D]")
+        overlap = tail_dates <= dates[-1]
+        positions = np.searchsorted(dates, tail_dates[overlap])
+        found = dates[np.minimum(positions, len(dates) - 1)] == tail_dates[overlap]
+        stored = closes[positions[found]]
+        fetched = tail.to_numpy(dtype=np.float64)[overlap][found]
+        return not np.allclose(stored, fetched, rtol=_OVERLAP_RTOL, atol=0.0)
+
+    def _write(self, symbol: str, dates: np.ndarray, closes: np.ndarray) -> None:
+        history = np.empty(len(dates), dtype=HISTORY_DTYPE)
+        history["date"] = dates
+        history["close"] = closes
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        self._write_atomic(os.path.join(directory, _HISTORY_FILE), history)
+        self._arrays.pop(symbol.upper(), None)
+        for name in _LEGACY_FILES:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _merge(self, symbol: str, tail: pd.Series, end: date) -> int:
+        """
+        Grava `tail` (cauda com sobreposição) no histórico do símbolo (com lock).
+
+        Acrescenta os fechamentos posteriores à última data gravada; se a
+        sobreposição mudou, baixa o histórico inteiro e substitui a série.
+
+        Returns:
+            Número de pregões novos (posteriores à última data gravada antes).
+        """
+        dates, closes = self._open(symbol)
+        last = dates[-1] if len(dates) else None
+
+        if self._adjusted(dates, closes, tail):
+            full = self.source.fetch(symbol, self.start_date, end + timedelta(days=1)).dropna()
+            if full.empty:
+                logger.warning("History store: re-download of '%s' returned no data; kept the stored series", symbol)
+                return 0
+            new_dates = full.index.values.astype("datetime64[D]")
+            self._write(symbol, new_dates, full.to_numpy(dtype=np.float64))
+            added = int((new_dates > last).sum())
+            logger.info(
+                "History store: closes of '%s' were re-adjusted by the source; "
+                "rewrote %d closes (%d new)", symbol, len(new_dates), added,
+            )
+            return added
+
+        new_dates = tail.index.values.astype("datetime64[D]")
+        new_closes = tail.to_numpy(dtype=np.float64)
+        if last is not None:
+            keep = new_dates > last
+            new_dates, new_closes = new_dates[keep], new_closes[keep]
+        if not len(new_dates):
+            return 0
+
+        self._write(symbol, np.concatenate([dates, new_dates]), np.concatenate([closes, new_closes]))
+        logger.info("History store: appended %d closes for '%s'", len(new_dates), symbol)
+        return len(new_dates)
+
+    def refresh(self, symbol: str, end: Optional[date] = None) -> int:
+        """
+        Acrescenta os fechamentos ausentes até o último pregão encerrado
+        (regravando a série se a fonte a reajustou).
+
+        Args:
+            symbol: código do ativo.
+            end:    último dia desejado (padrão: último pregão já encerrado).
+
+        Returns:
+            Número de pregões novos.
+        """
+        end = end or last_closed_session()
+        with self._lock(symbol):
+            dates, _ = self._open(symbol)
+            if len(dates) and dates[-1].astype(date) >= end:
+                return 0
+            tail = self.source.fetch(symbol, self._start_for(dates), end + timedelta(days=1))
+            return self._merge(symbol, tail.dropna(), end)
+
+    def refresh_many(self, symbols: list[str], end: Optional[date] = None) -> dict[str, int]:
+        """
+        Atualiza vários símbolos com um único download agrupado na fonte.
+
+        O intervalo pedido começa na menor data de início (sobreposição
+        incluída) entre os símbolos desatualizados; cada um recebe apenas a
+        sua própria cauda. Símbolos reajustados pela fonte são baixados de
+        novo por inteiro, um a um.
+
+        Returns:
+            {símbolo: pregões novos} dos símbolos desatualizados.
+        """
+        end = end or last_closed_session()
+        stale = {}
+        for symbol in symbols:
+            dates, _ = self._open(symbol)
+            if not len(dates) or dates[-1].astype(date) < end:
+                stale[symbol] = self._start_for(dates)
+        if not stale:
+            return {}
+
+        wide = self.source.fetch_many(list(stale), min(stale.values()), end + timedelta(days=1))
+
+        appended = {}
+        for symbol in stale:
+            with self._lock(symbol):
+                appended[symbol] = self._merge(symbol, wide[symbol].dropna(), end)
+        return appended
+
+    def window(self, symbol: str, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """Últimos `n` (datas, fechamentos) como views do memory-map (sem cópia)."""
+        dates, closes = self._open(symbol)
+        return dates[-n:], closes[-n:]
+
+    def history(self, symbol: str) -> tuple[np.ndarray, np.ndarray]:
+        """Histórico completo (datas, fechamentos) como views do memory-map."""
+        return self._open(symbol)
@@ -0,0 +1,93 @@
+"""
+Eleição do worker que executa os jobs em background.
+
+Com vários workers (WEB_CONCURRENCY), cada processo roda o mesmo lifespan.
+Os jobs que baixam dados e gravam em disco (scheduler da tabela de predições
+→ download da watchlist e atualização do histórico local) devem rodar em um
+único worker: o que conseguir o `flock` exclusivo do arquivo de lock. O lock
+é do processo e o sistema o solta quando ele termina (inclusive por crash);
+os demais workers tentam de novo a cada ciclo e assumem no lugar dele.
+
+`file_lock` é a variante bloqueante, para seções críticas curtas entre
+workers (ex.: exportação única dos pesos NumPy compartilhados).
+
+Sem `fcntl` (Windows) não há eleição: cada processo se considera líder, e
+`file_lock` não bloqueia.
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """Lock exclusivo e não bloqueante sobre um arquivo, mantido até `release`."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """Tenta se tornar líder; True se este processo detém (ou passou a deter) o lock."""
+        if self._fd is not None:
+            return True
+        try:
+            import fcntl  # lazy import (POSIX)
+        except ImportError:
+            self._fd = -1
+            return True
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        # PID do líder no arquivo, só para diagnóstico
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        logger.info("Worker %d is the background jobs leader (%s)", os.getpid(), self.path)
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        if fd >= 0:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Lock exclusivo (flock) sobre `path` durante o bloco; espera o detentor atual."""
+    try:
+        import fcntl  # lazy import (POSIX)
+    except ImportError:
+        yield
+        return
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
@@ -0,0 +1,167 @@
+"""
+Horário e calendário de pregões do mercado (B3).
+
+As sessões de `CALENDAR_START_YEAR` até `CALENDAR_END_YEAR` são pré-calculadas
+uma vez, na importação, em um array NumPy `datetime64[D]` ordenado (dias úteis
+menos os feriados da B3). "Próximos N pregões após X" vira uma busca binária e
+um slice, sem loop por dia nem offsets do pandas.
+"""
+
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.config import MARKET_CLOSE_TIME, MARKET_TIMEZONE
+
+MARKET_TZ = ZoneInfo(MARKET_TIMEZONE)
+_CLOSE_TIME = dt_time.fromisoformat(MARKET_CLOSE_TIME)
+
+
+def market_now() -> datetime:
+    """Data/hora corrente no fuso do mercado."""
+    return datetime.now(MARKET_TZ)
+
+
+# ── Feriados da B3 ─────────────────────────────────────────────────────────────
+
+def easter(year: int) -> date:
+    """Domingo de Páscoa (calendário gregoriano, algoritmo de Meeus/Jones/Butcher)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def b3_holidays(year: int) -> list[date]:
+    """Dias sem pregão na B3 em `year` (inclusive os que caem em fim de semana)."""
+    sunday = easter(year)
+    holidays = [
+        date(year, 1, 1),                 # Confraternização Universal
+        sunday - timedelta(days=48),      # Carnaval (segunda)
+        sunday - timedelta(days=47),      # Carnaval (terça)
+        sunday - timedelta(days=2),       # Sexta-feira Santa
+        date(year, 4, 21),                # Tiradentes
+        date(year, 5, 1),                 # Dia do Trabalho
+        sunday + timedelta(days=60),      # Corpus Christi
+        date(year, 9, 7),                 # Independência
+        date(year, 10, 12),               # Nossa Senhora Aparecida
+        date(year, 11, 2),                # Finados
+        date(year, 11, 15),               # Proclamação da República
+        date(year, 12, 24),               # Véspera de Natal (sem pregão)
+        date(year, 12, 25),               # Natal
+        date(year, 12, 31),               # Último dia do ano (sem pregão)
+    ]
+    if year <= 2021:
+        # Feriados de São Paulo: a B3 passou a abrir neles a partir de 2022
+        holidays += [date(year, 1, 25), date(year, 7, 9), date(year, 11, 20)]
+    elif year >= 2024:
+        holidays.append(date(year, 11, 20))  # Consciência Negra (feriado nacional)
+    return sorted(holidays)
+
+
+# ── Sessões pré-calculadas ─────────────────────────────────────────────────────
+
+CALENDAR_START_YEAR = 2000
+# Folga para forecasts em streaming (até FORECAST_STREAM_MAX_DAYS pregões)
+CALENDAR_END_YEAR = date.today().year + 5
+
+
+def _build_sessions(start_year: int, end_year: int) -> np.ndarray:
+    days = np.arange(
+        np.datetime64(f"{start_year}-01-01"), np.datetime64(f"{end_year + 1}-01-01"), dtype="datetime64[D]"
+    )
+    holidays = np.array(
+        [day for year in range(start_year, end_year + 1) for day in b3_holidays(year)],
+        dtype="datetime64[D]",
+    )
+    return days[np.is_busday(days, holidays=holidays)]
+
+
+SESSIONS: np.ndarray = _build_sessions(CALENDAR_START_YEAR, CALENDAR_END_YEAR)
+
+
+def _day(value) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+def _check_range(day: np.datetime64) -> None:
+    if not SESSIONS[0] <= day <= SESSIONS[-1]:
+        raise ValueError(
+            f"Date {day} outside the B3 calendar ({CALENDAR_START_YEAR}–{CALENDAR_END_YEAR})."
+        )
+
+
+def is_session(day: date) -> bool:
+    """Indica se há pregão na data (dia útil que não é feriado da B3)."""
+    value = _day(day)
+    if not SESSIONS[0] <= value <= SESSIONS[-1]:
+        return day.weekday() < 5 and day not in b3_holidays(day.year)
+    i = np.searchsorted(SESSIONS, value)
+    return bool(i < len(SESSIONS) and SESSIONS[i] == value)
+
+
+def sessions_after(day, n: int) -> np.ndarray:
+    """Os `n` pregões estritamente após `day` (date ou 'YYYY-MM-DD'), datetime64[D]."""
+    value = _day(day)
+    _check_range(value)
+    i = int(np.searchsorted(SESSIONS, value, side="right"))
+    sessions = SESSIONS[i:i + n]
+    if len(sessions) < n:
+        raise ValueError(f"B3 calendar ends before {n} sessions after {day}.")
+    return sessions
+
+
+def sessions_until(day, n: int) -> np.ndarray:
+    """Os `n` pregões até `day` inclusive (date ou 'YYYY-MM-DD'), datetime64[D]."""
+    value = _day(day)
+    _check_range(value)
+    i = int(np.searchsorted(SESSIONS, value, side="right"))
+    if i < n:
+        raise ValueError(f"B3 calendar starts after {n} sessions before {day}.")
+    return SESSIONS[i - n:i]
+
+
+def session_dates_after(day, n: int) -> list[str]:
+    """`sessions_after` como strings 'YYYY-MM-DD' (datas do forecast)."""
+    return np.datetime_as_string(sessions_after(day, n), unit="D").tolist()
+
+
+def next_session(day) -> str:
+    """Próximo pregão após `day`, como 'YYYY-MM-DD'."""
+    return str(sessions_after(day, 1)[0])
+
+
+# ── Fechamentos ────────────────────────────────────────────────────────────────
+
+def session_close(day: date) -> datetime:
+    """Horário de fechamento do pregão de `day`, no fuso do mercado."""
+    return datetime.combine(day, _CLOSE_TIME, tzinfo=MARKET_TZ)
+
+
+def next_session_close(now: Optional[datetime] = None) -> datetime:
+    """Próximo fechamento de pregão estritamente após `now`."""
+    now = now or market_now()
+    day = now.date()
+    while not is_session(day) or session_close(day) <= now:
+        day += timedelta(days=1)
+    return session_close(day)
+
+
+def last_closed_session(now: Optional[datetime] = None) -> date:
+    """Data do pregão mais recente já encerrado em `now`."""
+    now = now or market_now()
+    day = now.date()
+    if session_close(day) > now:
+        day -= timedelta(days=1)
+    while not is_session(day):
+        day -= timedelta(days=1)
+    return day
@@ -0,0 +1,259 @@
+"""
+Registro de modelos servidos, com recarga a quente.
+
+São carregados o modelo padrão e os artefatos `<nome>.keras` do diretório de
+modelos listados em `names` (ex.: um checkpoint `best`, modelos por símbolo;
+"*" carrega todos). Os metadados de cada um vêm de `<nome>.json` /
+`<nome>_metadata.json` quando existirem, senão do arquivo de metadados padrão.
+
+Um watcher verifica o diretório periodicamente; quando um arquivo novo ou
+alterado fica estável, a nova versão é carregada e aquecida em background e
+trocada de forma atômica. Requisições em andamento terminam na versão antiga,
+que continua válida enquanto houver referências a ela.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+from app.middleware.metrics import (
+    MODEL_LOAD_SUCCESS,
+    MODEL_READY,
+    MODEL_REGISTRY_MODELS,
+    MODEL_RELOADS,
+)
+from app.services.model_service import ModelService, artifact_version
+
+logger = logging.getLogger(__name__)
+
+MODEL_SUFFIX = ".keras"
+
+
+class ModelRegistry:
+    """Conjunto de `ModelService` indexados por nome, trocados atomicamente."""
+
+    def __init__(
+        self,
+        models_dir: str,
+        default_model_path: str,
+        default_metadata_path: str,
+        warmup_batch_sizes: list[int],
+        warmup_rounds: int = 1,
+        batching: Optional[tuple[int, float]] = None,
+        names: Optional[list[str]] = None,
+    ) -> None:
+        self.models_dir = models_dir
+        # Modelos servidos além do padrão; "*" aceita qualquer *.keras do diretório
+        self.names = set(names or ())
+        self.default_name = os.path.splitext(os.path.basename(default_model_path))[0]
+        self.default_model_path = default_model_path
+        self.default_metadata_path = default_metadata_path
+        self.warmup_batch_sizes = warmup_batch_sizes
+        self.warmup_rounds = warmup_rounds
+        self.batching = batching
+        # Substituído por inteiro a cada troca (copy-on-write): leituras sem lock
+        self._services: dict[str, ModelService] = {}
+        self._fingerprints: dict[str, tuple] = {}
+        self._pending: dict[str, tuple] = {}
+        # Modelos ausentes na última varredura (removidos só se faltarem em duas)
+        self._missing: set[str] = set()
+        self._watcher: Optional[asyncio.Task] = None
+        self._reload_lock = asyncio.Lock()
+
+    # ── Consulta ───────────────────────────────────────────────────────────────
+
+    @property
+    def default(self) -> Optional[ModelService]:
+        return self._services.get(self.default_name)
+
+    @property
+    def ready(self) -> bool:
+        default = self.default
+        return default is not None and default.ready
+
+    def services(self) -> dict[str, ModelService]:
+        return dict(self._services)
+
+    def resolve(self, name: Optional[str] = None, symbol: Optional[str] = None) -> ModelService:
+        """
+        Seleciona o modelo de uma requisição.
+
+        Args:
+            name:   "nome" ou "nome@versão"; tem precedência sobre `symbol`.
+            symbol: usa um modelo treinado para o símbolo, se houver.
+
+        Raises:
+            KeyError: modelo/versão desconhecido.
+            LookupError: modelo padrão ainda não está pronto.
+        """
+        services = self._services
+        if name:
+            model_name, _, version = name.partition("@")
+            service = services.get(model_name)
+            if service is None or not service.ready:
+                raise KeyError(f"Unknown model '{model_name}'.")
+            if version and service.version != version:
+                raise KeyError(
+                    f"Model '{model_name}' is at version '{service.version}', not '{version}'."
+                )
+            return service
+
+        default = services.get(self.default_name)
+        if symbol and (default is None or default.metadata.get("symbol") != symbol):
+            for model_name in sorted(services):
+                service = services[model_name]
+                if service.ready and service.metadata.get("symbol") == symbol:
+                    return service
+
+        if default is None or not default.ready:
+            raise LookupError("Default model is not ready.")
+        return default
+
+    # ── Descoberta de artefatos ────────────────────────────────────────────────
+
+    def _metadata_path_for(self, model_path: str) -> str:
+        stem = os.path.splitext(model_path)[0]
+        for candidate in (f"{stem}.json", f"{stem}_metadata.json"):
+            if os.path.exists(candidate):
+                return candidate
+        return self.default_metadata_path
+
+    def _scan(self) -> dict[str, tuple[str, str, tuple]]:
+        """{nome: (caminho do modelo, caminho dos metadados, fingerprint)}."""
+        paths = {self.default_name: self.default_model_path}
+        try:
+            for entry in os.scandir(self.models_dir):
+                if entry.is_file() and entry.name.endswith(MODEL_SUFFIX):
+                    name = entry.name[: -len(MODEL_SUFFIX)]
+                    if "*" in self.names or name in self.names:
+                        paths.setdefault(name, entry.path)
+        except FileNotFoundError:
+            pass
+
+        found = {}
+        for name, model_path in paths.items():
+            metadata_path = self._metadata_path_for(model_path)
+            try:
+                model_stat = os.stat(model_path)
+                meta_stat = os.stat(metadata_path)
+            except FileNotFoundError:
+                continue
+            fingerprint = (
+                model_stat.st_mtime_ns, model_stat.st_size,
+                metadata_path, meta_stat.st_mtime_ns,
+            )
+            found[name] = (model_path, metadata_path, fingerprint)
+        return found
+
+    # ── Carga e troca ──────────────────────────────────────────────────────────
+
+    def _build(self, name: str, model_path: str, metadata_path: str) -> ModelService:
+        service = ModelService(model_path, metadata_path, load=False)
+        service.version = artifact_version(model_path)
+        service.start_up(self.warmup_batch_sizes, self.warmup_rounds)
+        service.loaded_at = datetime.utcnow().isoformat() + "Z"
+        return service
+
+    async def _load(self, name: str, model_path: str, metadata_path: str, fingerprint: tuple) -> bool:
+        is_default = name == self.default_name
+        try:
+            service = await asyncio.to_thread(self._build, name, model_path, metadata_path)
+        except Exception:
+            logger.exception("Failed to load model '%s' from '%s'", name, model_path)
+            MODEL_RELOADS.labels(result="failed").inc()
+            # Não tenta de novo até o arquivo mudar outra vez
+            self._fingerprints[name] = fingerprint
+            if is_default and self.default is None:
+                MODEL_LOAD_SUCCESS.set(0)
+            return False
+
+        if self.batching is not None:
+            service.start_batcher(*self.batching)
+
+        previous = self._services.get(name)
+        self._services = {**self._services, name: service}
+        self._fingerprints[name] = fingerprint
+        MODEL_REGISTRY_MODELS.set(len(self._services))
+        MODEL_RELOADS.labels(result="loaded").inc()
+        if is_default:
+            MODEL_LOAD_SUCCESS.set(1)
+            MODEL_READY.set(1)
+
+        if previous is not None:
+            logger.info(
+                "Model '%s' swapped: %s → %s", name, previous.version, service.version
+            )
+            # Itens já enfileirados no batcher antigo são processados antes do fim
+            await previous.stop_batcher()
+            previous.clear_result_cache()
+        else:
+            logger.info("Model '%s' registered (version %s)", name, service.version)
+        return True
+
+    async def load_all(self) -> None:
+        """Carga inicial: modelo padrão primeiro, depois os demais artefatos."""
+        found = self._scan()
+        if self.default_name in found:
+            await self._load(self.default_name, *found.pop(self.default_name))
+        for name in sorted(found):
+            await self._load(name, *found[name])
+
+    async def check_for_updates(self) -> None:
+        """
+        Uma varredura do watcher: carrega artefatos novos/alterados depois que
+        o fingerprint se repete em duas varreduras (arquivo terminou de ser
+        copiado) e descarta modelos ausentes em duas varreduras seguidas
+        (exceto o padrão).
+        """
+        async with self._reload_lock:
+            found = self._scan()
+            for name, (model_path, metadata_path, fingerprint) in sorted(found.items()):
+                if self._fingerprints.get(name) == fingerprint:
+                    self._pending.pop(name, None)
+                    continue
+                if self._pending.get(name) != fingerprint:
+                    self._pending[name] = fingerprint
+                    continue
+                self._pending.pop(name, None)
+                await self._load(name, model_path, metadata_path, fingerprint)
+
+            # Mesma regra de estabilidade da carga: um `stat` que falha durante
+            # uma cópia não atômica não tira o modelo do registro
+            missing = {n for n in self._services if n not in found and n != self.default_name}
+            removed = sorted(missing & self._missing)
+            self._missing = missing - set(removed)
+            if removed:
+                services = dict(self._services)
+                for name in removed:
+                    logger.info("Model '%s' removed from registry", name)
+                    service = services.pop(name)
+                    await service.stop_batcher()
+                    service.clear_result_cache()
+                    self._fingerprints.pop(name, None)
+                self._services = services
+                MODEL_REGISTRY_MODELS.set(len(services))
+
+    # ── Ciclo de vida ──────────────────────────────────────────────────────────
+
+    async def start(self, watch_interval: Optional[float] = None) -> None:
+        """Carga inicial e, opcionalmente, watcher periódico do diretório."""
+        await self.load_all()
+        if watch_interval:
+            self._watcher = asyncio.get_running_loop().create_task(self._watch(watch_interval))
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check_for_updates()
+            except Exception:
+                logger.exception("Model directory watch failed")
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        for service in self._services.values():
+            await service.stop_batcher()
@@ -1,14 +1,244 @@
+import asyncio
+import hashlib
 import json
 import logging
+import os
+import sys
+import threading
 import time
+from collections import OrderedDict
+from typing import Callable, Iterator, Optional, Union
 
 import numpy as np
 
-from app.config import LOOK_BACK
+from app.config import (
+    INFERENCE_BACKEND,
+    INFERENCE_PRECISION,
+    LOOK_BACK,
+    NUMPY_BACKEND_TOLERANCE,
+    NUMPY_BACKEND_VERIFY,
+    NUMPY_WEIGHTS_DIR,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_ENTRIES,
+)
+from app.middleware.timing import stage
+from app.services.executor_service import run_inference
+from app.services.forecast_engine import forecast_paths, iter_forecast, step_changes_pct
 
 logger = logging.getLogger(__name__)
 
 
+def artifact_version(path: str) -> str:
+    """Versão endereçada por conteúdo: prefixo do SHA-256 do artefato."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def weights_prefix(model_path: str, directory: str, version: str = "") -> str:
+    """Caminho (sem extensão) dos pesos NumPy exportados de uma versão do modelo."""
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(directory, f"{name}-{version or artifact_version(model_path)}")
+
+
+# ── Micro-batching ─────────────────────────────────────────────────────────────
+
+class InferenceBatcher:
+    """
+    Agrupa janelas de requisições concorrentes em um único forward pass.
+
+    Cada chamada a `submit` enfileira uma janela normalizada e aguarda o
+    resultado. Um loop em background retira itens da fila até atingir
+    `max_batch_size` ou até `max_wait_ms` após o primeiro item do lote,
+    executa o modelo uma única vez no executor de inferência (fora do event
+    loop) e devolve a cada chamador o ratio correspondente.
+    """
+
+    def __init__(
+        self,
+        infer_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int,
+        max_wait_ms: float,
+    ) -> None:
+        self._infer_fn = infer_fn
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        """Aceitando novos itens (falso já a partir do pedido de parada)."""
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    def start(self) -> None:
+        """Inicia o loop de agrupamento no event loop corrente."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Processa o que já está na fila e encerra o loop."""
+        if self.running:
+            # Chamadores que chegam depois daqui caem na inferência direta
+            self._stopping = True
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+    async def submit(self, window: np.ndarray) -> tuple[float, float]:
+        """
+        Enfileira uma janela normalizada de shape (LOOK_BACK,).
+
+        Returns:
+            (ratio previsto, tempo do forward pass do lote em ms)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._queue.put((window, future, loop.time()))
+        return await future
+
+    async def _run(self) -> None:
+        from app.middleware.metrics import INFERENCE_BATCH_SIZE, INFERENCE_QUEUE_WAIT
+
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self._max_wait
+
+            while len(batch) < self._max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            dispatched_at = loop.time()
+            for _, _, enqueued_at in batch:
+                INFERENCE_QUEUE_WAIT.observe(dispatched_at - enqueued_at)
+            INFERENCE_BATCH_SIZE.observe(len(batch))
+
+            X = np.stack([window for window, _, _ in batch])
+            try:
+                t0 = time.perf_counter()
+                ratios = await run_inference(self._infer_fn, X)
+                inference_ms = round((time.perf_counter() - t0) * 1000, 2)
+            except Exception as exc:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future, _), ratio in zip(batch, ratios):
+                if not future.done():
+                    future.set_result((float(ratio), inference_ms))
+
+        # Itens que chegaram depois do pedido de parada não ficam pendurados
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None and not item[1].done():
+                item[1].set_exception(RuntimeError("Inference batcher stopped."))
+
+
+# ── Cache de resultados (janelas repetidas) ────────────────────────────────────
+
+class ResultCache:
+    """
+    LRU limitado de ratios previstos, endereçado pelo conteúdo da janela.
+
+    A chave é o blake2b (128 bits) da versão do modelo + bytes da janela já
+    normalizada, na precisão servida: janelas iguais a menos de escala (preços
+    proporcionais) caem na mesma entrada, e um modelo novo nunca reaproveita
+    ratios do anterior. Thread-safe: é consultado no event loop e no executor.
+    """
+
+    # Chave (bytes de 16) + float + nó do OrderedDict (estimativa por entrada)
+    _ENTRY_BYTES = sys.getsizeof(bytes(16)) + sys.getsizeof(1.0) + 104
+
+    def __init__(self, model: str, max_entries: int) -> None:
+        from app.middleware.metrics import (
+            RESULT_CACHE_BYTES,
+            RESULT_CACHE_ENTRIES,
+            RESULT_CACHE_EVICTIONS,
+            RESULT_CACHE_LOOKUPS,
+        )
+
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[bytes, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = RESULT_CACHE_LOOKUPS.labels(model=model, result="hit")
+        self._misses = RESULT_CACHE_LOOKUPS.labels(model=model, result="miss")
+        self._evictions = RESULT_CACHE_EVICTIONS.labels(model=model)
+        # Gauges ajustados por diferença: a versão antiga de um modelo trocado
+        # a quente ainda atende requisições em andamento sem zerar a nova
+        self._entries_gauge = RESULT_CACHE_ENTRIES.labels(model=model)
+        self._bytes_gauge = RESULT_CACHE_BYTES.labels(model=model)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(window: np.ndarray, version: str) -> bytes:
+        digest = hashlib.blake2b(version.encode(), digest_size=16)
+        digest.update(window.tobytes())
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[float]:
+        with self._lock:
+            ratio = self._entries.get(key)
+            if ratio is None:
+                self._misses.inc()
+                return None
+            self._entries.move_to_end(key)
+        self._hits.inc()
+        return ratio
+
+    def put(self, key: bytes, ratio: float) -> None:
+        with self._lock:
+            added = key not in self._entries
+            self._entries[key] = ratio
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._evictions.inc(evicted)
+        self._adjust(int(added) - evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+        self._adjust(-removed)
+
+    def _adjust(self, delta: int) -> None:
+        if delta:
+            self._entries_gauge.inc(delta)
+            self._bytes_gauge.inc(delta * self._ENTRY_BYTES)
+
+
+# ── Model service ──────────────────────────────────────────────────────────────
+
 class ModelService:
     """
     Serviço responsável por carregar e servir o modelo LSTM para inferência.
@@ -19,79 +249,382 @@ class ModelService:
         Reconstrução: pred_price = y_pred * ref_price
     """
 
-    def __init__(self, model_path: str, metadata_path: str) -> None:
+    def __init__(
+        self,
+        model_path: str,
+        metadata_path: str,
+        backend: str = INFERENCE_BACKEND,
+        load: bool = True,
+        precision: str = INFERENCE_PRECISION,
+    ) -> None:
         self.model = None
         self.metadata: dict = {}
         self.load_time_ms: float = 0.0
-        self._load(model_path, metadata_path)
+        self.backend = backend
+        # Precisão pedida; após a carga, a efetivamente servida
+        self.precision = precision
+        self.model_path = model_path
+        self.metadata_path = metadata_path
+        # Identificação no registro de modelos (nome do artefato e hash do conteúdo)
+        self.name = os.path.splitext(os.path.basename(model_path))[0]
+        self.version = ""
+        self.loaded_at: Optional[str] = None
+        self.ready = False
+        self.startup_phases_ms: dict[str, float] = {}
+        self._batcher: Optional[InferenceBatcher] = None
+        self._mc_forward = None
+        self._result_cache: Optional[ResultCache] = (
+            ResultCache(self.name, RESULT_CACHE_MAX_ENTRIES) if RESULT_CACHE_ENABLED else None
+        )
+        if load:
+            self.load()
 
     # ── Loading ────────────────────────────────────────────────────────────────
 
-    def _load(self, model_path: str, metadata_path: str) -> None:
-        from tensorflow.keras.models import load_model as keras_load_model  # lazy import
-        from app.middleware.metrics import MODEL_LOAD_SUCCESS
+    def _record_phase(self, phase: str, started_at: float) -> None:
+        from app.middleware.metrics import MODEL_STARTUP_PHASE_SECONDS
 
+        elapsed = time.time() - started_at
+        self.startup_phases_ms[phase] = round(elapsed * 1000, 2)
+        MODEL_STARTUP_PHASE_SECONDS.labels(phase=phase).set(elapsed)
+
+    def load(self) -> None:
+        """Importa o backend e carrega o modelo e os metadados (fases "import" e "load")."""
         t0 = time.time()
         try:
-            self.model = keras_load_model(model_path)
-            with open(metadata_path, "r", encoding="utf-8") as f:
+            loader = self._import_backend()
+            self._record_phase("import", t0)
+
+            t1 = time.time()
+            self.model = loader(self.model_path)
+            self.clear_result_cache()
+            with open(self.metadata_path, "r", encoding="utf-8") as f:
                 self.metadata = json.load(f)
+            self._record_phase("load", t1)
+
             self.load_time_ms = round((time.time() - t0) * 1000, 2)
-            MODEL_LOAD_SUCCESS.set(1)
-            logger.info("Model loaded in %.0f ms from '%s'", self.load_time_ms, model_path)
+            logger.info(
+                "Model loaded in %.0f ms from '%s' (backend=%s)",
+                self.load_time_ms, self.model_path, self.backend,
+            )
         except Exception as exc:
-            MODEL_LOAD_SUCCESS.set(0)
-            logger.error("Failed to load model from '%s': %s", model_path, exc)
+            logger.error("Failed to load model from '%s': %s", self.model_path, exc)
             raise
 
-    # ── Single-step prediction ─────────────────────────────────────────────────
+    def _import_backend(self) -> Callable[[str], object]:
+        """Importa o backend (a parte cara do cold start no Keras) e devolve o loader."""
+        if self.backend == "keras":
+            from tensorflow.keras.models import load_model as keras_load_model  # lazy import
 
-    def predict(self, prices: list[float]) -> dict:
-        """
-        Prediz o preço de fechamento do próximo dia.
+            if self.precision != "float32":
+                logger.error(
+                    "Precision '%s' requires INFERENCE_BACKEND=numpy; serving float32", self.precision
+                )
+                self.precision = "float32"
+            return keras_load_model
 
-        Args:
-            prices: lista de exatamente LOOK_BACK preços de fechamento,
-                    ordenada do mais antigo ao mais recente.
+        if self.backend == "numpy":
+            import h5py  # noqa: F401 — lazy import, contabilizado na fase "import"
 
-        Returns:
-            Dicionário com preço previsto e métricas auxiliares.
+            return self._load_numpy
+
+        raise ValueError(f"Unknown inference backend '{self.backend}' (use 'keras' or 'numpy').")
+
+    def _load_numpy(self, model_path: str):
+        from app.services.numpy_lstm import NumpyLSTM, max_abs_diff_vs_keras
+
+        if NUMPY_WEIGHTS_DIR:
+            prefix = weights_prefix(model_path, NUMPY_WEIGHTS_DIR, self.version)
+            try:
+                model = NumpyLSTM.load_shared(model_path, prefix)
+            except OSError as exc:
+                logger.warning("Shared NumPy weights unavailable (%s); loading in memory", exc)
+                model = NumpyLSTM.from_keras(model_path)
+        else:
+            model = NumpyLSTM.from_keras(model_path)
+        if NUMPY_BACKEND_VERIFY:
+            diff = max_abs_diff_vs_keras(model_path)
+            if diff > NUMPY_BACKEND_TOLERANCE:
+                raise ValueError(
+                    f"NumPy backend diverges from Keras: max abs diff {diff:.3e} "
+                    f"> tolerance {NUMPY_BACKEND_TOLERANCE:.1e}."
+                )
+            logger.info("NumPy backend verified against Keras (max abs diff %.3e)", diff)
+        return self._with_precision(model)
+
+    def _with_precision(self, model):
+        """Aplica a precisão pedida; variantes sem aprovação seguem em float32."""
+        from app.services.numpy_lstm import PRECISIONS
+        from app.services.precision import approval_status
+
+        if self.precision not in PRECISIONS:
+            raise ValueError(
+                f"Unknown inference precision '{self.precision}' (use one of {', '.join(PRECISIONS)})."
+            )
+        if self.precision != model.precision:
+            approved, reason = approval_status(self.model_path, self.version, self.precision)
+            if approved:
+                model = model.with_precision(self.precision)
+                logger.info("Serving '%s' in %s: %s", self.model_path, self.precision, reason)
+            else:
+                logger.error(
+                    "Refusing %s inference for '%s': %s; serving float32",
+                    self.precision, self.model_path, reason,
+                )
+        self.precision = model.precision
+        return model
+
+    def warm_up(self, batch_sizes: list[int], rounds: int = 1) -> None:
+        """
+        Executa inferências descartáveis em cada tamanho de lote servido.
+
+        A primeira chamada (fase "trace") paga o tracing do grafo; as demais
+        (fase "warmup") cobrem os outros shapes que o micro-batching produz.
+        Ao final o serviço é marcado como pronto.
         """
+        t0 = time.time()
+        self._infer(np.ones((1, LOOK_BACK)))
+        self._record_phase("trace", t0)
+
+        t1 = time.time()
+        for batch_size in sorted(set(batch_sizes)):
+            for _ in range(max(1, rounds)):
+                self._infer(np.ones((batch_size, LOOK_BACK)))
+        # Caminho do MC dropout: no Keras, um único trace serve qualquer K
+        self._infer_stochastic(np.ones((2, LOOK_BACK)))
+        self._record_phase("warmup", t1)
+
+        self.ready = True
+        logger.info(
+            "Model warmed up for batch sizes %s (phases ms: %s)",
+            sorted(set(batch_sizes)), self.startup_phases_ms,
+        )
+
+    def start_up(self, warmup_batch_sizes: list[int], warmup_rounds: int = 1) -> None:
+        """Pipeline completo de inicialização: import → load → trace → warm-up."""
+        if self.model is None:
+            self.load()
+        self.warm_up(warmup_batch_sizes, warmup_rounds)
+
+    # ── Micro-batching lifecycle ───────────────────────────────────────────────
+
+    def start_batcher(self, max_batch_size: int, max_wait_ms: float) -> None:
+        """Ativa o micro-batching para `predict_async` (chamar dentro do event loop)."""
+        self._batcher = InferenceBatcher(self._infer, max_batch_size, max_wait_ms)
+        self._batcher.start()
+        logger.info(
+            "Inference micro-batching enabled (max_batch_size=%d, max_wait_ms=%.1f)",
+            max_batch_size, max_wait_ms,
+        )
+
+    async def stop_batcher(self) -> None:
+        if self._batcher is not None:
+            batcher, self._batcher = self._batcher, None
+            await batcher.stop()
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _normalize(self, prices: list[float]) -> tuple[np.ndarray, float]:
+        """Valida e normaliza a janela. Retorna (janela normalizada, preço de referência)."""
         if len(prices) != LOOK_BACK:
             raise ValueError(
                 f"Expected exactly {LOOK_BACK} prices, got {len(prices)}."
             )
 
-        arr = np.array(prices, dtype=np.float64)
-        ref_price = arr[0]  # primeiro elemento da janela → divisor
+        window = self._normalize_windows([prices])[0]
+        return window, float(prices[0])  # primeiro elemento da janela → divisor
 
-        # Normalização per-window
-        X = (arr / ref_price).reshape(1, LOOK_BACK, 1)
+    def _normalize_windows(self, windows: Union[np.ndarray, list[list[float]]]) -> np.ndarray:
+        """
+        Normaliza (N, LOOK_BACK) janelas pelo primeiro preço de cada uma.
 
-        t0 = time.time()
-        ratio = float(self.model.predict(X, verbose=0)[0, 0])
-        inference_ms = round((time.time() - t0) * 1000, 2)
+        Único ponto de normalização (predict, predict_windows, backtest e
+        forecast): a divisão é feita já na precisão do modelo, sem cópia
+        float64 intermediária, e a mesma janela vira sempre os mesmos bytes
+        de entrada em todos os endpoints.
+        """
+        with stage("normalize"):
+            arr = np.asarray(windows, dtype=np.float64 if self.precision == "float64" else np.float32)
+            return arr / arr[:, :1]
+
+    def _infer(self, X: np.ndarray) -> np.ndarray:
+        """Forward pass de um lote normalizado (batch, LOOK_BACK) → ratios (batch,)."""
+        with stage("inference"):
+            return self.model.predict(X.reshape(-1, LOOK_BACK, 1), verbose=0)[:, 0]
 
+    @staticmethod
+    def _build_result(
+        ratio: float, ref_price: float, last_price: float, inference_ms: float
+    ) -> dict:
         pred_price = ratio * ref_price
-        last_price = float(prices[-1])
         change_pct = ((pred_price / last_price) - 1.0) * 100.0
 
         return {
             "predicted_ratio": round(ratio, 6),
             "predicted_price": round(pred_price, 4),
-            "reference_price": round(float(ref_price), 4),
+            "reference_price": round(ref_price, 4),
             "last_known_price": round(last_price, 4),
             "expected_change_pct": round(change_pct, 4),
             "inference_time_ms": inference_ms,
         }
 
+    # ── Single-step prediction ─────────────────────────────────────────────────
+
+    def predict(self, prices: list[float]) -> dict:
+        """
+        Prediz o preço de fechamento do próximo dia.
+
+        Args:
+            prices: lista de exatamente LOOK_BACK preços de fechamento,
+                    ordenada do mais antigo ao mais recente.
+
+        Returns:
+            Dicionário com preço previsto e métricas auxiliares.
+        """
+        window, ref_price = self._normalize(prices)
+        key, ratio = self._cached_ratio(window)
+        if ratio is not None:
+            return self._build_result(ratio, ref_price, float(prices[-1]), 0.0)
+        return self._predict_window(window, ref_price, float(prices[-1]), key)
+
+    def _predict_window(
+        self, window: np.ndarray, ref_price: float, last_price: float, key: Optional[bytes]
+    ) -> dict:
+        t0 = time.perf_counter()
+        ratio = float(self._infer(window[np.newaxis])[0])
+        inference_ms = round((time.perf_counter() - t0) * 1000, 2)
+        if key is not None:
+            self._result_cache.put(key, ratio)
+        return self._build_result(ratio, ref_price, last_price, inference_ms)
+
+    async def predict_async(self, prices: list[float]) -> dict:
+        """
+        Versão assíncrona de `predict` que passa pelo micro-batching.
+
+        Janelas já vistas por esta versão do modelo saem do cache de resultados
+        ainda no event loop, sem forward pass. Sem batcher ativo, a inferência
+        roda diretamente no executor de inferência.
+        """
+        window, ref_price = self._normalize(prices)
+        last_price = float(prices[-1])
+        key, ratio = self._cached_ratio(window)
+        if ratio is not None:
+            return self._build_result(ratio, ref_price, last_price, 0.0)
+
+        if self._batcher is None or not self._batcher.running:
+            return await run_inference(self._predict_window, window, ref_price, last_price, key)
+
+        # O forward pass roda na task do batcher, fora do contexto da requisição:
+        # a etapa "inference" aqui inclui a espera na fila
+        with stage("inference"):
+            ratio, inference_ms = await self._batcher.submit(window)
+        if key is not None:
+            self._result_cache.put(key, ratio)
+        return self._build_result(ratio, ref_price, last_price, inference_ms)
+
+    # ── Cache de resultados ────────────────────────────────────────────────────
+
+    def _cached_ratio(self, window: np.ndarray) -> tuple[Optional[bytes], Optional[float]]:
+        """(chave, ratio em cache ou None); chave None com o cache desativado."""
+        if self._result_cache is None:
+            return None, None
+        key = ResultCache.key(window, self.version)
+        return key, self._result_cache.get(key)
+
+    def clear_result_cache(self) -> None:
+        """Descarta os resultados em cache (modelo recarregado ou substituído)."""
+        if self._result_cache is not None:
+            self._result_cache.clear()
+
+    # ── Batch prediction ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def validate_windows(rows: list) -> tuple[np.ndarray, np.ndarray, dict[int, str]]:
+        """
+        Valida N janelas de uma vez.
+
+        Args:
+            rows: sequência de janelas (listas de preços) ou array (N, LOOK_BACK).
+
+        Returns:
+            (janelas válidas (M, LOOK_BACK), índices originais das válidas (M,),
+             {índice: mensagem de erro} das inválidas)
+        """
+        errors: dict[int, str] = {}
+        if isinstance(rows, np.ndarray):
+            windows = np.asarray(rows, dtype=np.float64)
+            candidates = np.arange(len(windows))
+        else:
+            candidates = []
+            for idx, row in enumerate(rows):
+                if len(row) != LOOK_BACK:
+                    errors[idx] = f"Expected exactly {LOOK_BACK} prices, got {len(row)}."
+                else:
+                    candidates.append(idx)
+            candidates = np.asarray(candidates, dtype=np.int64)
+            windows = np.array([rows[idx] for idx in candidates], dtype=np.float64).reshape(
+                -1, LOOK_BACK
+            )
+
+        valid = np.isfinite(windows).all(axis=1) & (windows > 0).all(axis=1)
+        for idx in candidates[~valid]:
+            errors[int(idx)] = "Prices must be finite, positive numbers."
+
+        return windows[valid], candidates[valid], errors
+
+    def predict_windows(self, windows: np.ndarray) -> dict:
+        """
+        Predição vetorizada de N janelas já validadas, em um único forward pass.
+
+        Args:
+            windows: array (N, LOOK_BACK) de preços, do mais antigo ao mais recente.
+
+        Returns:
+            Dicionário de arrays (N,) com os mesmos campos de `predict`,
+            mais o tempo total de inferência do lote.
+        """
+        ref_prices = windows[:, 0]
+        last_prices = windows[:, -1]
+        ratios, inference_ms = self.predict_ratios(windows)
+
+        pred_prices = ratios * ref_prices
+        return {
+            "predicted_ratio": np.round(ratios, 6),
+            "predicted_price": np.round(pred_prices, 4),
+            "reference_price": np.round(ref_prices, 4),
+            "last_known_price": np.round(last_prices, 4),
+            "expected_change_pct": np.round((pred_prices / last_prices - 1.0) * 100.0, 4),
+            "inference_time_ms": inference_ms,
+        }
+
+    def predict_ratios(self, windows: np.ndarray) -> tuple[np.ndarray, float]:
+        """
+        Ratios (N,) float64 sem arredondamento de N janelas de preços e o tempo
+        de inferência (ms); preço previsto = ratio × windows[:, 0].
+        """
+        t0 = time.perf_counter()
+        ratios = np.asarray(self._infer(self._normalize_windows(windows)), dtype=np.float64)
+        return ratios, round((time.perf_counter() - t0) * 1000, 2)
+
     # ── Multi-step forecast ────────────────────────────────────────────────────
 
+    @staticmethod
+    def _histories(series: list[list[float]]) -> np.ndarray:
+        """Empilha as últimas LOOK_BACK observações de cada série em (n_series, LOOK_BACK)."""
+        for prices in series:
+            if len(prices) < LOOK_BACK:
+                raise ValueError(
+                    f"Need at least {LOOK_BACK} historical prices, got {len(prices)}."
+                )
+        return np.array([prices[-LOOK_BACK:] for prices in series], dtype=np.float64)
+
     def forecast(self, prices: list[float], days: int) -> list[dict]:
         """
         Previsão iterativa de múltiplos dias usando janela deslizante.
 
-        Cada preço previsto alimenta a janela da próxima iteração.
+        Cada preço previsto alimenta a janela da próxima iteração. A janela
+        vive em um ring buffer pré-alocado e o arredondamento é aplicado só
+        no resultado final.
 
         Args:
             prices: histórico de preços (precisa ter pelo menos LOOK_BACK valores).
@@ -100,25 +633,159 @@ class ModelService:
         Returns:
             Lista de dicts com {day, predicted_price, expected_change_pct}.
         """
-        if len(prices) < LOOK_BACK:
-            raise ValueError(
-                f"Need at least {LOOK_BACK} historical prices, got {len(prices)}."
-            )
+        histories = self._histories([prices])
+        paths = forecast_paths(self._infer, histories, days, self._normalize_windows)
+        changes = step_changes_pct(histories[:, -1], paths)
 
-        # Trabalha com os últimos LOOK_BACK preços
-        window = list(prices[-LOOK_BACK:])
-        results = []
-
-        for day_idx in range(1, days + 1):
-            pred = self.predict(window)
-            results.append(
-                {
-                    "day": day_idx,
-                    "predicted_price": pred["predicted_price"],
-                    "expected_change_pct": pred["expected_change_pct"],
-                }
-            )
-            # Desliza a janela: descarta o mais antigo, acrescenta a previsão
-            window = window[1:] + [pred["predicted_price"]]
+        return [
+            {
+                "day": day_idx + 1,
+                "predicted_price": round(float(price), 4),
+                "expected_change_pct": round(float(change), 4),
+            }
+            for day_idx, (price, change) in enumerate(zip(paths[0], changes[0]))
+        ]
+
+    def forecast_steps(self, prices: list[float], days: int) -> Iterator[dict]:
+        """
+        Versão incremental de `forecast`: gera cada dia assim que é previsto.
+
+        Mantém só a janela corrente em memória, para horizontes longos e
+        respostas em streaming. Cada item tem o mesmo formato de `forecast`.
+        """
+        histories = self._histories([prices])
+        previous = float(histories[0, -1])
+        for day_idx, preds in enumerate(iter_forecast(self._infer, histories, days, self._normalize_windows)):
+            price = float(preds[0])
+            yield {
+                "day": day_idx + 1,
+                "predicted_price": round(price, 4),
+                "expected_change_pct": round((price / previous - 1.0) * 100.0, 4),
+            }
+            previous = price
+
+    def forecast_many(self, series: list[list[float]], days: int) -> np.ndarray:
+        """
+        Previsão vetorizada de várias séries (símbolos ou cenários) em lockstep.
+
+        Todas as séries avançam juntas, com um único forward pass por dia.
+
+        Args:
+            series: lista de históricos (cada um com pelo menos LOOK_BACK valores).
+            days:   número de dias à frente a prever.
+
+        Returns:
+            Array (n_series, days) com os preços previstos (sem arredondamento).
+        """
+        return forecast_paths(self._infer, self._histories(series), days, self._normalize_windows)
+
+    # ── Incerteza (MC dropout) ─────────────────────────────────────────────────
+
+    def _infer_stochastic(self, X: np.ndarray) -> np.ndarray:
+        """
+        Forward pass com o dropout de treino ativo (batch, LOOK_BACK) → ratios (batch,).
+
+        Cada linha recebe máscaras próprias: replicar uma janela K vezes gera K
+        amostras independentes em um único forward pass.
+        """
+        X = X.reshape(-1, LOOK_BACK, 1)
+        with stage("inference"):
+            if self.backend == "numpy":
+                return self.model.predict(X, rng=np.random.default_rng())[:, 0]
+            return self._keras_mc_forward()(X.astype(np.float32)).numpy()[:, 0]
+
+    def _keras_mc_forward(self):
+        if self._mc_forward is None:
+            import keras  # lazy import
+            import tensorflow as tf
+
+            layers = [layer for layer in self.model.layers if not isinstance(layer, keras.layers.InputLayer)]
+
+            @tf.function(input_signature=[tf.TensorSpec([None, LOOK_BACK, 1], tf.float32)])
+            def forward(x):
+                # BatchNorm segue em modo inferência: com a janela replicada, as
+                # estatísticas do lote seriam degeneradas
+                for layer in layers:
+                    x = layer(x, training=not isinstance(layer, keras.layers.BatchNormalization))
+                return x
+
+            self._mc_forward = forward
+        return self._mc_forward
+
+    @staticmethod
+    def _mc_cost(samples: int, elapsed: float, prediction_type: str) -> dict:
+        from app.middleware.metrics import MC_DROPOUT_DURATION, MC_DROPOUT_SAMPLES
+
+        MC_DROPOUT_SAMPLES.observe(samples)
+        MC_DROPOUT_DURATION.labels(prediction_type=prediction_type).observe(elapsed)
+        return {
+            "samples": samples,
+            "inference_time_ms": round(elapsed * 1000, 2),
+            "samples_per_second": round(samples / max(elapsed, 1e-9), 1),
+        }
+
+    @staticmethod
+    def _bands(sampled: np.ndarray, quantiles: list[float]) -> list[dict]:
+        return [
+            {"quantile": q, "predicted_price": round(float(v), 4)}
+            for q, v in zip(quantiles, np.quantile(sampled, quantiles))
+        ]
+
+    def predict_interval(self, prices: list[float], samples: int, quantiles: list[float]) -> dict:
+        """
+        Distribuição do preço do próximo dia por MC dropout (K passes em um lote).
+
+        Returns:
+            {samples, inference_time_ms, samples_per_second, mean_price,
+             std_price, quantiles: [{quantile, predicted_price}]}
+        """
+        window, ref_price = self._normalize(prices)
+
+        t0 = time.perf_counter()
+        ratios = self._infer_stochastic(np.repeat(window[np.newaxis], samples, axis=0))
+        elapsed = time.perf_counter() - t0
+
+        sampled = np.asarray(ratios, dtype=np.float64) * ref_price
+        return {
+            **self._mc_cost(samples, elapsed, "manual"),
+            "mean_price": round(float(sampled.mean()), 4),
+            "std_price": round(float(sampled.std()), 4),
+            "quantiles": self._bands(sampled, quantiles),
+        }
+
+    def forecast_interval(
+        self, prices: list[float], days: int, samples: int, quantiles: list[float]
+    ) -> dict:
+        """
+        Bandas por dia do forecast: K trajetórias estocásticas avançando em lockstep.
+
+        Returns:
+            {samples, inference_time_ms, samples_per_second,
+             days: [[{quantile, predicted_price}] por dia]}
+        """
+        histories = np.repeat(self._histories([prices]), samples, axis=0)
+
+        t0 = time.perf_counter()
+        paths = forecast_paths(self._infer_stochastic, histories, days, self._normalize_windows)
+        elapsed = time.perf_counter() - t0
+
+        return {
+            **self._mc_cost(samples, elapsed, "forecast"),
+            "days": [self._bands(paths[:, day_idx], quantiles) for day_idx in range(days)],
+        }
 
-        return results
+    def forecast_interval_steps(
+        self, prices: list[float], days: int, samples: int, quantiles: list[float]
+    ) -> Iterator[list[dict]]:
+        """Versão incremental de `forecast_interval`: as bandas de cada dia assim que prontas."""
+        histories = np.repeat(self._histories([prices]), samples, axis=0)
+        elapsed = 0.0
+        steps = iter_forecast(self._infer_stochastic, histories, days, self._normalize_windows)
+        while True:
+            t0 = time.perf_counter()
+            preds = next(steps, None)
+            elapsed += time.perf_counter() - t0
+            if preds is None:
+                break
+            yield self._bands(preds, quantiles)
+        self._mc_cost(samples, elapsed, "forecast")
@@ -0,0 +1,538 @@
+"""
+Backend de inferência em NumPy puro para a LSTM servida pela API.
+
+Os pesos são lidos diretamente do arquivo `.keras` (zip com `config.json` +
+`model.weights.h5`), sem importar TensorFlow. A BatchNormalization (modo
+inferência) é dobrada na camada Dense seguinte e o forward pass roda em
+float32 com uma única multiplicação de matriz por timestep e camada.
+
+As taxas de dropout do treino (camadas Dropout, `dropout` e
+`recurrent_dropout` das LSTMs) ficam registradas junto dos pesos: com um
+gerador aleatório, `predict` aplica as mesmas máscaras do modo de treino do
+Keras (MC dropout) e cada linha do lote vira uma amostra independente.
+
+`with_precision` gera as variantes de precisão servidas: float64 (referência),
+float32 (padrão) e int8 (pesos quantizados por canal de saída, desquantizados
+a cada forward pass). A comparação de acurácia entre elas fica em
+`app.services.precision`.
+
+Para servir com vários workers, os pesos já dobrados são exportados uma vez
+para um único `.npy` float32 plano (mais um manifesto JSON com offsets e
+shapes) e abertos com memory-map: todos os processos compartilham as mesmas
+páginas do page cache em vez de manter N cópias dos pesos.
+
+Uso offline para conferir a paridade com o Keras ou exportar os pesos:
+
+    python -m app.services.numpy_lstm models/lstm_petr4_final.keras --tolerance 1e-4
+    python -m app.services.numpy_lstm models/lstm_petr4_final.keras --export data/weights
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import zipfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_SKIPPED_LAYERS = {"InputLayer"}
+
+# Versão do manifesto de `export`; exportações antigas são refeitas por `load_shared`
+_EXPORT_FORMAT = 2
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # Forma via tanh: estável numericamente e sem overflow de exp()
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _dropout_mask(shape: tuple, rate: float, rng: np.random.Generator) -> np.ndarray:
+    """Máscara de dropout invertido (Keras): 0 com prob. `rate`, senão 1 / (1 - rate)."""
+    keep = rng.random(shape, dtype=np.float32) >= rate
+    return keep.astype(np.float32) / np.float32(1.0 - rate)
+
+
+# Matrizes de pesos quantizadas na variante int8 (biases ficam em float32)
+_QUANTIZED_WEIGHTS = ("kernel", "recurrent", "shift_kernel")
+
+PRECISIONS = ("float64", "float32", "int8")
+
+
+def quantize_int8(weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Quantização simétrica por canal de saída (coluna): W ≈ q * scale.
+
+    Returns:
+        (q int8 com o shape de `weights`, scale float32 (colunas,))
+    """
+    weights = np.asarray(weights, dtype=np.float32)
+    scale = np.abs(weights).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(weights / scale), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def _weight(layer: dict, name: str, dtype) -> np.ndarray:
+    """Matriz de pesos no dtype do cálculo (desquantiza as variantes int8)."""
+    scale = layer.get(f"{name}_scale")
+    if scale is None:
+        return layer[name]
+    return layer[name].astype(dtype) * scale
+
+
+def _activation(name: str):
+    if name == "relu":
+        return lambda x: np.maximum(x, 0.0)
+    if name == "tanh":
+        return np.tanh
+    if name == "sigmoid":
+        return _sigmoid
+    if name == "linear":
+        return None
+    raise ValueError(f"Unsupported activation '{name}'.")
+
+
+class NumpyLSTM:
+    """
+    Forward pass de uma pilha LSTM → (BatchNorm) → Dense em NumPy.
+
+    `predict(X, verbose=0)` imita a assinatura do Keras e devolve um array
+    (batch, 1), permitindo usar esta classe como substituta de `model`.
+    """
+
+    def __init__(
+        self, lstm_layers: list[dict], dense_layers: list[dict], dtype=np.float32
+    ) -> None:
+        self.lstm_layers = lstm_layers
+        self.dense_layers = dense_layers
+        self.dtype = dtype
+
+    # ── Construção ─────────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_keras(cls, model_path: str) -> "NumpyLSTM":
+        """Extrai os pesos de um arquivo `.keras` (formato Keras 3) sem TensorFlow."""
+        import h5py  # lazy import
+
+        with zipfile.ZipFile(model_path) as archive:
+            config = json.loads(archive.read("config.json"))
+            weights_blob = archive.read("model.weights.h5")
+
+        layers_cfg = config["config"]["layers"]
+        lstm_layers: list[dict] = []
+        dense_layers: list[dict] = []
+        pending_bn = None
+        # Dropout pendente: aplicado à entrada da próxima LSTM/Dense
+        pending_dropout = 0.0
+        dropout_after_bn = False
+
+        with h5py.File(io.BytesIO(weights_blob), "r") as h5:
+            for layer in layers_cfg:
+                kind = layer["class_name"]
+                cfg = layer["config"]
+                if kind in _SKIPPED_LAYERS:
+                    continue
+                if kind == "Dropout":
+                    if pending_dropout and dropout_after_bn != (pending_bn is not None):
+                        raise ValueError("Dropout on both sides of BatchNormalization is not supported.")
+                    # Dropouts seguidos equivalem a um só com keep = produto dos keeps
+                    pending_dropout = 1.0 - (1.0 - pending_dropout) * (1.0 - cfg["rate"])
+                    dropout_after_bn = pending_bn is not None
+                    continue
+                group = h5["layers"][cfg["name"]]
+
+                if kind == "LSTM":
+                    if dense_layers or pending_bn is not None:
+                        raise ValueError("LSTM layers must precede BatchNorm/Dense layers.")
+                    if cfg["activation"] != "tanh" or cfg["recurrent_activation"] != "sigmoid":
+                        raise ValueError("Only tanh/sigmoid LSTM activations are supported.")
+                    cell = group["cell"]["vars"]
+                    params = cls._lstm_params(
+                        kernel=cell["0"][()],
+                        recurrent=cell["1"][()],
+                        bias=cell["2"][()] if cfg.get("use_bias", True) else None,
+                        return_sequences=cfg["return_sequences"],
+                    )
+                    params["input_dropout"] = pending_dropout
+                    params["dropout"] = float(cfg.get("dropout", 0.0))
+                    params["recurrent_dropout"] = float(cfg.get("recurrent_dropout", 0.0))
+                    lstm_layers.append(params)
+                    pending_dropout = 0.0
+                elif kind == "BatchNormalization":
+                    v = group["vars"]
+                    gamma, beta, mean, var = (v[str(i)][()] for i in range(4))
+                    scale = gamma / np.sqrt(var + cfg["epsilon"])
+                    pending_bn = (scale, beta - mean * scale)
+                elif kind == "Dense":
+                    kernel = group["vars"]["0"][()].astype(np.float64)
+                    bias = (
+                        group["vars"]["1"][()].astype(np.float64)
+                        if cfg.get("use_bias", True)
+                        else np.zeros(kernel.shape[1])
+                    )
+                    layer_params = {"input_dropout": pending_dropout}
+                    if pending_bn is not None:
+                        # Dense(BN(x)) = (x * s + t) @ W + b = x @ (s[:, None] * W) + (t @ W + b)
+                        scale, shift = pending_bn
+                        if pending_dropout and dropout_after_bn:
+                            # Com máscara m entre BN e Dense, o termo t @ W vira (t * m) @ W:
+                            # a correção (m - 1) @ (t[:, None] * W) é somada só no MC dropout
+                            layer_params["shift_kernel"] = (shift[:, None] * kernel).astype(np.float32)
+                        bias = shift @ kernel + bias
+                        kernel = scale[:, None] * kernel
+                        pending_bn = None
+                    layer_params.update(
+                        kernel=kernel.astype(np.float32),
+                        bias=bias.astype(np.float32),
+                        activation=cfg["activation"],
+                    )
+                    dense_layers.append(layer_params)
+                    pending_dropout = 0.0
+                else:
+                    raise ValueError(f"Unsupported layer type '{kind}' in '{model_path}'.")
+
+        if pending_bn is not None:
+            raise ValueError("BatchNormalization must be followed by a Dense layer.")
+        if pending_dropout:
+            raise ValueError("Dropout must be followed by an LSTM or Dense layer.")
+        if not lstm_layers or not dense_layers:
+            raise ValueError(f"'{model_path}' is not an LSTM → Dense network.")
+
+        return cls(lstm_layers, dense_layers)
+
+    # ── Pesos exportados (memory-map) ──────────────────────────────────────────
+
+    def export(self, prefix: str) -> None:
+        """
+        Grava os pesos em `<prefix>.npy` (float32 plano) e `<prefix>.json` (manifesto).
+
+        Ambos são gravados via arquivo temporário + rename; o manifesto vai por
+        último e marca a exportação como completa.
+        """
+        chunks: list[np.ndarray] = []
+        offset = 0
+
+        def add(array: np.ndarray) -> dict:
+            nonlocal offset
+            entry = {"offset": offset, "shape": list(array.shape)}
+            chunks.append(np.ascontiguousarray(array, dtype=np.float32).ravel())
+            offset += array.size
+            return entry
+
+        manifest = {
+            "format": _EXPORT_FORMAT,
+            "lstm": [
+                {
+                    "kernel": add(layer["kernel"]),
+                    "recurrent": add(layer["recurrent"]),
+                    "bias": add(layer["bias"]),
+                    "units": layer["units"],
+                    "return_sequences": layer["return_sequences"],
+                    "input_dropout": layer.get("input_dropout", 0.0),
+                    "dropout": layer.get("dropout", 0.0),
+                    "recurrent_dropout": layer.get("recurrent_dropout", 0.0),
+                }
+                for layer in self.lstm_layers
+            ],
+            "dense": [
+                {
+                    "kernel": add(layer["kernel"]),
+                    "bias": add(layer["bias"]),
+                    "activation": layer["activation"],
+                    "input_dropout": layer.get("input_dropout", 0.0),
+                    **(
+                        {"shift_kernel": add(layer["shift_kernel"])}
+                        if "shift_kernel" in layer
+                        else {}
+                    ),
+                }
+                for layer in self.dense_layers
+            ],
+        }
+
+        os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+        tmp = f"{prefix}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.concatenate(chunks))
+        os.replace(tmp, f"{prefix}.npy")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, f"{prefix}.json")
+
+    @classmethod
+    def from_export(cls, prefix: str) -> "NumpyLSTM":
+        """Abre pesos exportados por `export` com memory-map (views somente leitura)."""
+        with open(f"{prefix}.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        flat = np.asarray(np.load(f"{prefix}.npy", mmap_mode="r"))
+
+        def view(entry: dict) -> np.ndarray:
+            size = int(np.prod(entry["shape"]))
+            return flat[entry["offset"] : entry["offset"] + size].reshape(entry["shape"])
+
+        lstm_layers = [
+            {
+                "kernel": view(layer["kernel"]),
+                "recurrent": view(layer["recurrent"]),
+                "bias": view(layer["bias"]),
+                "units": layer["units"],
+                "return_sequences": layer["return_sequences"],
+                "input_dropout": layer["input_dropout"],
+                "dropout": layer["dropout"],
+                "recurrent_dropout": layer["recurrent_dropout"],
+            }
+            for layer in manifest["lstm"]
+        ]
+        dense_layers = [
+            {
+                "kernel": view(layer["kernel"]),
+                "bias": view(layer["bias"]),
+                "activation": layer["activation"],
+                "input_dropout": layer["input_dropout"],
+                **(
+                    {"shift_kernel": view(layer["shift_kernel"])}
+                    if "shift_kernel" in layer
+                    else {}
+                ),
+            }
+            for layer in manifest["dense"]
+        ]
+        return cls(lstm_layers, dense_layers)
+
+    @staticmethod
+    def _export_format(prefix: str) -> int:
+        try:
+            with open(f"{prefix}.json", "r", encoding="utf-8") as f:
+                return int(json.load(f).get("format", 1))
+        except FileNotFoundError:
+            return 0
+
+    @classmethod
+    def load_shared(cls, model_path: str, prefix: str) -> "NumpyLSTM":
+        """
+        Exporta `model_path` para `prefix` se ainda não existir (ou for de formato
+        antigo) e abre com memory-map.
+
+        A exportação roda sob o lock `<prefix>.lock`: com vários workers
+        iniciando a frio, só o primeiro exporta; os demais esperam o lock e
+        abrem o mesmo arquivo (mesmas páginas de memória).
+        """
+        from app.services.leader import file_lock
+
+        if cls._export_format(prefix) != _EXPORT_FORMAT:
+            with file_lock(f"{prefix}.lock"):
+                # Outro worker pode ter exportado enquanto este esperava o lock
+                if cls._export_format(prefix) != _EXPORT_FORMAT:
+                    cls.from_keras(model_path).export(prefix)
+                    logger.info("Exported NumPy weights of '%s' to '%s.npy'", model_path, prefix)
+        return cls.from_export(prefix)
+
+    # ── Precisão ───────────────────────────────────────────────────────────────
+
+    @property
+    def precision(self) -> str:
+        if any(f"{name}_scale" in layer for layer in self.lstm_layers for name in _QUANTIZED_WEIGHTS):
+            return "int8"
+        return np.dtype(self.dtype).name
+
+    @property
+    def weights_nbytes(self) -> int:
+        """Bytes ocupados pelos pesos (matrizes, biases e escalas)."""
+        return sum(
+            value.nbytes
+            for layer in self.lstm_layers + self.dense_layers
+            for value in layer.values()
+            if isinstance(value, np.ndarray)
+        )
+
+    def with_precision(self, precision: str) -> "NumpyLSTM":
+        """
+        Variante do modelo na precisão pedida ("float64", "float32" ou "int8").
+
+        float32 devolve o próprio modelo (inclusive pesos em memory-map); as
+        demais são cópias privadas do processo.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}' (use one of {', '.join(PRECISIONS)}).")
+        if precision == self.precision:
+            return self
+        if self.precision != "float32":
+            raise ValueError("Precision variants are derived from the float32 model.")
+
+        def convert(layer: dict) -> dict:
+            converted = {}
+            for key, value in layer.items():
+                if not isinstance(value, np.ndarray):
+                    converted[key] = value
+                elif precision == "int8" and key in _QUANTIZED_WEIGHTS:
+                    converted[key], converted[f"{key}_scale"] = quantize_int8(value)
+                elif precision == "float64":
+                    converted[key] = value.astype(np.float64)
+                else:
+                    converted[key] = np.array(value)
+            return converted
+
+        return NumpyLSTM(
+            [convert(layer) for layer in self.lstm_layers],
+            [convert(layer) for layer in self.dense_layers],
+            dtype=np.float64 if precision == "float64" else np.float32,
+        )
+
+    @staticmethod
+    def _lstm_params(kernel, recurrent, bias, return_sequences: bool) -> dict:
+        """
+        Reordena os gates do Keras (i, f, c, o) para (i, f, o, c): os três gates
+        sigmoides ficam contíguos e são ativados com uma única chamada.
+        """
+        units = recurrent.shape[0]
+        order = np.concatenate(
+            [np.arange(0, 2 * units), np.arange(3 * units, 4 * units), np.arange(2 * units, 3 * units)]
+        )
+        if bias is None:
+            bias = np.zeros(4 * units)
+        return {
+            "kernel": kernel[:, order].astype(np.float32),
+            "recurrent": recurrent[:, order].astype(np.float32),
+            "bias": bias[order].astype(np.float32),
+            "units": units,
+            "return_sequences": return_sequences,
+        }
+
+    # ── Forward pass ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _run_lstm(x: np.ndarray, layer: dict, rng: np.random.Generator | None = None) -> np.ndarray:
+        batch, steps, features = x.shape
+        units = layer["units"]
+        recurrent = _weight(layer, "recurrent", x.dtype)
+
+        recurrent_mask = None
+        if rng is not None:
+            # Camada Dropout anterior: máscara independente por elemento e timestep
+            if layer["input_dropout"]:
+                x = x * _dropout_mask(x.shape, layer["input_dropout"], rng)
+            # dropout/recurrent_dropout da LSTM: uma máscara por sequência (como no Keras 3)
+            if layer["dropout"]:
+                x = x * _dropout_mask((batch, 1, features), layer["dropout"], rng)
+            if layer["recurrent_dropout"]:
+                recurrent_mask = _dropout_mask((batch, units), layer["recurrent_dropout"], rng)
+
+        # Projeção da entrada para todos os timesteps de uma vez
+        xw = x @ _weight(layer, "kernel", x.dtype) + layer["bias"]
+
+        h = np.zeros((batch, units), dtype=x.dtype)
+        c = np.zeros((batch, units), dtype=x.dtype)
+        outputs = (
+            np.empty((batch, steps, units), dtype=x.dtype)
+            if layer["return_sequences"]
+            else None
+        )
+
+        for t in range(steps):
+            z = xw[:, t] + (h if recurrent_mask is None else h * recurrent_mask) @ recurrent
+            gates = _sigmoid(z[:, : 3 * units])
+            candidate = np.tanh(z[:, 3 * units :])
+            c = gates[:, units : 2 * units] * c + gates[:, :units] * candidate
+            h = gates[:, 2 * units :] * np.tanh(c)
+            if outputs is not None:
+                outputs[:, t] = h
+
+        return outputs if outputs is not None else h
+
+    def predict(
+        self,
+        X: np.ndarray,
+        verbose: int = 0,
+        batch_size: int = 256,
+        rng: np.random.Generator | None = None,
+    ) -> np.ndarray:
+        """
+        Inferência em lote: X (batch, timesteps, features) → (batch, units_saída).
+
+        Lotes maiores que `batch_size` são processados em fatias, limitando a
+        memória da projeção de entrada (batch × timesteps × 4·units). Com `rng`,
+        o dropout de treino fica ativo (MC dropout), com máscaras novas por linha.
+        """
+        X = np.asarray(X, dtype=self.dtype)
+        if len(X) <= batch_size:
+            return self._forward(X, rng)
+        return np.concatenate(
+            [self._forward(X[i : i + batch_size], rng) for i in range(0, len(X), batch_size)]
+        )
+
+    def _forward(self, x: np.ndarray, rng: np.random.Generator | None = None) -> np.ndarray:
+        for layer in self.lstm_layers:
+            x = self._run_lstm(x, layer, rng)
+        for layer in self.dense_layers:
+            kernel = _weight(layer, "kernel", x.dtype)
+            if rng is not None and layer["input_dropout"]:
+                mask = _dropout_mask(x.shape, layer["input_dropout"], rng)
+                out = (x * mask) @ kernel + layer["bias"]
+                if "shift_kernel" in layer:
+                    out += (mask - 1.0) @ _weight(layer, "shift_kernel", x.dtype)
+                x = out
+            else:
+                x = x @ kernel + layer["bias"]
+            activation = _activation(layer["activation"])
+            if activation is not None:
+                x = activation(x)
+        return x
+
+
+# ── Verificação de paridade com o Keras ───────────────────────────────────────
+
+def max_abs_diff_vs_keras(model_path: str, n_samples: int = 256, seed: int = 0) -> float:
+    """
+    Compara as saídas NumPy e Keras em janelas sintéticas normalizadas
+    (passeios aleatórios começando em 1.0) e retorna o maior erro absoluto.
+    """
+    from tensorflow.keras.models import load_model as keras_load_model  # lazy import
+
+    keras_model = keras_load_model(model_path)
+    numpy_model = NumpyLSTM.from_keras(model_path)
+    timesteps = keras_model.input_shape[1]
+
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0, 0.02, size=(n_samples, timesteps))
+    steps[:, 0] = 0.0
+    X = np.exp(np.cumsum(steps, axis=1))[..., np.newaxis].astype(np.float32)
+
+    expected = keras_model.predict(X, verbose=0)
+    actual = numpy_model.predict(X)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Verifica a paridade do backend NumPy com o modelo Keras."
+    )
+    parser.add_argument("model_path", help="Arquivo .keras do modelo servido")
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument(
+        "--export",
+        metavar="DIR",
+        help="Exporta os pesos para DIR (formato lido com memory-map pelos workers) e sai",
+    )
+    args = parser.parse_args(argv)
+
+    if args.export:
+        from app.services.model_service import weights_prefix  # lazy import
+
+        prefix = weights_prefix(args.model_path, args.export)
+        NumpyLSTM.from_keras(args.model_path).export(prefix)
+        print(f"exported {args.model_path} → {prefix}.npy + {prefix}.json")
+        return 0
+
+    diff = max_abs_diff_vs_keras(args.model_path, n_samples=args.samples)
+    ok = diff <= args.tolerance
+    print(f"max |keras - numpy| = {diff:.3e} (tolerance {args.tolerance:.1e}) → {'OK' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
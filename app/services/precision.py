@@ -0,0 +1,213 @@
+"""
+Variantes de precisão da inferência (float32 / int8) e sua aprovação offline.
+
+O comando compara cada variante com a referência float64 do mesmo modelo em
+um conjunto de avaliação gravado em disco (janelas + fechamentos reais) e
+grava o resultado em `<modelo>.precision.json`, ao lado do artefato:
+
+    python -m app.services.precision models/lstm_petr4_final.keras \\
+        --eval-set data/eval/PETR4.SA.npz --symbol PETR4.SA --start 2024-01-01
+
+Variantes de precisão reduzida (int8) só são servidas quando o relatório da
+mesma versão do modelo as aprova, isto é, quando o MAPE não se afasta da
+referência mais que `PRECISION_MAX_MAPE_DRIFT` pontos percentuais.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from typing import Optional
+
+import numpy as np
+
+from app.config import PRECISION_MAX_MAPE_DRIFT
+
+# Variantes que exigem relatório aprovado; float64/float32 são a referência e o padrão
+_REQUIRES_APPROVAL = {"int8"}
+
+
+def approval_path(model_path: str) -> str:
+    """Relatório de precisão de um modelo: `<dir>/<nome>.precision.json`."""
+    stem = os.path.splitext(model_path)[0]
+    return f"{stem}.precision.json"
+
+
+def approval_status(model_path: str, version: str, precision: str) -> tuple[bool, str]:
+    """
+    Se a variante `precision` pode ser servida para esta versão do modelo.
+
+    Returns:
+        (aprovada, motivo legível)
+    """
+    from app.services.model_service import artifact_version  # lazy import (ciclo)
+
+    try:
+        with open(approval_path(model_path), "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except FileNotFoundError:
+        report = None
+
+    version = version or artifact_version(model_path)
+    entry = None
+    if report is not None and report.get("version") == version:
+        entry = report.get("variants", {}).get(precision)
+
+    if entry is None:
+        if precision in _REQUIRES_APPROVAL:
+            return False, f"no precision report for version {version} (run app.services.precision)"
+        return True, "reference precision"
+    if not entry["approved"]:
+        return False, (
+            f"MAPE drift {entry['mape_drift']:.4f} pp above threshold "
+            f"{report['max_mape_drift']:.4f} pp"
+        )
+    return True, f"approved (MAPE drift {entry['mape_drift']:.4f} pp)"
+
+
+# ── Conjunto de avaliação ──────────────────────────────────────────────────────
+
+def build_eval_set(symbol: str, start: date, end: date, path: str) -> dict:
+    """Monta e grava (.npz) as janelas walk-forward de `symbol` em [start, end]."""
+    from app.services.backtest import backtest_windows
+    from app.services.data_service import fetch_history
+
+    dates, closes = fetch_history(symbol, start, end)
+    windows, target_dates, actual = backtest_windows(dates, closes, start, end)
+    if not len(windows):
+        raise ValueError(f"No evaluation windows for '{symbol}' between {start} and {end}.")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(
+        path, symbol=symbol, windows=np.ascontiguousarray(windows), dates=target_dates, actual=actual
+    )
+    return load_eval_set(path)
+
+
+def load_eval_set(path: str) -> dict:
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+# ── Comparação ─────────────────────────────────────────────────────────────────
+
+def _evaluate(model, windows: np.ndarray, actual: np.ndarray) -> tuple[dict, np.ndarray]:
+    from app.services.backtest import MetricsAccumulator
+
+    ref = windows[:, 0]
+    ratios = model.predict((windows / ref[:, np.newaxis])[..., np.newaxis])[:, 0]
+    predicted = np.asarray(ratios, dtype=np.float64) * ref
+    metrics = MetricsAccumulator()
+    metrics.update(actual, predicted)
+    return metrics.result(), predicted
+
+
+def _latency_ms(model, window: np.ndarray, rounds: int = 100) -> float:
+    X = window[np.newaxis, :, np.newaxis]
+    model.predict(X)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        model.predict(X)
+    return round((time.perf_counter() - t0) / rounds * 1000, 3)
+
+
+def compare_precisions(
+    model_path: str, eval_set: dict, variants: list[str], max_mape_drift: float
+) -> dict:
+    """
+    MAE/MAPE de cada variante contra a referência float64 no conjunto de avaliação.
+
+    Returns:
+        Relatório no formato gravado em `approval_path(model_path)`.
+    """
+    from app.services.model_service import artifact_version
+    from app.services.numpy_lstm import NumpyLSTM
+
+    windows = np.asarray(eval_set["windows"], dtype=np.float64)
+    actual = np.asarray(eval_set["actual"], dtype=np.float64)
+    model = NumpyLSTM.from_keras(model_path)
+
+    baseline_model = model.with_precision("float64")
+    baseline, baseline_pred = _evaluate(baseline_model, windows, actual)
+
+    report = {
+        "model": os.path.splitext(os.path.basename(model_path))[0],
+        "version": artifact_version(model_path),
+        "symbol": str(eval_set.get("symbol", "")),
+        "samples": len(windows),
+        "max_mape_drift": max_mape_drift,
+        "baseline": {
+            "precision": "float64",
+            **baseline,
+            "weights_bytes": baseline_model.weights_nbytes,
+            "latency_ms_batch1": _latency_ms(baseline_model, windows[-1]),
+        },
+        "variants": {},
+        "created_at": datetime.utcnow().isoformat() + "Z",
+    }
+    for precision in variants:
+        variant = model.with_precision(precision)
+        metrics, predicted = _evaluate(variant, windows, actual)
+        mape_drift = abs(metrics["MAPE"] - baseline["MAPE"])
+        report["variants"][precision] = {
+            **metrics,
+            "mape_drift": round(mape_drift, 6),
+            "mae_drift": round(abs(metrics["MAE"] - baseline["MAE"]), 6),
+            "max_abs_price_diff": round(float(np.abs(predicted - baseline_pred).max()), 6),
+            "weights_bytes": variant.weights_nbytes,
+            "latency_ms_batch1": _latency_ms(variant, windows[-1]),
+            "approved": mape_drift <= max_mape_drift,
+        }
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compara as variantes de precisão com a referência float64 e grava a aprovação."
+    )
+    parser.add_argument("model_path", help="Arquivo .keras do modelo servido")
+    parser.add_argument("--eval-set", required=True, help="Conjunto de avaliação (.npz)")
+    parser.add_argument("--symbol", help="Símbolo para montar o conjunto, se ainda não existir")
+    parser.add_argument("--start", type=date.fromisoformat, help="Primeiro pregão avaliado")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--variants", default="float32,int8")
+    parser.add_argument("--max-mape-drift", type=float, default=PRECISION_MAX_MAPE_DRIFT)
+    parser.add_argument("--dry-run", action="store_true", help="Só imprime, sem gravar o relatório")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.eval_set):
+        eval_set = load_eval_set(args.eval_set)
+    elif args.symbol and args.start:
+        eval_set = build_eval_set(args.symbol, args.start, args.end, args.eval_set)
+        print(f"built {args.eval_set}: {len(eval_set['windows'])} windows of {args.symbol}")
+    else:
+        parser.error(f"'{args.eval_set}' not found; pass --symbol and --start to build it.")
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    report = compare_precisions(args.model_path, eval_set, variants, args.max_mape_drift)
+
+    base = report["baseline"]
+    print(f"{'precision':<10} {'MAE':>10} {'MAPE %':>10} {'drift pp':>10} {'weights KB':>11} {'ms/pred':>8}")
+    print(
+        f"{'float64':<10} {base['MAE']:>10.6f} {base['MAPE']:>10.6f} {'—':>10} "
+        f"{base['weights_bytes'] / 1024:>11.1f} {base['latency_ms_batch1']:>8.3f}"
+    )
+    for precision, entry in report["variants"].items():
+        print(
+            f"{precision:<10} {entry['MAE']:>10.6f} {entry['MAPE']:>10.6f} {entry['mape_drift']:>10.6f} "
+            f"{entry['weights_bytes'] / 1024:>11.1f} {entry['latency_ms_batch1']:>8.3f}  "
+            f"{'APPROVED' if entry['approved'] else 'REJECTED'}"
+        )
+
+    if not args.dry_run:
+        path = approval_path(args.model_path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {path}")
+    return 0 if all(entry["approved"] for entry in report["variants"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
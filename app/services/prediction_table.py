@@ -0,0 +1,311 @@
+"""
+Tabela pré-computada de predições da watchlist.
+
+Depois de cada fechamento de pregão, o `PredictionScheduler` busca as janelas
+de todos os símbolos da watchlist com um único download agrupado, roda a
+predição do próximo dia e o forecast de `forecast_days` dias em lote (um
+forward pass por modelo e passo) e publica o resultado na `PredictionTable`.
+/predict/live e /predict/forecast leem a tabela com uma consulta de dicionário;
+símbolos fora da watchlist, entradas vencidas ou de outro modelo caem no
+cálculo sob demanda.
+
+Com vários workers, só o líder (`LeaderLock`) baixa e calcula a tabela; ele a
+publica em um snapshot JSON que os demais workers recarregam quando muda.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from app.middleware.metrics import (
+    PREDICTION_TABLE_ENTRIES,
+    PREDICTION_TABLE_LOOKUPS,
+    PREDICTION_TABLE_REFRESH_DURATION,
+    PREDICTION_TABLE_UPDATED,
+)
+from app.services.data_service import cache_expiry, fetch_prices_many
+from app.services.executor_service import run_inference, run_io
+from app.services.forecast_engine import step_changes_pct
+from app.services.market_calendar import last_closed_session, market_now
+from app.services.leader import LeaderLock
+from app.services.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+
+def model_label(model_svc) -> str:
+    """Identificação "nome@versão" do modelo que produziu um resultado."""
+    return f"{model_svc.name}@{model_svc.version}"
+
+
+class PredictionTable:
+    """
+    {símbolo: entrada} em memória, substituído por inteiro a cada refresh
+    (copy-on-write): leituras não usam lock.
+
+    Cada entrada guarda a janela de preços, a predição do próximo dia (mesmo
+    formato de `ModelService.predict`), o forecast de vários dias, o modelo
+    que a produziu e até quando vale: o próximo fechamento de pregão, ou
+    poucos minutos se a janela ainda não chega ao último pregão encerrado.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, dict] = {}
+        self.session: Optional[date] = None
+        self.refreshed_at: Optional[datetime] = None
+
+    def lookup(self, symbol: str, model: str) -> Optional[dict]:
+        """Entrada válida de `symbol` produzida por `model` ("nome@versão"), se houver."""
+        entry = self._entries.get(symbol.upper())
+        if entry is None or entry["model"] != model or entry["valid_until"] <= market_now():
+            PREDICTION_TABLE_LOOKUPS.labels(result="miss").inc()
+            return None
+        PREDICTION_TABLE_LOOKUPS.labels(result="hit").inc()
+        return entry
+
+    def entries(self) -> dict[str, dict]:
+        return dict(self._entries)
+
+    def replace(self, entries: dict[str, dict], session: date) -> None:
+        for symbol in self._entries.keys() - entries.keys():
+            PREDICTION_TABLE_UPDATED.remove(symbol)
+        self._entries = entries
+        self.session = session
+        self.refreshed_at = market_now()
+        PREDICTION_TABLE_ENTRIES.set(len(entries))
+        for symbol, entry in entries.items():
+            PREDICTION_TABLE_UPDATED.labels(symbol=symbol).set(entry["computed_at"].timestamp())
+
+    def staleness(self, now: Optional[datetime] = None) -> dict[str, dict]:
+        """Idade e validade de cada entrada (para monitoramento)."""
+        now = now or market_now()
+        latest_session = last_closed_session(now).isoformat()
+        return {
+            symbol: {
+                "model": entry["model"],
+                "last_data_date": entry["window"]["last_date"],
+                "computed_at": entry["computed_at"].isoformat(),
+                "valid_until": entry["valid_until"].isoformat(),
+                "age_seconds": round((now - entry["computed_at"]).total_seconds(), 1),
+                "fresh": entry["valid_until"] > now
+                and entry["window"]["last_date"] >= latest_session,
+            }
+            for symbol, entry in sorted(self._entries.items())
+        }
+
+
+class PredictionScheduler:
+    """
+    Loop em background que mantém a `PredictionTable` atualizada.
+
+    A cada `check_interval` segundos verifica se a tabela ficou para trás:
+    novo pregão encerrado ou troca de versão de modelo no registro recalculam
+    a watchlist inteira. Símbolos sem entrada (download falhou) ou cuja janela
+    ainda não chega ao pregão (fechamento não publicado, papel suspenso) são
+    buscados de novo sozinhos, com backoff exponencial por símbolo a partir de
+    `check_interval` até `max_retry_interval`. Com `leader`, só o worker que
+    detém o lock faz isso e grava o snapshot em `snapshot_path`; os demais
+    apenas carregam o snapshot quando ele muda.
+    """
+
+    def __init__(
+        self,
+        table: PredictionTable,
+        registry: ModelRegistry,
+        symbols: list[str],
+        forecast_days: int,
+        check_interval: float,
+        leader: Optional[LeaderLock] = None,
+        snapshot_path: str = "",
+        max_retry_interval: float = 1800.0,
+    ) -> None:
+        self.table = table
+        self.registry = registry
+        self.symbols = [symbol.upper() for symbol in dict.fromkeys(symbols)]
+        self.forecast_days = forecast_days
+        self.check_interval = check_interval
+        self.leader = leader
+        self.snapshot_path = snapshot_path
+        self.max_retry_interval = max_retry_interval
+        self._snapshot_stamp: Optional[int] = None
+        # Backoff dos símbolos incompletos: {símbolo: (tentativas, próxima tentativa)}
+        self._retries: dict[str, tuple[int, datetime]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.symbols and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info("Prediction table scheduler started for %s", self.symbols)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.leader is not None:
+            self.leader.release()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self.leader is None or self.leader.acquire():
+                    symbols = self._pending_symbols() if self.registry.ready else []
+                    if symbols:
+                        await self.refresh(symbols)
+                elif self.snapshot_path:
+                    await run_io(self._load_snapshot)
+            except Exception:
+                logger.exception("Prediction table refresh failed")
+            await asyncio.sleep(self.check_interval)
+
+    def _pending_symbols(self, now: Optional[datetime] = None) -> list[str]:
+        """Símbolos a recalcular agora (a watchlist inteira, só os incompletos ou nenhum)."""
+        now = now or market_now()
+        session = last_closed_session(now)
+        entries = self.table.entries()
+        if self.table.session != session or any(
+            entry["model"] != model_label(self.registry.resolve(symbol=symbol))
+            for symbol, entry in entries.items()
+        ):
+            return list(self.symbols)
+        return [
+            symbol
+            for symbol in self.symbols
+            if (symbol not in entries or entries[symbol]["window"]["last_date"] < session.isoformat())
+            and (symbol not in self._retries or self._retries[symbol][1] <= now)
+        ]
+
+    def _schedule_retries(self, symbols: list[str], entries: dict[str, dict], session: date) -> None:
+        """Atualiza o backoff dos `symbols` recém-buscados conforme ficaram completos ou não."""
+        now = market_now()
+        for symbol in symbols:
+            entry = entries.get(symbol)
+            if entry is not None and entry["window"]["last_date"] >= session.isoformat():
+                self._retries.pop(symbol, None)
+                continue
+            attempts = self._retries.get(symbol, (0, now))[0] + 1
+            delay = min(self.check_interval * 2 ** (attempts - 1), self.max_retry_interval)
+            self._retries[symbol] = (attempts, now + timedelta(seconds=delay))
+
+    async def refresh(self, symbols: Optional[list[str]] = None) -> None:
+        """
+        Recalcula predições e forecasts de `symbols` (padrão: a watchlist inteira).
+
+        Um refresh parcial mantém as entradas dos demais símbolos e, para um
+        símbolo cujo download falhou de novo, a entrada anterior.
+        """
+        t0 = time.time()
+        session = last_closed_session()
+        symbols = symbols or list(self.symbols)
+        full = set(symbols) >= set(self.symbols)
+        if full:
+            self._retries.clear()
+        data = await run_io(fetch_prices_many, symbols)
+        windows = data["windows"]
+        for symbol, reason in data["missing"].items():
+            logger.warning("Prediction table: skipping '%s': %s", symbol, reason)
+
+        # Símbolos agrupados pelo modelo que os atende: um lote por modelo
+        groups: dict[str, tuple] = {}
+        for symbol in windows:
+            model_svc = self.registry.resolve(symbol=symbol)
+            groups.setdefault(model_label(model_svc), (model_svc, []))[1].append(symbol)
+
+        computed_at = market_now()
+        entries: dict[str, dict] = {}
+        for label, (model_svc, group) in groups.items():
+            prices = np.array([windows[s]["prices"] for s in group], dtype=np.float64)
+            predictions = await run_inference(model_svc.predict_windows, prices)
+            inference_ms = predictions.pop("inference_time_ms")
+            paths = await run_inference(model_svc.forecast_many, prices, self.forecast_days)
+            changes = step_changes_pct(prices[:, -1], paths)
+
+            columns = {field: values.tolist() for field, values in predictions.items()}
+            for pos, symbol in enumerate(group):
+                entries[symbol] = {
+                    "model": label,
+                    "window": windows[symbol],
+                    "prediction": {
+                        **{field: values[pos] for field, values in columns.items()},
+                        "inference_time_ms": inference_ms,
+                    },
+                    "forecast": [
+                        {
+                            "day": day_idx + 1,
+                            "predicted_price": round(float(price), 4),
+                            "expected_change_pct": round(float(change), 4),
+                        }
+                        for day_idx, (price, change) in enumerate(zip(paths[pos], changes[pos]))
+                    ],
+                    "computed_at": computed_at,
+                    # Janela sem o último fechamento: vale só até a próxima tentativa
+                    "valid_until": cache_expiry(windows[symbol]),
+                }
+
+        if not full:
+            entries = {**self.table.entries(), **entries}
+        self._schedule_retries(symbols, entries, session)
+        self.table.replace(entries, session)
+        if self.snapshot_path:
+            await run_io(self._write_snapshot, entries, session)
+        elapsed = time.time() - t0
+        PREDICTION_TABLE_REFRESH_DURATION.observe(elapsed)
+        logger.info(
+            "Prediction table refreshed: %d symbols, %d models, %.0f ms",
+            len(entries), len(groups), elapsed * 1000,
+        )
+
+    # ── Snapshot entre workers ─────────────────────────────────────────────────
+
+    def _write_snapshot(self, entries: dict[str, dict], session: date) -> None:
+        payload = {
+            "session": session.isoformat(),
+            "entries": {
+                symbol: {
+                    **entry,
+                    "computed_at": entry["computed_at"].isoformat(),
+                    "valid_until": entry["valid_until"].isoformat(),
+                }
+                for symbol, entry in entries.items()
+            },
+        }
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, self.snapshot_path)
+
+    def _load_snapshot(self) -> bool:
+        """Carrega o snapshot publicado pelo líder, se mudou desde a última leitura."""
+        try:
+            stamp = os.stat(self.snapshot_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if stamp == self._snapshot_stamp:
+            return False
+
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        entries = {
+            symbol: {
+                **entry,
+                "computed_at": datetime.fromisoformat(entry["computed_at"]),
+                "valid_until": datetime.fromisoformat(entry["valid_until"]),
+            }
+            for symbol, entry in payload["entries"].items()
+        }
+        self.table.replace(entries, date.fromisoformat(payload["session"]))
+        self._snapshot_stamp = stamp
+        logger.info("Prediction table loaded from the leader snapshot: %d symbols", len(entries))
+        return True
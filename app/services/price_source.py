@@ -0,0 +1,145 @@
+"""
+Fontes de preços de fechamento diários.
+
+`YahooFinanceSource` busca no Yahoo Finance; `LocalCSVSource` lê arquivos
+`<SYMBOL>.csv` (colunas `Date,Close`) de um diretório local e substitui o
+Yahoo em testes, benchmarks e ambientes sem rede. A fonte ativa é escolhida
+por `PRICE_SOURCE` ("yahoo" | "local").
+"""
+
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+
+from app.config import PRICE_SOURCE, PRICE_SOURCE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def _empty() -> pd.Series:
+    return pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+
+
+class PriceSource(ABC):
+    """Interface de uma fonte de fechamentos diários."""
+
+    @abstractmethod
+    def fetch(self, symbol: str, start: date, end: date) -> pd.Series:
+        """
+        Fechamentos de `symbol` no intervalo [start, end).
+
+        Returns:
+            Série de floats indexada por data (DatetimeIndex crescente, sem NaN).
+            Vazia se não houver dados.
+        """
+
+    def fetch_many(self, symbols: list[str], start: date, end: date) -> pd.DataFrame:
+        """
+        Fechamentos de vários símbolos no intervalo [start, end).
+
+        Returns:
+            DataFrame largo: índice de datas (união), uma coluna por símbolo
+            (na ordem de `symbols`), NaN onde o símbolo não tem pregão/dado.
+        """
+        series = {symbol: self.fetch(symbol, start, end) for symbol in symbols}
+        return pd.DataFrame(series).reindex(columns=symbols).sort_index()
+
+
+class YahooFinanceSource(PriceSource):
+    """Fechamentos ajustados via `yfinance.download`."""
+
+    def fetch(self, symbol: str, start: date, end: date) -> pd.Series:
+        import yfinance as yf  # lazy import
+
+        logger.info("Downloading '%s' from Yahoo Finance (%s → %s)", symbol, start, end)
+        df = yf.download(
+            symbol,
+            start=start.strftime("%Y-%m-%d"),
+            end=end.strftime("%Y-%m-%d"),
+            progress=False,
+            auto_adjust=True,
+        )
+
+        if df.empty:
+            return _empty()
+
+        # yfinance pode retornar MultiIndex de colunas
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = [col[0] for col in df.columns]
+
+        return df["Close"].dropna().astype(float)
+
+    def fetch_many(self, symbols: list[str], start: date, end: date) -> pd.DataFrame:
+        """Um único download agrupado para todos os símbolos."""
+        import yfinance as yf  # lazy import
+
+        logger.info(
+            "Downloading %d symbols from Yahoo Finance in one request (%s → %s)",
+            len(symbols), start, end,
+        )
+        df = yf.download(
+            symbols,
+            start=start.strftime("%Y-%m-%d"),
+            end=end.strftime("%Y-%m-%d"),
+            progress=False,
+            auto_adjust=True,
+            group_by="column",
+            threads=True,
+        )
+
+        if df.empty:
+            return pd.DataFrame(index=pd.DatetimeIndex([]), columns=symbols, dtype=float)
+
+        # Colunas MultiIndex (campo, símbolo): a fatia "Close" já é o frame largo
+        close = df["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(symbols[0])
+        return close.reindex(columns=symbols).astype(float).sort_index()
+
+
+class LocalCSVSource(PriceSource):
+    """Fechamentos lidos de `<directory>/<SYMBOL>.csv` (colunas `Date,Close`)."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def _read(self, symbol: str) -> pd.Series:
+        path = os.path.join(self.directory, f"{symbol.upper()}.csv")
+        if not os.path.exists(path):
+            return _empty()
+        df = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+        return df["Close"].dropna().astype(float).sort_index()
+
+    def fetch(self, symbol: str, start: date, end: date) -> pd.Series:
+        close = self._read(symbol)
+        return close[(close.index >= pd.Timestamp(start)) & (close.index < pd.Timestamp(end))]
+
+
+_source: Optional[PriceSource] = None
+_source_lock = threading.Lock()
+
+
+def get_price_source() -> PriceSource:
+    """Fonte de preços configurada em `PRICE_SOURCE` (instância única)."""
+    global _source
+    with _source_lock:
+        if _source is None:
+            if PRICE_SOURCE == "yahoo":
+                _source = YahooFinanceSource()
+            elif PRICE_SOURCE == "local":
+                _source = LocalCSVSource(PRICE_SOURCE_DIR)
+            else:
+                raise ValueError(f"Unknown price source '{PRICE_SOURCE}' (use 'yahoo' or 'local').")
+        return _source
+
+
+def set_price_source(source: PriceSource) -> None:
+    """Substitui a fonte ativa (ex.: fixture local em testes e benchmarks)."""
+    global _source
+    with _source_lock:
+        _source = source
@@ -0,0 +1,82 @@
+"""
+Profiler por amostragem, em processo e sem dependências.
+
+A cada intervalo lê a pilha de todas as threads (`sys._current_frames()`) e
+conta cada pilha no formato "collapsed" (`thread;arquivo:função;... N`),
+aceito diretamente por flamegraph.pl, speedscope e inferno. Cobre o event
+loop, os executores de I/O e inferência e as threads do TensorFlow que
+executam código Python; código nativo aparece na função Python que o chamou.
+
+Só um profile roda por vez: a amostragem custa CPU proporcional ao número de
+threads, e dois profiles simultâneos se distorceriam.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Pilhas cuja folha é uma destas funções são threads ociosas (event loop sem
+# trabalho, worker do executor esperando tarefa)
+_IDLE_LEAVES = frozenset({
+    ("selectors.py", "select"),
+    ("selectors.py", "EpollSelector.select"),
+    ("threading.py", "wait"),
+    ("threading.py", "Condition.wait"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+    ("queue.py", "Queue.get"),
+})
+
+_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Já existe um profile em andamento."""
+
+
+def _frame_label(frame) -> tuple[str, str]:
+    code = frame.f_code
+    return os.path.basename(code.co_filename), getattr(code, "co_qualname", code.co_name)
+
+
+def sample_stacks(duration_s: float, interval_s: float, include_idle: bool = False) -> tuple[Counter, int]:
+    """
+    Amostra as pilhas de todas as threads (exceto a própria) por `duration_s`.
+
+    Returns:
+        (Counter {pilha collapsed: amostras}, número de rodadas de amostragem)
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running.")
+    try:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        rounds = 0
+        deadline = time.perf_counter() + duration_s
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                leaf = _frame_label(frame)
+                if not include_idle and leaf in _IDLE_LEAVES:
+                    continue
+                labels = []
+                while frame is not None:
+                    filename, func = _frame_label(frame)
+                    labels.append(f"{filename}:{func}")
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(labels))] += 1
+            rounds += 1
+            time.sleep(interval_s)
+        return stacks, rounds
+    finally:
+        _lock.release()
+
+
+def collapse(stacks: Counter) -> str:
+    """Formato collapsed: uma pilha por linha, seguida do número de amostras."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,173 @@
+"""
+Assinaturas de predições ao vivo (WebSocket) com fan-out por símbolo.
+
+Cada símbolo com pelo menos um assinante tem um único loop de refresh. A
+cada intervalo o loop consulta a janela de preços (cache de `fetch_prices`
+ou tabela pré-computada) e só roda o modelo quando há fechamento novo ou
+troca de versão do modelo; a atualização é então entregue a todas as
+conexões inscritas. O custo por refresh é O(símbolos), não
+O(clientes × símbolos).
+
+Cada conexão recebe as mensagens em uma fila limitada: um cliente lento
+perde as mensagens mais antigas, nunca atrasa o loop nem os demais clientes.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from app.middleware.metrics import (
+    WS_DROPPED_MESSAGES,
+    WS_FANOUT_LATENCY,
+    WS_SUBSCRIPTIONS,
+    WS_TOPICS,
+)
+from app.services.data_service import fetch_prices, next_business_day
+from app.services.executor_service import run_io
+from app.services.model_registry import ModelRegistry
+from app.services.prediction_table import PredictionTable, model_label
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """Fila de saída de uma conexão (limitada; descarta a mensagem mais antiga)."""
+
+    def __init__(self, max_queue: int) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.symbols: set[str] = set()
+
+    def deliver(self, message: dict) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            WS_DROPPED_MESSAGES.inc()
+        self.queue.put_nowait((message, time.perf_counter()))
+
+    async def next_message(self) -> tuple[dict, float]:
+        """Próxima mensagem e o instante (perf_counter) em que foi publicada."""
+        return await self.queue.get()
+
+    @staticmethod
+    def delivered(published_at: float) -> None:
+        """Registra a latência de fan-out depois que a mensagem foi enviada."""
+        WS_FANOUT_LATENCY.observe(time.perf_counter() - published_at)
+
+
+class _Topic:
+    def __init__(self) -> None:
+        self.subscribers: set[Subscriber] = set()
+        self.latest: Optional[dict] = None
+        self.key: Optional[tuple] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class SubscriptionHub:
+    """Loops de refresh por símbolo e fan-out para as conexões inscritas."""
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        table: Optional[PredictionTable],
+        refresh_interval: float,
+    ) -> None:
+        self.registry = registry
+        self.table = table
+        self.refresh_interval = refresh_interval
+        self._topics: dict[str, _Topic] = {}
+
+    # ── Assinaturas ────────────────────────────────────────────────────────────
+
+    def subscribe(self, subscriber: Subscriber, symbol: str) -> None:
+        symbol = symbol.upper()
+        if symbol in subscriber.symbols:
+            return
+        topic = self._topics.get(symbol)
+        if topic is None:
+            topic = self._topics[symbol] = _Topic()
+            topic.task = asyncio.get_running_loop().create_task(self._refresh_loop(symbol, topic))
+            WS_TOPICS.set(len(self._topics))
+        topic.subscribers.add(subscriber)
+        subscriber.symbols.add(symbol)
+        WS_SUBSCRIPTIONS.inc()
+        # Novo assinante recebe o último valor sem esperar o próximo refresh
+        if topic.latest is not None:
+            subscriber.deliver(topic.latest)
+
+    def unsubscribe(self, subscriber: Subscriber, symbol: str) -> None:
+        symbol = symbol.upper()
+        topic = self._topics.get(symbol)
+        if symbol not in subscriber.symbols or topic is None:
+            return
+        subscriber.symbols.discard(symbol)
+        topic.subscribers.discard(subscriber)
+        WS_SUBSCRIPTIONS.dec()
+        if not topic.subscribers:
+            topic.task.cancel()
+            del self._topics[symbol]
+            WS_TOPICS.set(len(self._topics))
+
+    def unsubscribe_all(self, subscriber: Subscriber) -> None:
+        for symbol in list(subscriber.symbols):
+            self.unsubscribe(subscriber, symbol)
+
+    async def stop(self) -> None:
+        topics, self._topics = self._topics, {}
+        for topic in topics.values():
+            topic.task.cancel()
+        await asyncio.gather(*(t.task for t in topics.values()), return_exceptions=True)
+        WS_TOPICS.set(0)
+
+    # ── Refresh por símbolo ────────────────────────────────────────────────────
+
+    def _publish(self, topic: _Topic, message: dict) -> None:
+        topic.latest = message
+        for subscriber in list(topic.subscribers):
+            subscriber.deliver(message)
+
+    async def _refresh_loop(self, symbol: str, topic: _Topic) -> None:
+        while True:
+            try:
+                await self._refresh(symbol, topic)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                key = ("error", str(exc))
+                if topic.key != key:
+                    topic.key = key
+                    logger.warning("Live feed refresh failed for '%s': %s", symbol, exc)
+                    self._publish(topic, {"type": "error", "symbol": symbol, "detail": str(exc)})
+            await asyncio.sleep(self.refresh_interval)
+
+    async def _refresh(self, symbol: str, topic: _Topic) -> None:
+        if not self.registry.ready:
+            return
+        model_svc = self.registry.resolve(symbol=symbol)
+        label = model_label(model_svc)
+
+        entry = self.table.lookup(symbol, label) if self.table is not None else None
+        data = entry["window"] if entry is not None else await run_io(fetch_prices, symbol)
+
+        # Só há predição nova com fechamento novo ou outra versão do modelo
+        key = (data["last_date"], label)
+        if key == topic.key:
+            return
+
+        if entry is not None:
+            result = entry["prediction"]
+        else:
+            result = await model_svc.predict_async(data["prices"])
+        topic.key = key
+        self._publish(
+            topic,
+            {
+                "type": "prediction",
+                "symbol": symbol,
+                **result,
+                "prediction_for_date": next_business_day(data["last_date"]),
+                "last_data_date": data["last_date"],
+                "model": label,
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+            },
+        )
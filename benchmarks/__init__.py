@@ -0,0 +1,12 @@
+"""
+Benchmarks reproduzíveis dos caminhos quentes da API.
+
+    python -m benchmarks.micro --backend numpy
+    python -m benchmarks.load --requests benchmarks/requests.jsonl --concurrency 16
+    python -m benchmarks.compare antes.json depois.json
+
+Os resultados são gravados em JSON (p50/p95/p99 e throughput, mais o commit e
+o ambiente da execução) em `benchmarks/results/`, para comparar commits. O
+Yahoo Finance é substituído por uma fonte sintética determinística: nenhum
+benchmark depende de rede.
+"""
@@ -0,0 +1,116 @@
+"""Utilidades compartilhadas: ambiente, estatísticas e saída JSON dos benchmarks."""
+
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def configure_env(backend: Optional[str] = None) -> None:
+    """
+    Ambiente dos benchmarks; chamar antes de importar `app` (a config é lida no import).
+
+    Sem recarga a quente, sem pesos exportados em disco e sem métricas multiprocess,
+    para que a execução não dependa nem altere o estado do diretório do projeto.
+    Os módulos de `app` (e `benchmarks.price_stub`) só devem ser importados depois.
+    """
+    if backend:
+        os.environ["INFERENCE_BACKEND"] = backend
+    os.environ.setdefault("MODEL_WATCH_ENABLED", "false")
+    os.environ.setdefault("NUMPY_WEIGHTS_DIR", "")
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+
+# ── Medição ────────────────────────────────────────────────────────────────────
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 5) -> list[float]:
+    """Durações (s) de `repeat` chamadas sequenciais, após `warmup` descartadas."""
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - t0)
+    return durations
+
+
+def summarize(durations: list[float], wall_s: Optional[float] = None) -> dict:
+    """
+    Percentis de latência (ms) e throughput.
+
+    Sem `wall_s` (chamadas sequenciais), o throughput é 1 / latência média;
+    com `wall_s` (carga concorrente), é chamadas concluídas / tempo de parede.
+    """
+    if not durations:
+        return {"n": 0}
+    ms = np.asarray(durations, dtype=np.float64) * 1000
+    elapsed = wall_s if wall_s is not None else float(np.sum(durations))
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "n": len(ms),
+        "mean_ms": round(float(ms.mean()), 4),
+        "min_ms": round(float(ms.min()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "throughput_per_s": round(len(ms) / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+# ── Saída ──────────────────────────────────────────────────────────────────────
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    from app.config import INFERENCE_BACKEND, INFERENCE_PRECISION
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "inference_backend": INFERENCE_BACKEND,
+        "inference_precision": INFERENCE_PRECISION,
+    }
+
+
+def write_results(kind: str, params: dict, results: dict, output: Optional[str] = None) -> str:
+    """Grava `{kind, environment, params, results}`; padrão `results/<kind>-<commit>.json`."""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{kind}-{git_commit() or 'nogit'}.json")
+    payload = {"kind": kind, "environment": environment(), "params": params, "results": results}
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return output
+
+
+def print_table(results: dict) -> None:
+    print(f"{'benchmark':<36} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10}")
+    for name, stats in results.items():
+        if "p50_ms" not in stats:
+            continue
+        print(
+            f"{name:<36} {stats['n']:>6} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} "
+            f"{stats['p99_ms']:>10.3f} {stats['throughput_per_s'] or 0:>10.1f}"
+        )
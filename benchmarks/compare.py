@@ -0,0 +1,61 @@
+"""
+Compara dois resultados de benchmark (ex.: antes e depois de um commit).
+
+    python -m benchmarks.compare benchmarks/results/micro-abc123.json benchmarks/results/micro-def456.json
+
+Para cada benchmark presente nos dois arquivos, mostra p50/p95/p99 e a
+variação percentual; `--fail-above PCT` devolve código 1 se algum p50 piorar
+mais que PCT%, para uso em CI.
+"""
+
+import argparse
+import json
+import sys
+
+_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _delta_pct(before: float, after: float) -> float:
+    return (after / before - 1.0) * 100.0 if before else 0.0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compara dois arquivos de resultado de benchmark.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--fail-above", type=float, help="Falha se algum p50 piorar mais que este %%")
+    args = parser.parse_args(argv)
+
+    before, after = _load(args.before), _load(args.after)
+    print(
+        f"before: {before['environment'].get('commit')}  "
+        f"after: {after['environment'].get('commit')}  ({before['kind']})"
+    )
+    print(f"{'benchmark':<36} " + " ".join(f"{m:>22}" for m in _METRICS))
+
+    regressions = []
+    for name, stats in after["results"].items():
+        base = before["results"].get(name)
+        if not isinstance(stats, dict) or not isinstance(base, dict) or "p50_ms" not in stats:
+            continue
+        cells = []
+        for metric in _METRICS:
+            delta = _delta_pct(base[metric], stats[metric])
+            cells.append(f"{base[metric]:>8.3f}→{stats[metric]:<8.3f}{delta:+5.0f}%")
+        print(f"{name:<36} " + " ".join(f"{c:>22}" for c in cells))
+        if args.fail_above is not None and _delta_pct(base["p50_ms"], stats["p50_ms"]) > args.fail_above:
+            regressions.append(name)
+
+    if regressions:
+        print(f"p50 regressions above {args.fail_above}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Gerador de carga de ponta a ponta contra a app ASGI, no mesmo processo.
+
+Reexecuta as requisições de um arquivo JSONL (uma por linha) com N clientes
+concorrentes, passando por todo o stack (middlewares, validação, roteamento,
+cache de preços, micro-batching e inferência). O Yahoo Finance é substituído
+pela fonte sintética de `benchmarks.price_stub`.
+
+    python -m benchmarks.load --requests benchmarks/requests.jsonl --total 2000 --concurrency 16
+
+Formato de cada linha:
+
+    {"method": "POST", "path": "/predict/live", "json": {"symbol": "PETR4.SA"},
+     "headers": {"Accept": "application/x-ndjson"}}
+
+`json` e `headers` são opcionais.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.common import configure_env, print_table, summarize, write_results
+
+DEFAULT_REQUESTS = os.path.join(os.path.dirname(__file__), "requests.jsonl")
+
+
+def load_requests(path: str) -> list[dict]:
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line)
+            if "method" not in entry or "path" not in entry:
+                raise ValueError(f"{path}:{line_no}: each request needs 'method' and 'path'.")
+            entries.append(entry)
+    if not entries:
+        raise ValueError(f"No requests in '{path}'.")
+    return entries
+
+
+async def _wait_ready(client, timeout_s: float) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        response = await client.get("/health")
+        if response.json().get("status") == "healthy":
+            return
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"API not ready after {timeout_s:.0f}s.")
+
+
+async def run_load(entries: list[dict], total: int, concurrency: int, warmup: int) -> dict:
+    import httpx
+
+    from app.main import app
+    from benchmarks import price_stub
+
+    price_stub.install()
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            await _wait_ready(client, timeout_s=120)
+
+            async def send(entry: dict) -> tuple[int, float]:
+                t0 = time.perf_counter()
+                response = await client.request(
+                    entry["method"], entry["path"], json=entry.get("json"), headers=entry.get("headers")
+                )
+                return response.status_code, time.perf_counter() - t0
+
+            # Aquecimento: preenche caches (preços, tabela) e exercita cada rota
+            for i in range(warmup):
+                await send(entries[i % len(entries)])
+
+            counter = itertools.count()
+
+            async def client_loop() -> None:
+                while (i := next(counter)) < total:
+                    entry = entries[i % len(entries)]
+                    status, elapsed = await send(entry)
+                    statuses[status] += 1
+                    latencies[f"{entry['method']} {entry['path']}"].append(elapsed)
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+            wall_s = time.perf_counter() - t0
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    results = {"overall": summarize(all_latencies, wall_s)}
+    for endpoint, values in sorted(latencies.items()):
+        results[endpoint] = summarize(values, wall_s)
+    results["status_codes"] = {str(code): count for code, count in sorted(statuses.items())}
+    results["wall_s"] = round(wall_s, 3)
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Carga de ponta a ponta contra a app ASGI (in-process).")
+    parser.add_argument("--requests", default=DEFAULT_REQUESTS, help="Arquivo JSONL com as requisições")
+    parser.add_argument("--total", type=int, default=1000, help="Requisições medidas")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes concorrentes")
+    parser.add_argument("--warmup", type=int, default=50, help="Requisições de aquecimento (descartadas)")
+    parser.add_argument("--backend", choices=("keras", "numpy"), help="INFERENCE_BACKEND (padrão: config)")
+    parser.add_argument("--output", help="Arquivo JSON (padrão: benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    configure_env(args.backend)
+    entries = load_requests(args.requests)
+    results = asyncio.run(run_load(entries, args.total, args.concurrency, args.warmup))
+
+    print_table({k: v for k, v in results.items() if isinstance(v, dict)})
+    print(f"status codes: {results['status_codes']}  wall: {results['wall_s']}s")
+    params = {
+        "requests": os.path.relpath(args.requests),
+        "total": args.total,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+    }
+    path = write_results("load", params, results, args.output)
+    print(f"results written to {path}")
+    return 0 if all(code.startswith("2") for code in results["status_codes"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+Micro-benchmarks dos caminhos quentes, sem servidor HTTP.
+
+    python -m benchmarks.micro --backend numpy --repeat 300
+    python -m benchmarks.micro --only predict,forecast
+    python -m benchmarks.micro --only encoding
+
+Cada benchmark mede chamadas sequenciais (após aquecimento) e reporta
+p50/p95/p99 e operações por segundo.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+
+from benchmarks.common import configure_env, measure, print_table, summarize, write_results
+
+FORECAST_DAYS = (1, 5, 10, 20, 30)
+
+
+def _prices(seed: int = 0, n: int = 60) -> list[float]:
+    rng = np.random.default_rng(seed)
+    return (30.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, n)))).tolist()
+
+
+# ── Benchmarks ─────────────────────────────────────────────────────────────────
+
+def bench_model(repeat: int) -> dict:
+    from app.config import METADATA_PATH, MODEL_PATH
+    from app.services.model_service import ModelService
+
+    service = ModelService(MODEL_PATH, METADATA_PATH)
+    service.warm_up([1], rounds=2)
+    prices = _prices()
+    # Uma janela diferente por chamada: todas são faltas no cache de resultados
+    distinct = [_prices(seed) for seed in range(1, repeat + 6)]
+    counter = iter(range(10**9))
+
+    results = {
+        "model_service.predict": summarize(
+            measure(lambda: service.predict(distinct[next(counter) % len(distinct)]), repeat)
+        ),
+        # Mesma janela repetida: acerto no cache, sem forward pass
+        "model_service.predict[cached]": summarize(measure(lambda: service.predict(prices), repeat)),
+    }
+    for days in FORECAST_DAYS:
+        # Horizontes longos custam `days` forward passes: menos repetições
+        n = max(10, repeat // days)
+        results[f"model_service.forecast[{days}d]"] = summarize(
+            measure(lambda: service.forecast(prices, days), n, warmup=2)
+        )
+    return results
+
+
+def bench_next_business_day(repeat: int) -> dict:
+    from app.services.data_service import next_business_day
+    from app.services.market_calendar import session_dates_after
+
+    days = ["2024-06-28", "2024-07-01", "2024-12-31", "2025-03-03"]
+    counter = iter(range(10**9))
+    return {
+        "data_service.next_business_day": summarize(
+            measure(lambda: next_business_day(days[next(counter) % len(days)]), repeat * 10)
+        ),
+        # Todas as datas de um forecast de 30 dias (uma busca binária + slice)
+        "market_calendar.session_dates_after[30d]": summarize(
+            measure(lambda: session_dates_after(days[next(counter) % len(days)], 30), repeat * 10)
+        ),
+    }
+
+
+def bench_validation(repeat: int) -> dict:
+    from app.schemas.prediction import PredictManualRequest
+
+    payload = json.dumps({"symbol": "PETR4.SA", "prices": _prices()})
+    decoded = json.loads(payload)
+    return {
+        "schema.PredictManualRequest[json]": summarize(
+            measure(lambda: PredictManualRequest.model_validate_json(payload), repeat * 10)
+        ),
+        "schema.PredictManualRequest[dict]": summarize(
+            measure(lambda: PredictManualRequest.model_validate(decoded), repeat * 10)
+        ),
+    }
+
+
+def bench_metrics_middleware(repeat: int) -> dict:
+    """Mesma app ASGI trivial com e sem `MetricsMiddleware`; a diferença é o overhead."""
+    from app.middleware.metrics import MetricsMiddleware
+
+    async def plain_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/predict/live",
+        "route": object(),  # rota já resolvida, como após o roteamento do Starlette
+        "path_params": {},
+    }
+    wrapped = MetricsMiddleware(plain_app)
+
+    async def run(app: Callable, n: int) -> list[float]:
+        durations = []
+        for _ in range(n):
+            t0 = time.perf_counter()
+            await app(scope, receive, send)
+            durations.append(time.perf_counter() - t0)
+        return durations
+
+    n = repeat * 20
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run(wrapped, 100))
+        bare = summarize(loop.run_until_complete(run(plain_app, n)))
+        with_metrics = summarize(loop.run_until_complete(run(wrapped, n)))
+    finally:
+        loop.close()
+
+    return {
+        "asgi.bare": bare,
+        "asgi.metrics_middleware": with_metrics,
+        "asgi.metrics_middleware_overhead": {
+            "p50_us": round((with_metrics["p50_ms"] - bare["p50_ms"]) * 1000, 3),
+            "mean_us": round((with_metrics["mean_ms"] - bare["mean_ms"]) * 1000, 3),
+        },
+    }
+
+
+def _sample_responses() -> dict:
+    """Respostas típicas: predição simples, forecast de 30 dias e lote de 100 janelas."""
+    from app.schemas.prediction import (
+        BatchPredictionItem,
+        BatchPredictionResponse,
+        ForecastDay,
+        ForecastResponse,
+        PredictionResponse,
+    )
+
+    prices = _prices(n=100)
+    common = {"model": "lstm_petr4_final@0123abcd", "timestamp": "2024-07-01T21:00:00.000000Z"}
+    return {
+        "predict": PredictionResponse(
+            symbol="PETR4.SA",
+            predicted_price=38.1234,
+            predicted_ratio=1.012345,
+            reference_price=37.6578,
+            last_known_price=38.0012,
+            expected_change_pct=0.3205,
+            prediction_for_date="2024-07-02",
+            last_data_date="2024-07-01",
+            inference_time_ms=2.41,
+            **common,
+        ),
+        "forecast[30d]": ForecastResponse(
+            symbol="PETR4.SA",
+            base_price=38.0012,
+            base_date="2024-07-01",
+            forecast_days=30,
+            forecast=[
+                ForecastDay(day=i + 1, date="2024-07-02", predicted_price=round(p, 4), expected_change_pct=0.1234)
+                for i, p in enumerate(prices[:30])
+            ],
+            **common,
+        ),
+        "batch[100]": BatchPredictionResponse(
+            count=100,
+            succeeded=100,
+            failed=0,
+            results=[
+                BatchPredictionItem(
+                    index=i,
+                    symbol="PETR4.SA",
+                    status="ok",
+                    predicted_price=round(p, 4),
+                    predicted_ratio=1.0123,
+                    reference_price=round(p * 0.99, 4),
+                    last_known_price=round(p * 1.01, 4),
+                    expected_change_pct=0.4321,
+                )
+                for i, p in enumerate(prices)
+            ],
+            inference_time_ms=3.52,
+            **common,
+        ),
+    }
+
+
+def bench_encoding(repeat: int) -> dict:
+    """
+    Bytes e latência por resposta, pela app ASGI do FastAPI: `response_model`
+    padrão × caminho rápido (`render`: JSON em uma passada, MessagePack), e
+    eventos de streaming com json × orjson (`dumps`).
+    """
+    from fastapi import FastAPI, Request
+
+    from app.schemas.encoding import (
+        JSON_CONTENT_TYPE,
+        MSGPACK_CONTENT_TYPE,
+        _load_msgpack,
+        dumps,
+        orjson,
+        render,
+    )
+
+    app = FastAPI()
+    responses = _sample_responses()
+    for index, (name, model) in enumerate(responses.items()):
+
+        def routes(model=model):
+            async def standard():
+                return model
+
+            async def fast(request: Request):
+                return render(request, model, enabled=True)
+
+            return standard, fast
+
+        standard, fast = routes()
+        app.add_api_route(f"/{index}/standard", standard, methods=["GET"], response_model=type(model))
+        app.add_api_route(f"/{index}/fast", fast, methods=["GET"], response_model=type(model))
+
+    encodings = {"response_model": ("standard", JSON_CONTENT_TYPE), "json": ("fast", JSON_CONTENT_TYPE)}
+    if _load_msgpack() is not None:
+        encodings["msgpack"] = ("fast", MSGPACK_CONTENT_TYPE)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def run(path: str, accept: str, n: int) -> tuple[list[float], int]:
+        size = 0
+
+        async def send(message):
+            nonlocal size
+            if message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"accept", accept.encode())],
+        }
+        durations = []
+        for _ in range(n):
+            size = 0
+            t0 = time.perf_counter()
+            await app(scope, receive, send)
+            durations.append(time.perf_counter() - t0)
+        return durations, size
+
+    results = {}
+    loop = asyncio.new_event_loop()
+    try:
+        for index, name in enumerate(responses):
+            n = repeat * 10 if name == "predict" else repeat * 2
+            for encoding, (route, accept) in encodings.items():
+                path = f"/{index}/{route}"
+                loop.run_until_complete(run(path, accept, 50))
+                durations, size = loop.run_until_complete(run(path, accept, n))
+                results[f"encoding.{name}.{encoding}"] = {**summarize(durations), "bytes": size}
+    finally:
+        loop.close()
+
+    # Um evento "day" do forecast em streaming (NDJSON/SSE)
+    event = {"day": 1, "date": "2024-07-02", "predicted_price": 38.1234, "expected_change_pct": 0.1234}
+    variants = {"json": False, "orjson": True} if orjson is not None else {"json": False}
+    for encoding, enabled in variants.items():
+        results[f"encoding.stream_event.{encoding}"] = {
+            **summarize(measure(lambda: dumps(event, enabled), repeat * 50)),
+            "bytes": len(dumps(event, enabled)) + 1,
+        }
+    return results
+
+
+BENCHMARKS: dict[str, Callable[[int], dict]] = {
+    "predict,forecast": bench_model,
+    "next_business_day": bench_next_business_day,
+    "validation": bench_validation,
+    "middleware": bench_metrics_middleware,
+    "encoding": bench_encoding,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks dos caminhos quentes da API.")
+    parser.add_argument("--backend", choices=("keras", "numpy"), help="INFERENCE_BACKEND (padrão: config)")
+    parser.add_argument("--repeat", type=int, default=200, help="Repetições base por benchmark")
+    parser.add_argument(
+        "--only",
+        help=f"Subconjunto separado por vírgula: {', '.join(sorted({n for k in BENCHMARKS for n in k.split(',')}))}",
+    )
+    parser.add_argument("--output", help="Arquivo JSON (padrão: benchmarks/results/micro-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    configure_env(args.backend)
+    selected = set(args.only.split(",")) if args.only else None
+
+    results: dict = {}
+    for names, bench in BENCHMARKS.items():
+        if selected is None or selected & set(names.split(",")):
+            results.update(bench(args.repeat))
+
+    print_table(results)
+    overhead = results.get("asgi.metrics_middleware_overhead")
+    if overhead:
+        print(f"MetricsMiddleware overhead: {overhead['p50_us']:.1f} µs (p50)")
+    for name, stats in results.items():
+        if name.startswith("encoding.") and "bytes" in stats:
+            print(f"{name:<36} {stats['bytes']:>8} bytes")
+    path = write_results("micro", {"repeat": args.repeat, "only": args.only}, results, args.output)
+    print(f"results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
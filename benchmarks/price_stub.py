@@ -0,0 +1,44 @@
+"""Fonte de preços sintética que substitui o Yahoo Finance nos benchmarks."""
+
+import zlib
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.services.price_source import PriceSource, set_price_source
+
+# Primeiro pregão das séries (histórico longo o bastante para backtests)
+_START = "2015-01-01"
+
+
+class SyntheticPriceSource(PriceSource):
+    """
+    Passeio aleatório log-normal por símbolo, em dias úteis até hoje.
+
+    A semente vem do nome do símbolo: a mesma série em toda execução.
+    """
+
+    def __init__(self) -> None:
+        self._series: dict[str, pd.Series] = {}
+
+    def _series_for(self, symbol: str) -> pd.Series:
+        symbol = symbol.upper()
+        if symbol not in self._series:
+            index = pd.bdate_range(_START, date.today())
+            rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+            start_price = rng.uniform(10.0, 100.0)
+            steps = rng.normal(0.0003, 0.018, size=len(index))
+            self._series[symbol] = pd.Series(start_price * np.exp(np.cumsum(steps)), index=index)
+        return self._series[symbol]
+
+    def fetch(self, symbol: str, start: date, end: date) -> pd.Series:
+        close = self._series_for(symbol)
+        return close[(close.index >= pd.Timestamp(start)) & (close.index < pd.Timestamp(end))]
+
+
+def install() -> SyntheticPriceSource:
+    """Ativa a fonte sintética no lugar da configurada em `PRICE_SOURCE`."""
+    source = SyntheticPriceSource()
+    set_price_source(source)
+    return source
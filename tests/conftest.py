@@ -0,0 +1,118 @@
+"""
+Configuração comum dos testes.
+
+As variáveis de ambiente são lidas por `app.config` na importação, então os
+padrões de teste são definidos aqui, antes de qualquer import de `app`:
+backend NumPy (sem TensorFlow), sem exportação de pesos compartilhados, sem
+watcher de modelos e preços de CSVs locais (nunca a rede).
+"""
+
+import os
+import tempfile
+
+_PRICES_DIR = tempfile.mkdtemp(prefix="petr4-test-prices-")
+
+for _name, _value in {
+    "INFERENCE_BACKEND": "numpy",
+    "NUMPY_WEIGHTS_DIR": "",
+    "MODEL_WATCH_ENABLED": "false",
+    "PRICE_SOURCE": "local",
+    "PRICE_SOURCE_DIR": _PRICES_DIR,
+    "PREDICTION_TABLE_ENABLED": "false",
+    "BACKGROUND_LOCK_FILE": os.path.join(_PRICES_DIR, "background.lock"),
+    "PREDICTION_TABLE_SNAPSHOT": os.path.join(_PRICES_DIR, "prediction_table.json"),
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import threading  # noqa: E402
+from datetime import date  # noqa: E402
+from typing import Optional  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from app.config import METADATA_PATH, MODEL_PATH  # noqa: E402
+from app.services.price_source import PriceSource  # noqa: E402
+
+
+class FakePriceSource(PriceSource):
+    """Fonte em memória que registra cada chamada (símbolos pedidos a `fetch` / `fetch_many`)."""
+
+    def __init__(self) -> None:
+        self.series: dict[str, pd.Series] = {}
+        self.calls: list[tuple[str, tuple[str, ...]]] = []
+        self._lock = threading.Lock()
+
+    def add(self, symbol: str, dates, closes) -> None:
+        self.series[symbol.upper()] = pd.Series(
+            np.asarray(closes, dtype=np.float64), index=pd.DatetimeIndex(dates)
+        )
+
+    def add_sessions(self, symbol: str, n: int, last: Optional[date] = None, start: float = 30.0) -> None:
+        """`n` fechamentos crescentes nos pregões da B3 até `last` (padrão: o último encerrado)."""
+        from app.services.market_calendar import last_closed_session, sessions_until
+
+        dates = sessions_until(last or last_closed_session(), n)
+        self.add(symbol, dates, start + 0.25 * np.arange(n))
+
+    def fetch(self, symbol: str, start: date, end: date) -> pd.Series:
+        with self._lock:
+            self.calls.append(("fetch", (symbol,)))
+        close = self.series.get(symbol.upper(), pd.Series(dtype=float, index=pd.DatetimeIndex([])))
+        return close[(close.index >= pd.Timestamp(start)) & (close.index < pd.Timestamp(end))]
+
+    def fetch_many(self, symbols: list[str], start: date, end: date) -> pd.DataFrame:
+        with self._lock:
+            self.calls.append(("fetch_many", tuple(symbols)))
+        series = {
+            symbol: self.series.get(symbol.upper(), pd.Series(dtype=float, index=pd.DatetimeIndex([])))
+            for symbol in symbols
+        }
+        frame = pd.DataFrame(series).reindex(columns=symbols).sort_index()
+        return frame[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+
+
+@pytest.fixture
+def price_source():
+    """Fonte de preços falsa instalada no lugar da configurada, com o cache de janelas vazio."""
+    from app.services import price_source as module
+    from app.services.data_service import price_cache
+
+    previous = module._source
+    source = FakePriceSource()
+    module.set_price_source(source)
+    price_cache.clear()
+    yield source
+    price_cache.clear()
+    module.set_price_source(previous)
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def model_service():
+    """Modelo real servido pelo backend NumPy (float32), carregado uma vez."""
+    from app.services.model_service import ModelService
+
+    return ModelService(MODEL_PATH, METADATA_PATH, backend="numpy")
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient com o lifespan rodando, liberado só depois de /health ficar pronto."""
+    import time
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        deadline = time.monotonic() + 60
+        while test_client.get("/health").status_code != 200:
+            assert time.monotonic() < deadline, "model did not become ready"
+            time.sleep(0.05)
+        yield test_client
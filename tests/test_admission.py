@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from app.middleware.admission import AdmissionMiddleware, WeightedLimiter, _request_weight
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize(
+    "body, default_days, expected",
+    [
+        (b'{"prices": [1, 2, 3]}', None, 1),
+        (b'{"prices": [1, 2, 3], "mc_samples": 1000}', None, 32),
+        (b'{"symbol": "PETR4.SA", "days": 30, "mc_samples": 1000}', 5, 960),
+        (b"{}", 5, 5),
+        (b'{"days": 10}', 5, 10),
+        (b"not json", 5, 1),
+        (b'{"mc_samples": "many"}', None, 1),
+    ],
+)
+def test_request_weight(body, default_days, expected):
+    assert _request_weight(body, default_days) == expected
+
+
+def test_weight_is_clamped_to_capacity():
+    limiter = WeightedLimiter("test-clamp", capacity=10, max_queue=1)
+    assert limiter.clamp(960) == 10
+    assert limiter.clamp(0) == 1
+
+
+async def test_waiters_are_admitted_in_fifo_order():
+    limiter = WeightedLimiter("test-fifo", capacity=4, max_queue=8)
+    assert await limiter.acquire(3, timeout=1)
+
+    order = []
+
+    async def request(name: str, weight: int) -> None:
+        assert await limiter.acquire(weight, timeout=1)
+        order.append(name)
+
+    heavy = asyncio.create_task(request("heavy", 4))
+    await asyncio.sleep(0)
+    light = asyncio.create_task(request("light", 1))
+    await asyncio.sleep(0)
+    # Há 1 unidade livre, mas o leve não ultrapassa o pesado da frente da fila
+    assert order == [] and limiter.queued == 2
+
+    limiter.release(3)
+    await heavy
+    assert order == ["heavy"] and limiter.in_use == 4
+    limiter.release(4)
+    await light
+    assert order == ["heavy", "light"]
+    limiter.release(1)
+    assert limiter.in_use == 0 and limiter.queued == 0
+
+
+async def test_queue_full_and_timeout_are_shed():
+    limiter = WeightedLimiter("test-shed", capacity=1, max_queue=1)
+    assert await limiter.acquire(1, timeout=1)
+
+    waiting = asyncio.create_task(limiter.acquire(1, timeout=0.05))
+    await asyncio.sleep(0)
+    assert not await limiter.acquire(1, timeout=1)  # fila cheia: recusa imediata
+    assert not await waiting  # prazo vencido
+    assert limiter.queued == 0 and limiter.in_use == 1
+
+    limiter.release(1)
+    assert await limiter.acquire(1, timeout=0.05)
+
+
+async def test_timed_out_head_lets_the_queue_advance():
+    limiter = WeightedLimiter("test-advance", capacity=4, max_queue=4)
+    assert await limiter.acquire(2, timeout=1)
+
+    head = asyncio.create_task(limiter.acquire(4, timeout=0.05))
+    await asyncio.sleep(0)
+    tail = asyncio.create_task(limiter.acquire(2, timeout=1))
+
+    assert not await head
+    assert await tail
+    assert limiter.in_use == 4
+
+
+async def _call(middleware, path: str, body: bytes = b"{}") -> list[dict]:
+    sent = []
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+    await middleware(scope, receive, send)
+    return sent
+
+
+async def test_middleware_returns_503_when_overloaded():
+    received = []
+
+    async def app(scope, receive, send):
+        received.append((await receive())["body"])
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = AdmissionMiddleware(app)
+    middleware.timeout = 0.05
+    forecast = middleware.limiters["forecast"]
+    forecast.max_queue = 0
+
+    # O corpo lido para calcular o peso é reentregue à aplicação
+    sent = await _call(middleware, "/predict/forecast", b'{"days": 3}')
+    assert sent[0]["status"] == 200 and received == [b'{"days": 3}']
+
+    assert await forecast.acquire(forecast.capacity, timeout=1)
+    try:
+        sent = await _call(middleware, "/predict/forecast")
+        assert sent[0]["status"] == 503
+        assert (b"retry-after", b"1") in sent[0]["headers"]
+        # Outro pool não é afetado
+        assert (await _call(middleware, "/predict"))[0]["status"] == 200
+    finally:
+        forecast.release(forecast.capacity)
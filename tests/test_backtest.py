@@ -0,0 +1,82 @@
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.config import LOOK_BACK
+from app.services.backtest import MetricsAccumulator, backtest_windows
+from app.services.market_calendar import sessions_until
+
+DATES = sessions_until(date(2026, 10, 16), LOOK_BACK + 20)
+CLOSES = 30.0 + np.sin(np.arange(len(DATES)) / 3.0)
+
+
+def test_each_session_is_predicted_from_the_previous_window():
+    start, end = DATES[LOOK_BACK + 5].astype(date), DATES[LOOK_BACK + 9].astype(date)
+    windows, targets, actual = backtest_windows(DATES, CLOSES, start, end)
+
+    assert windows.shape == (5, LOOK_BACK)
+    np.testing.assert_array_equal(targets, DATES[LOOK_BACK + 5 : LOOK_BACK + 10])
+    np.testing.assert_array_equal(actual, CLOSES[LOOK_BACK + 5 : LOOK_BACK + 10])
+    for window, target in zip(windows, range(LOOK_BACK + 5, LOOK_BACK + 10)):
+        np.testing.assert_array_equal(window, CLOSES[target - LOOK_BACK : target])
+    assert np.shares_memory(windows, CLOSES)          # views, sem cópia
+
+
+def test_range_before_the_first_full_window_is_empty():
+    windows, _, _ = backtest_windows(DATES, CLOSES, DATES[0].astype(date), DATES[10].astype(date))
+    assert len(windows) == 0
+
+
+def test_short_history_is_rejected_in_english():
+    with pytest.raises(ValueError, match=r"^Insufficient data for backtest: 60 closes"):
+        backtest_windows(DATES[:LOOK_BACK], CLOSES[:LOOK_BACK], date(2026, 1, 1), date(2026, 10, 16))
+
+
+def test_metrics_accumulated_in_chunks_match_a_single_pass():
+    rng = np.random.default_rng(3)
+    actual = 30 + rng.normal(0, 1, 100)
+    predicted = actual + rng.normal(0, 0.3, 100)
+
+    whole = MetricsAccumulator()
+    whole.update(actual, predicted)
+    chunked = MetricsAccumulator()
+    for lo in range(0, 100, 7):
+        chunked.update(actual[lo : lo + 7], predicted[lo : lo + 7])
+
+    error = predicted - actual
+    expected = {
+        "MAE": np.abs(error).mean(),
+        "RMSE": np.sqrt((error ** 2).mean()),
+        "MAPE": (np.abs(error) / actual).mean() * 100,
+        "R2": 1 - (error ** 2).sum() / ((actual - actual.mean()) ** 2).sum(),
+    }
+    assert chunked.result() == whole.result()
+    assert whole.result() == pytest.approx(expected, abs=1e-5)
+    assert MetricsAccumulator().result()["MAE"] is None
+
+
+def test_endpoint_json_and_ndjson_agree(client, price_source):
+    price_source.add("PETR4.SA", DATES, CLOSES)
+    body = {"symbol": "PETR4.SA", "start_date": str(DATES[LOOK_BACK + 10]), "end_date": "2026-10-16"}
+
+    response = client.post("/predict/backtest", json=body)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["count"] == 10
+    assert result["points"][0]["actual_price"] == round(CLOSES[LOOK_BACK + 10], 4)
+
+    lines = client.post(
+        "/predict/backtest", json=body, headers={"accept": "application/x-ndjson"}
+    ).text.splitlines()
+    summary = json.loads(lines[-1])["summary"]
+    assert summary["metrics"] == result["metrics"]
+    assert [json.loads(line) for line in lines[:-1]] == result["points"]
+
+
+def test_endpoint_reports_short_history_as_400(client, price_source):
+    price_source.add("PETR4.SA", DATES[:30], CLOSES[:30])
+    response = client.post("/predict/backtest", json={"symbol": "PETR4.SA", "start_date": "2026-10-01"})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Insufficient data for backtest")
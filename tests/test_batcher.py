@@ -0,0 +1,75 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.model_service import InferenceBatcher
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingModel:
+    """Forward pass falso: ratio = último valor da janela; registra o tamanho de cada lote."""
+
+    def __init__(self) -> None:
+        self.batch_sizes: list[int] = []
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        self.batch_sizes.append(len(X))
+        return X[:, -1]
+
+
+async def test_concurrent_submits_share_forward_passes():
+    model = RecordingModel()
+    batcher = InferenceBatcher(model, max_batch_size=4, max_wait_ms=50)
+    batcher.start()
+    try:
+        windows = [np.full(3, float(i)) for i in range(10)]
+        results = await asyncio.gather(*(batcher.submit(w) for w in windows))
+    finally:
+        await batcher.stop()
+
+    # Cada chamador recebe o ratio da própria janela
+    assert [ratio for ratio, _ in results] == [float(i) for i in range(10)]
+    assert sum(model.batch_sizes) == 10
+    assert max(model.batch_sizes) <= 4
+    assert len(model.batch_sizes) < 10
+
+
+async def test_lone_request_is_dispatched_after_max_wait():
+    model = RecordingModel()
+    batcher = InferenceBatcher(model, max_batch_size=32, max_wait_ms=1)
+    batcher.start()
+    try:
+        ratio, _ = await asyncio.wait_for(batcher.submit(np.ones(3)), timeout=2)
+    finally:
+        await batcher.stop()
+    assert ratio == 1.0
+    assert model.batch_sizes == [1]
+
+
+async def test_inference_error_reaches_every_caller_in_the_batch():
+    def failing(X: np.ndarray) -> np.ndarray:
+        raise RuntimeError("boom")
+
+    batcher = InferenceBatcher(failing, max_batch_size=8, max_wait_ms=20)
+    batcher.start()
+    try:
+        results = await asyncio.gather(
+            *(batcher.submit(np.ones(3)) for _ in range(3)), return_exceptions=True
+        )
+    finally:
+        await batcher.stop()
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+async def test_stop_drains_the_queue_and_stops_accepting():
+    model = RecordingModel()
+    batcher = InferenceBatcher(model, max_batch_size=2, max_wait_ms=50)
+    batcher.start()
+    pending = [asyncio.ensure_future(batcher.submit(np.full(3, 7.0))) for _ in range(5)]
+    await asyncio.sleep(0)
+    await batcher.stop()
+
+    assert not batcher.running
+    assert [ratio for ratio, _ in await asyncio.gather(*pending)] == [7.0] * 5
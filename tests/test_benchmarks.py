@@ -0,0 +1,52 @@
+import json
+from datetime import date
+
+import pytest
+
+from benchmarks import compare
+from benchmarks.common import summarize, write_results
+from benchmarks.price_stub import SyntheticPriceSource
+
+
+def test_summarize_reports_percentiles_in_ms():
+    stats = summarize([0.001] * 98 + [0.010, 0.020])
+    assert stats["n"] == 100
+    assert stats["p50_ms"] == pytest.approx(1.0)
+    assert stats["max_ms"] == pytest.approx(20.0)
+    assert stats["throughput_per_s"] == pytest.approx(100 / 0.128)
+    # Carga concorrente: throughput pelo tempo de parede
+    assert summarize([0.01] * 10, wall_s=0.02)["throughput_per_s"] == 500
+    assert summarize([]) == {"n": 0}
+
+
+def _result(path, p50: float) -> str:
+    stats = {"n": 10, "p50_ms": p50, "p95_ms": p50 * 2, "p99_ms": p50 * 3}
+    return write_results("micro", {"repeat": 10}, {"predict": stats}, output=str(path))
+
+
+def test_compare_flags_p50_regressions(tmp_path, capsys):
+    before = _result(tmp_path / "before.json", 1.0)
+    slower = _result(tmp_path / "slower.json", 1.5)
+    faster = _result(tmp_path / "faster.json", 0.8)
+
+    assert compare.main([before, slower, "--fail-above", "20"]) == 1
+    assert "p50 regressions above 20.0%: predict" in capsys.readouterr().out
+    assert compare.main([before, faster, "--fail-above", "20"]) == 0
+    assert compare.main([before, slower]) == 0
+
+
+def test_results_file_records_the_environment(tmp_path):
+    path = _result(tmp_path / "run.json", 1.0)
+    payload = json.loads(open(path, encoding="utf-8").read())
+    assert payload["kind"] == "micro"
+    assert {"python", "numpy", "inference_backend"} <= set(payload["environment"])
+
+
+def test_synthetic_prices_are_reproducible():
+    first = SyntheticPriceSource().fetch("PETR4.SA", date(2024, 1, 1), date(2024, 3, 1))
+    second = SyntheticPriceSource().fetch("petr4.sa", date(2024, 1, 1), date(2024, 3, 1))
+    other = SyntheticPriceSource().fetch("VALE3.SA", date(2024, 1, 1), date(2024, 3, 1))
+
+    assert len(first) > 30
+    assert first.equals(second)
+    assert not first.equals(other)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import fetch_prices, fetch_prices_many, split_windows
+
+
+def _frame() -> pd.DataFrame:
+    index = pd.DatetimeIndex(pd.bdate_range("2026-10-01", periods=6))
+    return pd.DataFrame(
+        {
+            "A": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+            "B": [np.nan, 2.0, np.nan, 4.0, 5.0, np.nan],   # buracos: pregões sem dado
+            "C": [np.nan, np.nan, np.nan, np.nan, 5.0, 6.0],
+            "D": [np.nan] * 6,
+        },
+        index=index,
+    )
+
+
+def test_split_windows_takes_the_last_valid_closes_of_each_symbol():
+    windows, _ = split_windows(_frame(), 3)
+
+    assert list(windows) == ["A", "B"]
+    assert windows["A"]["prices"] == [4.0, 5.0, 6.0]
+    assert windows["A"]["dates"] == ["2026-10-06", "2026-10-07", "2026-10-08"]
+    assert windows["B"]["prices"] == [2.0, 4.0, 5.0]
+    assert windows["B"]["dates"] == ["2026-10-02", "2026-10-06", "2026-10-07"]
+    assert windows["B"]["last_date"] == "2026-10-07"
+    assert windows["B"]["last_price"] == 5.0
+
+
+def test_split_windows_reports_short_and_empty_symbols():
+    _, missing = split_windows(_frame(), 3)
+    assert set(missing) == {"C", "D"}
+    assert "found 2 trading days, need 3" in missing["C"]
+    assert "No market data" in missing["D"]
+
+
+def test_split_windows_without_any_complete_symbol():
+    windows, missing = split_windows(_frame()[["C", "D"]], 3)
+    assert windows == {}
+    assert set(missing) == {"C", "D"}
+
+
+def test_fetch_prices_many_downloads_uncached_symbols_in_one_call(price_source):
+    for symbol in ("PETR4.SA", "VALE3.SA", "ITUB4.SA"):
+        price_source.add_sessions(symbol, 70)
+    fetch_prices("PETR4.SA")                     # já em cache
+    calls = len(price_source.calls)
+
+    result = fetch_prices_many(["PETR4.SA", "VALE3.SA", "ITUB4.SA", "NOPE.SA"])
+
+    assert price_source.calls[calls:] == [("fetch_many", ("VALE3.SA", "ITUB4.SA", "NOPE.SA"))]
+    assert list(result["windows"]) == ["PETR4.SA", "VALE3.SA", "ITUB4.SA"]
+    assert list(result["missing"]) == ["NOPE.SA"]
+    assert result["windows"]["VALE3.SA"] == fetch_prices("VALE3.SA")
+    # As janelas baixadas em lote entram no cache
+    assert len(price_source.calls) == calls + 1
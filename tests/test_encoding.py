@@ -0,0 +1,61 @@
+import json
+
+import msgpack
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.schemas.encoding import (
+    JSON_CONTENT_TYPE,
+    MSGPACK_CONTENT_TYPE,
+    dumps,
+    encode,
+    negotiate,
+    render,
+)
+
+
+class _Prediction(BaseModel):
+    symbol: str
+    predicted_close: float
+    dates: list[str]
+
+
+MODEL = _Prediction(symbol="PETR4.SA", predicted_close=38.125, dates=["2026-10-19"])
+
+
+def _request(accept: str) -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/predict", "headers": [(b"accept", accept.encode())]})
+
+
+def test_negotiate_prefers_msgpack_only_when_asked():
+    assert negotiate("application/msgpack") == MSGPACK_CONTENT_TYPE
+    assert negotiate("application/x-msgpack, application/json;q=0.5") == MSGPACK_CONTENT_TYPE
+    assert negotiate("application/json") == JSON_CONTENT_TYPE
+    assert negotiate("") == JSON_CONTENT_TYPE
+
+
+def test_encode_matches_the_model_in_both_formats():
+    assert json.loads(encode(MODEL)) == MODEL.model_dump()
+    assert msgpack.unpackb(encode(MODEL, MSGPACK_CONTENT_TYPE), raw=False) == MODEL.model_dump()
+
+
+def test_render_returns_the_model_when_disabled():
+    assert render(_request("application/msgpack"), MODEL, enabled=False) is MODEL
+
+
+def test_render_serializes_in_the_negotiated_format():
+    response = render(_request("application/msgpack"), MODEL, enabled=True)
+    assert isinstance(response, Response)
+    assert response.media_type == MSGPACK_CONTENT_TYPE
+    assert response.headers["vary"] == "Accept"
+    assert msgpack.unpackb(response.body, raw=False) == MODEL.model_dump()
+
+    response = render(_request("*/*"), MODEL, enabled=True)
+    assert response.media_type == JSON_CONTENT_TYPE
+    assert json.loads(response.body) == MODEL.model_dump()
+
+
+def test_dumps_is_equivalent_with_and_without_orjson():
+    event = {"day": 1, "date": "2026-10-19", "predicted_close": 38.125}
+    assert json.loads(dumps(event, enabled=True)) == json.loads(dumps(event, enabled=False)) == event
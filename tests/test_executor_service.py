@@ -0,0 +1,48 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from app.services.executor_service import run_inference, run_io
+
+pytestmark = pytest.mark.anyio
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+async def test_blocking_call_does_not_stall_the_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await run_io(time.sleep, 0.3)
+    task.cancel()
+    assert ticks >= 10
+
+
+async def test_calls_run_off_the_loop_thread_with_the_caller_context():
+    request_id.set("abc")
+    loop_thread = threading.get_ident()
+
+    def probe():
+        return threading.get_ident(), request_id.get()
+
+    for run in (run_io, run_inference):
+        thread, value = await run(probe)
+        assert thread != loop_thread
+        assert value == "abc"
+
+
+async def test_exceptions_propagate_to_the_caller():
+    def fail():
+        raise ValueError("No market data")
+
+    with pytest.raises(ValueError, match="No market data"):
+        await run_io(fail)
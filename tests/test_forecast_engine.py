@@ -0,0 +1,81 @@
+import numpy as np
+
+from app.services.forecast_engine import (
+    RingWindow,
+    forecast_paths,
+    iter_forecast,
+    step_changes_pct,
+)
+
+
+def _mean_ratio(X: np.ndarray) -> np.ndarray:
+    """Modelo falso determinístico: ratio = média da janela normalizada."""
+    return X.mean(axis=1)
+
+
+def test_ring_window_slides_like_a_list():
+    history = np.arange(12, dtype=np.float64).reshape(2, 6)
+    ring = RingWindow(history)
+    expected = [list(row) for row in history]
+
+    for step in range(15):  # mais que 2 voltas completas do buffer
+        np.testing.assert_array_equal(ring.view(), expected)
+        values = np.array([100.0 + step, 200.0 + step])
+        ring.push(values)
+        for row, value in zip(expected, values):
+            row.pop(0)
+            row.append(value)
+
+    np.testing.assert_array_equal(ring.view(), expected)
+
+
+def test_ring_window_view_is_a_contiguous_slice_of_the_buffer():
+    ring = RingWindow(np.ones((3, 5)))
+    ring.push(np.zeros(3))
+    view = ring.view()
+    assert np.shares_memory(view, ring._buf)
+    # Cada série é uma fatia contígua, mesmo depois de dar a volta no buffer
+    assert view.strides[1] == view.itemsize
+
+
+def test_forecast_paths_match_naive_sliding_window():
+    rng = np.random.default_rng(1)
+    histories = 20 + np.cumsum(rng.normal(0, 0.5, (3, 8)), axis=1)
+    days = 12
+
+    expected = np.empty((3, days))
+    for i, series in enumerate(histories):
+        window = list(series)
+        for day in range(days):
+            arr = np.array(window)
+            expected[i, day] = _mean_ratio((arr / arr[0])[np.newaxis])[0] * arr[0]
+            window = window[1:] + [expected[i, day]]
+
+    np.testing.assert_allclose(forecast_paths(_mean_ratio, histories, days), expected, rtol=1e-12)
+
+
+def test_iter_forecast_yields_the_same_steps_as_forecast_paths():
+    histories = np.linspace(10, 20, 16).reshape(2, 8)
+    paths = forecast_paths(_mean_ratio, histories, 5)
+    steps = np.stack(list(iter_forecast(_mean_ratio, histories, 5)), axis=1)
+    np.testing.assert_array_equal(steps, paths)
+
+
+def test_custom_normalization_is_applied_before_inference():
+    seen: list[np.dtype] = []
+
+    def infer(X: np.ndarray) -> np.ndarray:
+        seen.append(X.dtype)
+        return X[:, -1]
+
+    def normalize(windows: np.ndarray) -> np.ndarray:
+        arr = windows.astype(np.float32)
+        return arr / arr[:, :1]
+
+    forecast_paths(infer, np.full((1, 4), 2.0), 3, normalize)
+    assert seen == [np.float32] * 3
+
+
+def test_step_changes_are_relative_to_the_previous_step():
+    paths = np.array([[11.0, 12.1]])
+    np.testing.assert_allclose(step_changes_pct(np.array([10.0]), paths), [[10.0, 10.0]])
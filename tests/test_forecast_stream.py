@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.config import FORECAST_MAX_DAYS, LOOK_BACK
+
+SYMBOL = "ITUB4.SA"
+
+
+@pytest.fixture
+def prices(price_source):
+    price_source.add_sessions(SYMBOL, LOOK_BACK + 10)
+    return price_source
+
+
+def _sse_events(text: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_forecast_steps_match_the_batch_forecast(model_service):
+    prices = [30.0 + 0.1 * (i % 7) for i in range(LOOK_BACK + 5)]
+    assert list(model_service.forecast_steps(prices, 8)) == model_service.forecast(prices, 8)
+
+
+def test_ndjson_stream_carries_the_same_days_as_json(client, prices):
+    body = {"symbol": SYMBOL, "days": 5}
+    expected = client.post("/predict/forecast", json=body).json()["forecast"]
+
+    response = client.post("/predict/forecast", json=body, headers={"accept": "application/x-ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert lines[0]["symbol"] == SYMBOL and lines[0]["forecast_days"] == 5
+    assert lines[-1] == {"forecast_days": 5}
+    days = lines[1:-1]
+    assert [(d["day"], d["date"], d["predicted_price"]) for d in days] == [
+        (d["day"], d["date"], d["predicted_price"]) for d in expected
+    ]
+
+
+def test_sse_stream_names_each_event(client, prices):
+    response = client.post(
+        "/predict/forecast", json={"symbol": SYMBOL, "days": 3}, headers={"accept": "text/event-stream"}
+    )
+    assert response.headers["cache-control"] == "no-cache"
+    events = _sse_events(response.text)
+    assert [name for name, _ in events] == ["meta", "day", "day", "day", "end"]
+
+
+def test_long_horizons_require_streaming(client, prices):
+    days = FORECAST_MAX_DAYS + 10
+    assert client.post("/predict/forecast", json={"symbol": SYMBOL, "days": days}).status_code == 422
+
+    response = client.post(
+        "/predict/forecast", json={"symbol": SYMBOL, "days": days},
+        headers={"accept": "application/x-ndjson"},
+    )
+    lines = response.text.splitlines()
+    assert len(lines) == days + 2
+
+
+def test_unknown_symbol_fails_before_the_stream_starts(client, prices):
+    response = client.post(
+        "/predict/forecast", json={"symbol": "NOPE.SA"}, headers={"accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,116 @@
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.services.history_store import HISTORY_DTYPE, HistoryStore
+from app.services.market_calendar import sessions_until
+
+START = date(2026, 1, 2)
+SESSIONS = sessions_until(date(2026, 10, 16), 40)
+END = SESSIONS[-1].astype(date)
+
+
+@pytest.fixture
+def source(price_source):
+    price_source.add("PETR4.SA", SESSIONS, 30.0 + np.arange(len(SESSIONS)))
+    return price_source
+
+
+def _store(root, source, overlap: int = 3) -> HistoryStore:
+    return HistoryStore(str(root), source, START, overlap_sessions=overlap)
+
+
+def test_first_refresh_writes_a_single_structured_file(tmp_path, source):
+    store = _store(tmp_path, source)
+    assert store.refresh("PETR4.SA", SESSIONS[29].astype(date)) == 30
+
+    assert os.listdir(tmp_path / "PETR4.SA") == ["history.npy"]
+    saved = np.load(tmp_path / "PETR4.SA" / "history.npy")
+    assert saved.dtype == HISTORY_DTYPE
+    np.testing.assert_array_equal(saved["date"], SESSIONS[:30])
+
+    dates, closes = store.window("PETR4.SA", 5)
+    np.testing.assert_array_equal(dates, SESSIONS[25:30])
+    np.testing.assert_array_equal(closes, 30.0 + np.arange(25, 30))
+    assert isinstance(closes.base, np.memmap) or isinstance(closes, np.memmap)
+
+
+def test_refresh_appends_only_the_new_tail(tmp_path, source):
+    store = _store(tmp_path, source)
+    store.refresh("PETR4.SA", SESSIONS[29].astype(date))
+    # Download incremental: começa na sobreposição, não em `start_date`
+    assert store._start_for(store.history("PETR4.SA")[0]) == SESSIONS[27].astype(date)
+
+    assert store.refresh("PETR4.SA", END) == 10
+    dates, closes = store.history("PETR4.SA")
+    np.testing.assert_array_equal(dates, SESSIONS)
+    np.testing.assert_array_equal(closes, 30.0 + np.arange(40))
+
+
+def test_up_to_date_symbol_is_not_fetched(tmp_path, source):
+    store = _store(tmp_path, source)
+    store.refresh("PETR4.SA", END)
+    calls = len(source.calls)
+    assert store.refresh("PETR4.SA", END) == 0
+    assert len(source.calls) == calls
+
+
+def test_readjusted_overlap_rewrites_the_whole_series(tmp_path, source):
+    store = _store(tmp_path, source)
+    store.refresh("PETR4.SA", SESSIONS[29].astype(date))
+
+    # Provento: a fonte passa a devolver toda a série anterior em outra base
+    adjusted = (30.0 + np.arange(40)) * 0.9
+    adjusted[30:] = 30.0 + np.arange(30, 40)
+    source.add("PETR4.SA", SESSIONS, adjusted)
+
+    assert store.refresh("PETR4.SA", END) == 10
+    np.testing.assert_allclose(store.history("PETR4.SA")[1], adjusted)
+
+
+def test_matching_overlap_keeps_the_stored_closes(tmp_path, source):
+    store = _store(tmp_path, source)
+    store.refresh("PETR4.SA", SESSIONS[29].astype(date))
+    before = np.array(store.history("PETR4.SA")[1])
+
+    store.refresh("PETR4.SA", END)
+    np.testing.assert_array_equal(store.history("PETR4.SA")[1][:30], before)
+    # Só a cauda foi pedida à fonte na segunda atualização
+    assert [kind for kind, _ in source.calls] == ["fetch", "fetch"]
+
+
+def test_legacy_two_file_layout_is_read_and_migrated(tmp_path, source):
+    legacy = tmp_path / "PETR4.SA"
+    legacy.mkdir()
+    np.save(legacy / "dates.npy", SESSIONS[:30])
+    np.save(legacy / "closes.npy", 30.0 + np.arange(30))
+
+    store = _store(tmp_path, source)
+    assert store.last_date("PETR4.SA") == SESSIONS[29].astype(date)
+
+    store.refresh("PETR4.SA", END)
+    assert os.listdir(legacy) == ["history.npy"]
+    np.testing.assert_array_equal(store.history("PETR4.SA")[0], SESSIONS)
+
+
+def test_other_instances_see_each_replacement(tmp_path, source):
+    writer, reader = _store(tmp_path, source), _store(tmp_path, source)
+    writer.refresh("PETR4.SA", SESSIONS[29].astype(date))
+    assert len(reader.history("PETR4.SA")[0]) == 30
+
+    writer.refresh("PETR4.SA", END)
+    dates, closes = reader.history("PETR4.SA")
+    # Datas e fechamentos vêm sempre da mesma versão do arquivo
+    assert len(dates) == len(closes) == 40
+
+
+def test_refresh_many_downloads_stale_symbols_together(tmp_path, source):
+    source.add("VALE3.SA", SESSIONS, 60.0 + np.arange(40))
+    store = _store(tmp_path, source)
+    store.refresh("PETR4.SA", END)
+    calls = len(source.calls)
+
+    assert store.refresh_many(["PETR4.SA", "VALE3.SA"], END) == {"VALE3.SA": 40}
+    assert source.calls[calls:] == [("fetch_many", ("VALE3.SA",))]
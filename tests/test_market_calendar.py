@@ -0,0 +1,82 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app.services.market_calendar import (
+    MARKET_TZ,
+    SESSIONS,
+    b3_holidays,
+    easter,
+    is_session,
+    last_closed_session,
+    next_session,
+    next_session_close,
+    session_dates_after,
+    sessions_after,
+    sessions_until,
+)
+
+
+@pytest.mark.parametrize(
+    "year, expected",
+    [(2000, date(2000, 4, 23)), (2019, date(2019, 4, 21)), (2024, date(2024, 3, 31)), (2026, date(2026, 4, 5))],
+)
+def test_easter(year, expected):
+    assert easter(year) == expected
+
+
+def test_b3_holidays_follow_the_calendar_changes():
+    holidays_2026 = b3_holidays(2026)
+    # Carnaval, Sexta-feira Santa e Corpus Christi a partir da Páscoa (5/abr)
+    assert {date(2026, 2, 16), date(2026, 2, 17), date(2026, 4, 3), date(2026, 6, 4)} <= set(holidays_2026)
+    assert date(2026, 11, 20) in holidays_2026
+    # Feriados de São Paulo até 2021; 2022–2023 sem Consciência Negra
+    assert date(2021, 1, 25) in b3_holidays(2021)
+    assert date(2022, 1, 25) not in b3_holidays(2022)
+    assert date(2023, 11, 20) not in b3_holidays(2023)
+
+
+def test_sessions_exclude_weekends_and_holidays():
+    assert np.all(np.diff(SESSIONS).astype(int) > 0)
+    assert np.all(np.is_busday(SESSIONS))
+    holidays = np.array(b3_holidays(2025), dtype="datetime64[D]")
+    assert not np.isin(holidays, SESSIONS).any()
+    assert is_session(date(2026, 10, 16))
+    assert not is_session(date(2026, 10, 17))  # sábado
+    assert not is_session(date(2026, 10, 12))  # Nossa Senhora Aparecida
+    assert not is_session(date(1999, 12, 25))  # fora do intervalo pré-calculado
+
+
+def test_sessions_after_and_until():
+    # Sexta 10/out/2025 → pula o fim de semana; 12/out cai no domingo
+    assert session_dates_after("2025-10-10", 2) == ["2025-10-13", "2025-10-14"]
+    # Terça de Carnaval de 2026 → Quarta de Cinzas
+    assert next_session(date(2026, 2, 13)) == "2026-02-18"
+    until = sessions_until(date(2026, 2, 18), 3)
+    assert np.datetime_as_string(until, unit="D").tolist() == ["2026-02-12", "2026-02-13", "2026-02-18"]
+    assert sessions_after(date(2026, 2, 18), 10)[0] == np.datetime64("2026-02-19")
+
+
+def test_out_of_range_dates_raise():
+    with pytest.raises(ValueError, match="outside the B3 calendar"):
+        sessions_after(date(1990, 1, 1), 1)
+    with pytest.raises(ValueError, match="calendar ends"):
+        sessions_after(SESSIONS[-2], 5)
+    with pytest.raises(ValueError, match="calendar starts"):
+        sessions_until(SESSIONS[1], 5)
+
+
+def test_session_closes():
+    before_close = datetime(2026, 10, 16, 17, 59, tzinfo=MARKET_TZ)
+    after_close = datetime(2026, 10, 16, 18, 0, tzinfo=MARKET_TZ)
+    sunday = datetime(2026, 10, 18, 12, 0, tzinfo=MARKET_TZ)
+
+    assert last_closed_session(before_close) == date(2026, 10, 15)
+    assert last_closed_session(after_close) == date(2026, 10, 16)
+    assert last_closed_session(sunday) == date(2026, 10, 16)
+
+    assert next_session_close(before_close) == after_close
+    assert next_session_close(after_close) == datetime(2026, 10, 19, 18, 0, tzinfo=MARKET_TZ)
+    # Segunda 12/out/2026 é feriado: o próximo fechamento é na terça
+    assert next_session_close(datetime(2026, 10, 10, 9, 0, tzinfo=MARKET_TZ)).date() == date(2026, 10, 13)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.config import LOOK_BACK
+
+PRICES = [30.0 + 0.2 * np.sin(i / 4) for i in range(LOOK_BACK)]
+
+
+def test_replicated_window_yields_independent_samples(model_service):
+    window, _ = model_service._normalize(PRICES)
+    ratios = model_service._infer_stochastic(np.repeat(window[np.newaxis], 64, axis=0))
+    assert ratios.shape == (64,)
+    assert np.unique(ratios).size > 32
+
+
+def test_dropout_stays_off_for_point_predictions(model_service):
+    window, _ = model_service._normalize(PRICES)
+    ratios = model_service._infer(np.repeat(window[np.newaxis], 4, axis=0))
+    assert np.unique(ratios).size == 1
+
+
+def test_interval_bands_are_ordered_around_the_mean(model_service):
+    interval = model_service.predict_interval(PRICES, 200, [0.05, 0.5, 0.95])
+
+    assert interval["samples"] == 200
+    bands = [band["predicted_price"] for band in interval["quantiles"]]
+    assert bands == sorted(bands)
+    assert interval["std_price"] > 0
+    assert bands[0] < interval["mean_price"] < bands[-1]
+
+
+def test_forecast_interval_has_one_band_set_per_day(model_service):
+    result = model_service.forecast_interval(PRICES, 4, 50, [0.1, 0.9])
+    assert len(result["days"]) == 4
+    for day in result["days"]:
+        low, high = (band["predicted_price"] for band in day)
+        assert low <= high
+
+    steps = list(model_service.forecast_interval_steps(PRICES, 4, 50, [0.1, 0.9]))
+    assert len(steps) == 4
+
+
+def test_manual_prediction_returns_the_uncertainty(client):
+    response = client.post("/predict", json={"prices": PRICES, "mc_samples": 100, "quantiles": [0.1, 0.9]})
+    assert response.status_code == 200
+    uncertainty = response.json()["uncertainty"]
+    assert uncertainty["samples"] == 100
+    assert [band["quantile"] for band in uncertainty["quantiles"]] == [0.1, 0.9]
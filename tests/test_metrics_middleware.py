@@ -0,0 +1,67 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.middleware.metrics import UNMATCHED_ROUTE, MetricsMiddleware
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="not found")
+        return {"id": item_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"{i}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def _count(endpoint: str, status: str, method: str = "GET") -> float:
+    value = REGISTRY.get_sample_value(
+        "http_requests_total", {"method": method, "endpoint": endpoint, "status_code": status}
+    )
+    return value or 0.0
+
+
+def _active() -> float:
+    return REGISTRY.get_sample_value("http_active_requests") or 0.0
+
+
+def test_requests_are_labelled_by_route_template_and_status():
+    client = TestClient(_app())
+    ok, missing = _count("/items/{item_id}", "200"), _count("/items/{item_id}", "404")
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/items/0")
+
+    assert _count("/items/{item_id}", "200") == ok + 2
+    assert _count("/items/{item_id}", "404") == missing + 1
+    assert _count("/items/1", "200") == 0
+
+
+def test_unknown_paths_share_one_label():
+    client = TestClient(_app())
+    before = _count(UNMATCHED_ROUTE, "404")
+    client.get("/wp-admin/setup.php")
+    client.get("/random/123")
+    assert _count(UNMATCHED_ROUTE, "404") == before + 2
+
+
+def test_streaming_response_is_counted_once_and_body_is_untouched():
+    client = TestClient(_app())
+    before = _count("/stream", "200")
+    assert client.get("/stream").text == "0\n1\n2\n"
+    assert _count("/stream", "200") == before + 1
+    assert _active() == 0
@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from app.config import METADATA_PATH, MODEL_PATH
+from app.services.model_registry import ModelRegistry
+
+pytestmark = pytest.mark.anyio
+
+BEST_PATH = os.path.join(os.path.dirname(MODEL_PATH), "lstm_petr4_best.keras")
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    shutil.copy(MODEL_PATH, tmp_path / "default.keras")
+    shutil.copy(METADATA_PATH, tmp_path / "default.json")
+    shutil.copy(MODEL_PATH, tmp_path / "vale.keras")
+    metadata = json.loads(open(METADATA_PATH, encoding="utf-8").read())
+    (tmp_path / "vale.json").write_text(json.dumps({**metadata, "symbol": "VALE3.SA"}))
+    shutil.copy(MODEL_PATH, tmp_path / "ignored.keras")
+    return tmp_path
+
+
+def _registry(models_dir, names=("vale",)) -> ModelRegistry:
+    return ModelRegistry(
+        str(models_dir),
+        str(models_dir / "default.keras"),
+        str(models_dir / "default.json"),
+        [1],
+        names=list(names),
+    )
+
+
+async def test_loads_the_default_and_the_listed_models(models_dir):
+    registry = _registry(models_dir)
+    await registry.load_all()
+    assert registry.ready
+    assert sorted(registry.services()) == ["default", "vale"]
+
+    everything = _registry(models_dir, names=("*",))
+    await everything.load_all()
+    assert sorted(everything.services()) == ["default", "ignored", "vale"]
+
+
+async def test_resolve_by_name_version_and_symbol(models_dir):
+    registry = _registry(models_dir)
+    await registry.load_all()
+    vale = registry.services()["vale"]
+
+    assert registry.resolve() is registry.default
+    assert registry.resolve(symbol="VALE3.SA") is vale
+    assert registry.resolve(symbol="ITUB4.SA") is registry.default
+    assert registry.resolve(f"vale@{vale.version}") is vale
+    with pytest.raises(KeyError):
+        registry.resolve("vale@000000000000")
+    with pytest.raises(KeyError):
+        registry.resolve("missing")
+
+
+async def test_resolve_before_loading_signals_not_ready(models_dir):
+    with pytest.raises(LookupError):
+        _registry(models_dir).resolve()
+
+
+async def test_changed_artifact_is_swapped_after_two_stable_scans(models_dir):
+    registry = _registry(models_dir)
+    await registry.load_all()
+    old = registry.services()["vale"]
+
+    shutil.copy(BEST_PATH, models_dir / "vale.keras")
+    await registry.check_for_updates()
+    assert registry.services()["vale"] is old         # primeira varredura: só anota
+
+    await registry.check_for_updates()
+    new = registry.services()["vale"]
+    assert new.version != old.version
+    assert new.ready
+    await registry.stop()
+
+
+async def test_model_is_removed_only_after_two_scans_without_it(models_dir):
+    registry = _registry(models_dir)
+    await registry.load_all()
+
+    hidden = models_dir / "vale.keras.copying"
+    os.replace(models_dir / "vale.keras", hidden)
+    await registry.check_for_updates()
+    assert "vale" in registry.services()              # ausência pontual (cópia em andamento)
+
+    os.replace(hidden, models_dir / "vale.keras")
+    await registry.check_for_updates()
+    os.replace(models_dir / "vale.keras", hidden)
+    await registry.check_for_updates()
+    assert "vale" in registry.services()              # as ausências não foram seguidas
+
+    await registry.check_for_updates()
+    assert sorted(registry.services()) == ["default"]
+
+
+async def test_default_model_is_never_removed(models_dir):
+    registry = _registry(models_dir)
+    await registry.load_all()
+    os.remove(models_dir / "default.keras")
+    for _ in range(3):
+        await registry.check_for_updates()
+    assert registry.ready
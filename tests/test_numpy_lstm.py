@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.config import LOOK_BACK, MODEL_PATH, NUMPY_BACKEND_TOLERANCE
+from app.services.numpy_lstm import NumpyLSTM, max_abs_diff_vs_keras
+
+
+@pytest.fixture(scope="module")
+def numpy_model() -> NumpyLSTM:
+    return NumpyLSTM.from_keras(MODEL_PATH)
+
+
+def _windows(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0, 0.02, size=(n, LOOK_BACK))
+    steps[:, 0] = 0.0
+    return np.exp(np.cumsum(steps, axis=1))[..., np.newaxis]
+
+
+def test_predict_mirrors_keras_output_shape(numpy_model):
+    out = numpy_model.predict(_windows(4), verbose=0)
+    assert out.shape == (4, 1)
+    assert out.dtype == np.float32
+    # Janelas normalizadas em 1.0 → ratios próximos de 1
+    assert np.all((out > 0.5) & (out < 1.5))
+
+
+def test_sliced_batches_match_a_single_forward_pass(numpy_model):
+    X = _windows(10)
+    # Só a ordem de acumulação do BLAS muda com o tamanho do lote
+    np.testing.assert_allclose(
+        numpy_model.predict(X, batch_size=3), numpy_model.predict(X, batch_size=10), rtol=1e-6
+    )
+
+
+def test_export_round_trip_is_exact(numpy_model, tmp_path):
+    prefix = str(tmp_path / "weights")
+    numpy_model.export(prefix)
+    exported = NumpyLSTM.from_export(prefix)
+
+    X = _windows(8)
+    np.testing.assert_array_equal(exported.predict(X), numpy_model.predict(X))
+    # Só os arquivos finais: nenhum temporário sobra após o rename
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["weights.json", "weights.npy"]
+
+
+def test_matches_keras_within_tolerance():
+    pytest.importorskip("tensorflow")
+    assert max_abs_diff_vs_keras(MODEL_PATH, n_samples=32) <= NUMPY_BACKEND_TOLERANCE
@@ -0,0 +1,99 @@
+import json
+import shutil
+
+import numpy as np
+import pytest
+
+from app.config import LOOK_BACK, METADATA_PATH, MODEL_PATH
+from app.services.model_service import ModelService, artifact_version
+from app.services.numpy_lstm import NumpyLSTM, quantize_int8
+from app.services.precision import approval_path, approval_status
+
+WINDOWS = 30 + np.cumsum(np.random.default_rng(0).normal(0, 0.3, (6, LOOK_BACK)), axis=1)
+
+
+@pytest.fixture(scope="module")
+def float32_model() -> NumpyLSTM:
+    return NumpyLSTM.from_keras(MODEL_PATH)
+
+
+@pytest.fixture
+def model_copy(tmp_path):
+    path = str(tmp_path / "lstm.keras")
+    shutil.copy(MODEL_PATH, path)
+    return path
+
+
+def _write_report(model_path: str, version: str, approved: bool) -> None:
+    report = {
+        "version": version,
+        "max_mape_drift": 0.05,
+        "variants": {"int8": {"approved": approved, "mape_drift": 0.01 if approved else 0.2}},
+    }
+    with open(approval_path(model_path), "w", encoding="utf-8") as f:
+        json.dump(report, f)
+
+
+def test_int8_quantization_error_is_within_half_a_step():
+    weights = np.random.default_rng(1).normal(0, 0.5, (16, 8)).astype(np.float32)
+    weights[:, 3] = 0.0
+    q, scale = quantize_int8(weights)
+
+    assert q.dtype == np.int8 and scale.shape == (8,)
+    assert scale[3] == 1.0                              # coluna nula não divide por zero
+    assert np.all(np.abs(q * scale - weights) <= scale / 2 + 1e-7)
+
+
+def test_precision_variants(float32_model):
+    X = (WINDOWS / WINDOWS[:, :1])[..., np.newaxis]
+    reference = float32_model.predict(X)
+
+    assert float32_model.with_precision("float32") is float32_model
+    float64 = float32_model.with_precision("float64")
+    int8 = float32_model.with_precision("int8")
+    assert (float64.precision, int8.precision) == ("float64", "int8")
+    assert int8.weights_nbytes < float32_model.weights_nbytes
+    np.testing.assert_allclose(float64.predict(X), reference, rtol=1e-5)
+    np.testing.assert_allclose(int8.predict(X), reference, rtol=2e-2)
+    with pytest.raises(ValueError):
+        int8.with_precision("float64")
+
+
+def test_int8_requires_an_approved_report_for_the_same_version(model_copy):
+    version = artifact_version(model_copy)
+    assert approval_status(model_copy, version, "float32")[0]
+    assert not approval_status(model_copy, version, "int8")[0]
+
+    _write_report(model_copy, version, approved=True)
+    assert approval_status(model_copy, version, "int8")[0]
+    assert not approval_status(model_copy, "000000000000", "int8")[0]
+
+    _write_report(model_copy, version, approved=False)
+    assert not approval_status(model_copy, version, "int8")[0]
+
+
+def test_unapproved_int8_is_served_in_float32(model_copy):
+    service = ModelService(model_copy, METADATA_PATH, backend="numpy", precision="int8")
+    assert service.precision == "float32"
+
+    _write_report(model_copy, artifact_version(model_copy), approved=True)
+    assert ModelService(model_copy, METADATA_PATH, backend="numpy", precision="int8").precision == "int8"
+
+
+@pytest.mark.parametrize("precision", ["float32", "float64"])
+def test_every_path_normalizes_in_the_served_precision(precision):
+    service = ModelService(MODEL_PATH, METADATA_PATH, backend="numpy", precision=precision)
+    dtype = np.float64 if precision == "float64" else np.float32
+    assert service._normalize_windows(WINDOWS).dtype == dtype
+
+    for window in WINDOWS:
+        normalized, ref_price = service._normalize(list(window))
+        assert normalized.tobytes() == service._normalize_windows(window[np.newaxis])[0].tobytes()
+        assert ref_price == window[0]
+
+        # Mesma janela, mesmo resultado: /predict, lote (tabela, backtest) e forecast
+        single = service.predict(list(window))
+        batch = service.predict_windows(window[np.newaxis])
+        assert single["predicted_ratio"] == batch["predicted_ratio"][0]
+        assert single["predicted_price"] == batch["predicted_price"][0]
+        assert service.forecast(list(window), 1)[0]["predicted_price"] == single["predicted_price"]
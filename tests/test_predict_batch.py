@@ -0,0 +1,59 @@
+import numpy as np
+
+from app.config import LOOK_BACK
+
+
+def _window(start: float) -> list[float]:
+    # Múltiplos de 1/4: exatos em float32, o corpo binário representa os mesmos preços
+    return [start + 0.25 * (i % 8) for i in range(LOOK_BACK)]
+
+
+def test_batch_keeps_request_order_and_reports_invalid_windows(client):
+    windows = [_window(30.0), [1.0] * 10, _window(40.0)]
+    response = client.post(
+        "/predict/batch", json={"windows": windows, "symbols": ["A", "B", None]}
+    )
+    assert response.status_code == 200
+    body = response.json()
+
+    assert (body["count"], body["succeeded"], body["failed"]) == (3, 2, 1)
+    assert [item["index"] for item in body["results"]] == [0, 1, 2]
+    assert [item["status"] for item in body["results"]] == ["ok", "error", "ok"]
+    assert [item["symbol"] for item in body["results"]] == ["A", "B", "N/A"]
+    assert body["results"][1]["error"]
+
+
+def test_batch_items_match_single_predictions(client):
+    windows = [_window(30.0), _window(40.0)]
+    batch = client.post("/predict/batch", json={"windows": windows}).json()["results"]
+    for window, item in zip(windows, batch):
+        single = client.post("/predict", json={"prices": window}).json()
+        assert item["predicted_price"] == single["predicted_price"]
+        assert item["reference_price"] == single["reference_price"]
+
+
+def test_binary_body_matches_json_body(client):
+    windows = [_window(30.0), _window(35.0)]
+    as_json = client.post("/predict/batch", json={"windows": windows}).json()["results"]
+    as_binary = client.post(
+        "/predict/batch",
+        content=np.asarray(windows, dtype="<f4").tobytes(),
+        headers={"content-type": "application/octet-stream"},
+    ).json()["results"]
+    assert [r["predicted_price"] for r in as_binary] == [r["predicted_price"] for r in as_json]
+
+
+def test_binary_body_with_a_partial_window_is_rejected(client):
+    response = client.post(
+        "/predict/batch",
+        content=b"\x00" * (LOOK_BACK * 4 + 2),
+        headers={"content-type": "application/octet-stream"},
+    )
+    assert response.status_code == 422
+
+
+def test_symbols_must_align_with_windows(client):
+    response = client.post(
+        "/predict/batch", json={"windows": [_window(30.0)], "symbols": ["A", "B"]}
+    )
+    assert response.status_code == 422
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from app.config import METADATA_PATH, MODEL_PATH, MODELS_DIR
+from app.services.data_service import price_cache
+from app.services.market_calendar import last_closed_session, market_now, sessions_until
+from app.services.model_registry import ModelRegistry
+from app.services.prediction_table import PredictionScheduler, PredictionTable, model_label
+
+pytestmark = pytest.mark.anyio
+
+SESSION = last_closed_session()
+PREVIOUS = sessions_until(SESSION, 2)[0].astype(object)
+
+
+@pytest.fixture
+async def registry():
+    registry = ModelRegistry(MODELS_DIR, MODEL_PATH, METADATA_PATH, [1])
+    await registry.load_all()
+    yield registry
+    await registry.stop()
+
+
+@pytest.fixture
+def watchlist(price_source):
+    price_source.add_sessions("PETR4.SA", 80)
+    price_source.add_sessions("VALE3.SA", 80, last=PREVIOUS)   # fechamento ainda não publicado
+    return price_source
+
+
+def _scheduler(registry, table=None, **kwargs) -> PredictionScheduler:
+    return PredictionScheduler(
+        table or PredictionTable(), registry, ["PETR4.SA", "VALE3.SA", "NOPE.SA"],
+        forecast_days=3, check_interval=10, max_retry_interval=25, **kwargs,
+    )
+
+
+async def test_full_refresh_publishes_predictions_and_forecasts(registry, watchlist):
+    scheduler = _scheduler(registry)
+    await scheduler.refresh()
+    table = scheduler.table
+    label = model_label(registry.default)
+
+    assert sorted(table.entries()) == ["PETR4.SA", "VALE3.SA"]
+    entry = table.lookup("PETR4.SA", label)
+    assert entry is not None
+    assert len(entry["forecast"]) == 3
+    expected = registry.default.predict(entry["window"]["prices"])
+    assert entry["prediction"]["predicted_price"] == pytest.approx(expected["predicted_price"], abs=1e-4)
+
+    assert table.lookup("PETR4.SA", "other@000") is None
+    # Janela incompleta: vale só até a próxima tentativa
+    assert table.entries()["VALE3.SA"]["valid_until"] < market_now() + timedelta(hours=1)
+
+
+async def test_incomplete_and_missing_symbols_are_retried_alone_with_backoff(registry, watchlist):
+    scheduler = _scheduler(registry)
+    await scheduler.refresh()
+    assert scheduler._pending_symbols() == []
+
+    delays = []
+    for attempt in range(1, 4):
+        due = max(retry_at for _, retry_at in scheduler._retries.values())
+        assert scheduler._pending_symbols(due + timedelta(seconds=1)) == ["VALE3.SA", "NOPE.SA"]
+        attempts, retry_at = scheduler._retries["NOPE.SA"]
+        assert attempts == attempt
+        delays.append(retry_at)
+        price_cache.clear()
+        await scheduler.refresh(["VALE3.SA", "NOPE.SA"])
+
+    gaps = [(b - a).total_seconds() for a, b in zip(delays, delays[1:])]
+    assert gaps[0] == pytest.approx(20 - 10, abs=1)   # 10 s → 20 s → 25 s (teto)
+    assert gaps[1] == pytest.approx(25 - 20, abs=1)
+
+
+async def test_partial_refresh_keeps_the_other_entries(registry, watchlist):
+    scheduler = _scheduler(registry)
+    await scheduler.refresh()
+    petr4 = scheduler.table.entries()["PETR4.SA"]
+
+    watchlist.add_sessions("VALE3.SA", 80)                     # fechamento publicado
+    price_cache.clear()
+    await scheduler.refresh(["VALE3.SA", "NOPE.SA"])
+
+    entries = scheduler.table.entries()
+    assert entries["PETR4.SA"] is petr4
+    assert entries["VALE3.SA"]["window"]["last_date"] == SESSION.isoformat()
+    assert set(scheduler._retries) == {"NOPE.SA"}
+
+
+async def test_new_session_or_model_recomputes_the_whole_watchlist(registry, watchlist):
+    scheduler = _scheduler(registry)
+    await scheduler.refresh()
+
+    entries = scheduler.table.entries()
+    entries["PETR4.SA"] = {**entries["PETR4.SA"], "model": "old@000000000000"}
+    scheduler.table.replace(entries, SESSION)
+    assert scheduler._pending_symbols() == ["PETR4.SA", "VALE3.SA", "NOPE.SA"]
+
+    scheduler.table.replace(scheduler.table.entries(), PREVIOUS)
+    assert scheduler._pending_symbols() == ["PETR4.SA", "VALE3.SA", "NOPE.SA"]
+
+
+async def test_followers_load_the_leader_snapshot(registry, watchlist, tmp_path):
+    path = str(tmp_path / "table.json")
+    leader = _scheduler(registry, snapshot_path=path)
+    await leader.refresh()
+
+    follower = _scheduler(registry, snapshot_path=path)
+    assert follower._load_snapshot()
+    assert not follower._load_snapshot()                         # sem mudança, sem releitura
+
+    loaded, original = follower.table.entries(), leader.table.entries()
+    assert sorted(loaded) == sorted(original)
+    assert loaded["PETR4.SA"]["valid_until"] == original["PETR4.SA"]["valid_until"]
+    np.testing.assert_allclose(
+        [day["predicted_price"] for day in loaded["PETR4.SA"]["forecast"]],
+        [day["predicted_price"] for day in original["PETR4.SA"]["forecast"]],
+    )
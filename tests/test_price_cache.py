@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import data_service
+from app.services.data_service import PriceCache, cache_expiry, fetch_prices
+from app.services.market_calendar import MARKET_TZ, last_closed_session, next_session_close
+
+
+def _at(hour: int) -> datetime:
+    return datetime(2026, 10, 14, hour, tzinfo=MARKET_TZ)  # quarta-feira, dia de pregão
+
+
+def test_entries_expire_at_their_deadline(monkeypatch):
+    cache = PriceCache(max_entries=4)
+    now = _at(10)
+    monkeypatch.setattr(data_service, "market_now", lambda: now)
+    cache.put(("PETR4.SA", 60), {"last_date": "2026-10-13"}, expires_at=_at(18))
+    assert cache.get(("PETR4.SA", 60)) == {"last_date": "2026-10-13"}
+
+    now = _at(18)
+    assert cache.get(("PETR4.SA", 60)) is None
+    assert cache.get(("PETR4.SA", 60)) is None  # removida, não só ignorada
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    monkeypatch.setattr(data_service, "market_now", lambda: _at(10))
+    cache = PriceCache(max_entries=2)
+    cache.put(("A", 60), {"v": "a"}, _at(18))
+    cache.put(("B", 60), {"v": "b"}, _at(18))
+    cache.get(("A", 60))                       # A passa a ser a mais recente
+    cache.put(("C", 60), {"v": "c"}, _at(18))
+
+    assert cache.get(("B", 60)) is None
+    assert cache.get(("A", 60)) == {"v": "a"}
+    assert cache.get(("C", 60)) == {"v": "c"}
+
+
+def test_complete_window_lives_until_the_next_close():
+    window = {"last_date": last_closed_session().isoformat()}
+    assert cache_expiry(window) == next_session_close()
+
+
+def test_stale_window_gets_the_short_ttl(monkeypatch):
+    monkeypatch.setattr(data_service, "PRICE_CACHE_STALE_TTL_S", 120.0)
+    now = _at(20)
+    monkeypatch.setattr(data_service, "market_now", lambda: now)
+    monkeypatch.setattr(data_service, "last_closed_session", lambda: now.date())
+
+    stale = {"last_date": (now.date() - timedelta(days=1)).isoformat()}
+    assert cache_expiry(stale) == now + timedelta(seconds=120)
+
+
+def test_fetch_prices_downloads_once_per_symbol_and_size(price_source):
+    price_source.add_sessions("PETR4.SA", 80)
+
+    first = fetch_prices("PETR4.SA", 60)
+    first["prices"] = []                        # cópia: não altera a entrada em cache
+    second = fetch_prices("petr4.sa", 60)
+    fetch_prices("PETR4.SA", 30)
+
+    assert len(second["prices"]) == 60
+    assert second["last_date"] == last_closed_session().isoformat()
+    assert price_source.calls == [("fetch", ("PETR4.SA",)), ("fetch", ("PETR4.SA",))]
+
+
+def test_missing_symbol_is_not_cached(price_source):
+    with pytest.raises(ValueError, match="No market data"):
+        fetch_prices("NOPE.SA")
+    with pytest.raises(ValueError):
+        fetch_prices("NOPE.SA")
+    assert len(price_source.calls) == 2
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from pydantic import BaseModel
+
+from app.middleware.timing import TimedRoute, stage
+from app.routers import monitoring
+from app.services import profiler
+from app.services.profiler import ProfilerBusy, collapse, sample_stacks
+
+
+class _Body(BaseModel):
+    value: int
+
+
+def _app() -> FastAPI:
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.post("/work")
+    async def work(body: _Body):
+        with stage("inference"):
+            time.sleep(0.01)
+        with stage("inference"):
+            time.sleep(0.01)
+        return {"value": body.value}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/timed")
+    return app
+
+
+def _stage(name: str, stat: str = "count") -> float:
+    value = REGISTRY.get_sample_value(
+        f"request_stage_duration_seconds_{stat}", {"endpoint": "/timed/work", "stage": name}
+    )
+    return value or 0.0
+
+
+def test_stage_is_noop_outside_requests():
+    with stage("inference"):
+        pass
+
+
+def test_timed_route_records_one_observation_per_stage():
+    client = TestClient(_app())
+    before = {name: _stage(name) for name in ("validation", "inference", "serialization")}
+    inference_sum = _stage("inference", "sum")
+
+    assert client.post("/timed/work", json={"value": 1}).status_code == 200
+
+    for name, count in before.items():
+        assert _stage(name) == count + 1
+    # Os dois blocos "inference" somam em uma única observação
+    assert _stage("inference", "sum") - inference_sum >= 0.02
+
+
+def test_invalid_body_only_records_validation():
+    client = TestClient(_app())
+    validation, inference = _stage("validation"), _stage("inference")
+
+    assert client.post("/timed/work", json={"value": "x"}).status_code == 422
+
+    assert _stage("validation") == validation + 1
+    assert _stage("inference") == inference
+
+
+def _busy(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_collapses_thread_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        stacks, rounds = sample_stacks(0.1, 0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert rounds > 0
+    busy = [stack for stack in stacks if stack.startswith("busy-worker;")]
+    assert busy and all("test_request_timing.py:_busy" in stack for stack in busy)
+    lines = collapse(stacks).splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_only_one_profile_runs_at_a_time():
+    with profiler._lock:
+        with pytest.raises(ProfilerBusy):
+            sample_stacks(0.01, 0.005)
+
+
+def test_profile_route_requires_token(client, monkeypatch):
+    monkeypatch.setattr(monitoring, "PROFILE_TOKEN", "")
+    assert client.get("/monitoring/profile").status_code == 404
+
+    monkeypatch.setattr(monitoring, "PROFILE_TOKEN", "secret")
+    assert client.get("/monitoring/profile", headers={"X-Profile-Token": "wrong"}).status_code == 403
+
+    response = client.get(
+        "/monitoring/profile",
+        params={"seconds": 0.05, "interval_ms": 5},
+        headers={"X-Profile-Token": "secret"},
+    )
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from app.config import LOOK_BACK
+from app.services.model_service import ResultCache
+
+pytestmark = pytest.mark.anyio
+
+
+def _prices(start: float) -> list[float]:
+    return [start + 0.25 * (i % 8) for i in range(LOOK_BACK)]
+
+
+def test_key_depends_on_version_and_window_bytes():
+    window = np.linspace(1.0, 1.1, LOOK_BACK, dtype=np.float32)
+    assert ResultCache.key(window, "v1") == ResultCache.key(window.copy(), "v1")
+    assert ResultCache.key(window, "v1") != ResultCache.key(window, "v2")
+    assert ResultCache.key(window, "v1") != ResultCache.key(window.astype(np.float64), "v1")
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = ResultCache("test-lru", max_entries=2)
+    cache.put(b"a", 1.0)
+    cache.put(b"b", 2.0)
+    assert cache.get(b"a") == 1.0  # "a" passa a ser o mais recente
+    cache.put(b"c", 3.0)
+
+    assert len(cache) == 2
+    assert cache.get(b"b") is None
+    assert (cache.get(b"a"), cache.get(b"c")) == (1.0, 3.0)
+    cache.clear()
+    assert len(cache) == 0 and cache.get(b"a") is None
+
+
+def _count_inferences(model_service, monkeypatch) -> list[int]:
+    calls = []
+    infer = model_service._infer
+
+    def counted(X):
+        calls.append(len(X))
+        return infer(X)
+
+    monkeypatch.setattr(model_service, "_infer", counted)
+    return calls
+
+
+def test_predict_reuses_ratios_of_proportional_windows(model_service, monkeypatch):
+    model_service.clear_result_cache()
+    calls = _count_inferences(model_service, monkeypatch)
+
+    first = model_service.predict(_prices(30.0))
+    again = model_service.predict(_prices(30.0))
+    # Preços proporcionais normalizam para a mesma janela
+    doubled = model_service.predict([2 * p for p in _prices(30.0)])
+
+    assert calls == [1]
+    assert again == {**first, "inference_time_ms": 0.0}
+    assert doubled["predicted_ratio"] == first["predicted_ratio"]
+    assert doubled["predicted_price"] == pytest.approx(2 * first["predicted_price"], abs=1e-3)  # arredondado a 4 casas
+
+    model_service.clear_result_cache()
+    model_service.predict(_prices(30.0))
+    assert calls == [1, 1]
+
+
+async def test_predict_async_hits_the_cache_filled_by_predict(model_service, monkeypatch):
+    model_service.clear_result_cache()
+    calls = _count_inferences(model_service, monkeypatch)
+
+    expected = model_service.predict(_prices(40.0))
+    cached = await model_service.predict_async(_prices(40.0))
+
+    assert calls == [1]
+    assert cached["predicted_price"] == expected["predicted_price"]
+    assert cached["inference_time_ms"] == 0.0
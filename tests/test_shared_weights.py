@@ -0,0 +1,101 @@
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from app.config import MODEL_PATH
+from app.services.leader import LeaderLock, file_lock
+from app.services.numpy_lstm import _EXPORT_FORMAT, NumpyLSTM
+
+
+def test_only_one_leader_at_a_time(tmp_path):
+    path = str(tmp_path / "background.lock")
+    first, second = LeaderLock(path), LeaderLock(path)
+
+    assert first.acquire()
+    assert first.acquire()          # idempotente para o detentor
+    assert not second.acquire()
+    assert not second.held
+
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def _hold_and_record(path: str, log: str, barrier) -> None:
+    barrier.wait()
+    with file_lock(path):
+        with open(log, "a") as f:
+            f.write(f"enter {os.getpid()}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with open(log, "a") as f:
+            f.write(f"exit {os.getpid()}\n")
+
+
+def _load_shared(prefix: str, log: str, barrier, queue) -> None:
+    original = NumpyLSTM.export
+
+    def export(self, target):
+        with open(log, "a") as f:
+            f.write(f"{os.getpid()}\n")
+        original(self, target)
+
+    NumpyLSTM.export = export
+    barrier.wait()
+    model = NumpyLSTM.load_shared(MODEL_PATH, prefix)
+    queue.put((os.stat(f"{prefix}.npy").st_ino, float(model.predict(np.ones((1, 60, 1)))[0, 0])))
+
+
+def _start(ctx, target, args: tuple, n: int) -> list:
+    processes = [ctx.Process(target=target, args=args) for _ in range(n)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def _join(processes: list) -> None:
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+
+def test_file_lock_serializes_processes(tmp_path):
+    log = str(tmp_path / "log")
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(3)  # referência mantida até os filhos terminarem
+    _join(_start(ctx, _hold_and_record, (str(tmp_path / "x.lock"), log, barrier), 3))
+
+    lines = open(log).read().split()
+    # Cada "enter" é seguido do "exit" do mesmo processo: nenhuma sobreposição
+    events = list(zip(lines[::2], lines[1::2]))
+    assert len(events) == 6
+    for (enter, pid), (exit_, pid_after) in zip(events[::2], events[1::2]):
+        assert (enter, exit_) == ("enter", "exit")
+        assert pid == pid_after
+
+
+def test_concurrent_cold_starts_export_once_and_share_the_file(tmp_path):
+    prefix = str(tmp_path / "weights" / "lstm")
+    log = str(tmp_path / "exports.log")
+    ctx = multiprocessing.get_context("spawn")
+    queue, barrier = ctx.Queue(), ctx.Barrier(4)
+    processes = _start(ctx, _load_shared, (prefix, log, barrier, queue), 4)
+    results = [queue.get(timeout=60) for _ in processes]
+    _join(processes)
+
+    assert len(open(log).read().split()) == 1
+    assert len({inode for inode, _ in results}) == 1
+    assert len({output for _, output in results}) == 1
+
+
+def test_outdated_export_is_replaced(tmp_path):
+    prefix = str(tmp_path / "lstm")
+    NumpyLSTM.from_keras(MODEL_PATH).export(prefix)
+    manifest = json.loads(open(f"{prefix}.json").read())
+    with open(f"{prefix}.json", "w") as f:
+        json.dump({**manifest, "format": 1}, f)
+
+    NumpyLSTM.load_shared(MODEL_PATH, prefix)
+    assert NumpyLSTM._export_format(prefix) == _EXPORT_FORMAT
@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.data_service import SingleFlight
+
+
+def _run_concurrently(flight: SingleFlight, keys: list[tuple], fn) -> list:
+    """Dispara `flight.do` para cada chave em threads e devolve resultados ou exceções."""
+    def call(key):
+        try:
+            return flight.do(key, fn)
+        except Exception as exc:  # noqa: BLE001 - o teste inspeciona a exceção
+            return exc
+
+    with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+        return list(pool.map(call, keys))
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"prices": [1.0]}
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = _run_concurrently(flight, [("PETR4.SA", 60)] * 6, load)
+    timer.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_leader_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def load():
+        release.wait(timeout=5)
+        raise ValueError("No market data found for symbol 'NOPE.SA'.")
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = _run_concurrently(flight, [("NOPE.SA", 60)] * 4, load)
+    timer.join()
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_distinct_keys_do_not_wait_for_each_other():
+    flight = SingleFlight()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def load():
+        barrier.wait()  # só passa se as duas chaves executarem ao mesmo tempo
+        return {}
+
+    results = _run_concurrently(flight, [("A", 60), ("B", 60)], load)
+    assert results == [{}, {}]
+
+
+def test_finished_flight_does_not_serve_stale_results():
+    flight = SingleFlight()
+    assert flight.do(("A", 60), lambda: {"n": 1}) == {"n": 1}
+    assert flight.do(("A", 60), lambda: {"n": 2}) == {"n": 2}
+    with pytest.raises(KeyError):
+        flight.do(("A", 60), lambda: {}["missing"])
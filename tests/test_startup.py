@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.config import LOOK_BACK, METADATA_PATH, MODEL_PATH, MODELS_DIR
+from app.routers import health, predict
+from app.services.model_registry import ModelRegistry
+from app.services.model_service import ModelService
+
+pytestmark = pytest.mark.anyio
+
+
+def test_importing_the_app_does_not_import_heavy_backends():
+    code = (
+        "import sys, app.main; "
+        "print(sorted(m for m in ('tensorflow', 'keras', 'h5py', 'yfinance') if m in sys.modules))"
+    )
+    env = {**os.environ, "INFERENCE_BACKEND": "keras"}
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+
+async def test_routes_answer_503_until_the_default_model_is_warm():
+    app = FastAPI()
+    app.include_router(health.router)
+    app.include_router(predict.router, prefix="/predict")
+    registry = ModelRegistry(MODELS_DIR, MODEL_PATH, METADATA_PATH, [1], warmup_rounds=1)
+    app.state.model_registry = registry
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        health_response = await client.get("/health")
+        assert health_response.status_code == 503
+        assert health_response.json()["status"] == "degraded"
+
+        predict_response = await client.post("/predict", json={"prices": [30.0] * LOOK_BACK})
+        assert predict_response.status_code == 503
+        assert predict_response.headers["retry-after"]
+
+        await registry.load_all()
+        assert (await client.get("/health")).json()["status"] == "healthy"
+        assert (await client.post("/predict", json={"prices": [30.0] * LOOK_BACK})).status_code == 200
+    await registry.stop()
+
+
+def test_start_up_records_every_phase():
+    service = ModelService(MODEL_PATH, METADATA_PATH, backend="numpy", load=False)
+    service.start_up([1, 4], warmup_rounds=1)
+    assert service.ready
+    assert {"import", "load", "warmup"} <= set(service.startup_phases_ms)
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.config import LOOK_BACK, METADATA_PATH, MODEL_PATH, MODELS_DIR
+from app.services.model_registry import ModelRegistry
+from app.services.subscription_hub import Subscriber, SubscriptionHub
+
+SYMBOL = "ITUB4.SA"
+
+
+@pytest.fixture
+def prices(price_source):
+    price_source.add_sessions(SYMBOL, LOOK_BACK + 10)
+    return price_source
+
+
+def _drain(subscriber: Subscriber) -> list[dict]:
+    messages = []
+    while not subscriber.queue.empty():
+        messages.append(subscriber.queue.get_nowait()[0])
+    return messages
+
+
+@pytest.mark.anyio
+async def test_slow_subscriber_loses_the_oldest_messages():
+    subscriber = Subscriber(max_queue=2)
+    for i in range(4):
+        subscriber.deliver({"n": i})
+    assert _drain(subscriber) == [{"n": 2}, {"n": 3}]
+
+
+@pytest.mark.anyio
+async def test_one_refresh_loop_fans_out_to_every_subscriber(prices):
+    registry = ModelRegistry(MODELS_DIR, MODEL_PATH, METADATA_PATH, [1])
+    await registry.load_all()
+    hub = SubscriptionHub(registry, None, refresh_interval=0.02)
+    first, second = Subscriber(10), Subscriber(10)
+    try:
+        hub.subscribe(first, SYMBOL)
+        hub.subscribe(second, SYMBOL.lower())
+        assert len(hub._topics) == 1
+
+        await asyncio.sleep(0.3)                   # vários intervalos de refresh
+        received = _drain(first)
+        # Sem fechamento novo nem troca de modelo: uma única predição publicada
+        assert [m["type"] for m in received] == ["prediction"]
+        assert _drain(second) == received
+        assert received[0]["symbol"] == SYMBOL
+        assert prices.calls == [("fetch", (SYMBOL,))]
+
+        late = Subscriber(10)
+        hub.subscribe(late, SYMBOL)
+        assert _drain(late) == received            # último valor, sem esperar o refresh
+
+        for subscriber in (first, second, late):
+            hub.unsubscribe_all(subscriber)
+        assert hub._topics == {}
+    finally:
+        await hub.stop()
+        await registry.stop()
+
+
+def test_websocket_subscription_flow(client, prices):
+    with client.websocket_connect(f"/predict/ws?symbols={SYMBOL}") as ws:
+        assert ws.receive_json() == {"type": "subscriptions", "symbols": [SYMBOL]}
+        prediction = ws.receive_json()
+        assert prediction["type"] == "prediction"
+        assert prediction["symbol"] == SYMBOL
+        assert prediction["predicted_price"] > 0
+
+        ws.send_json({"action": "rename", "symbols": [SYMBOL]})
+        assert ws.receive_json()["type"] == "error"
+
+        ws.send_json({"action": "unsubscribe", "symbols": [SYMBOL]})
+        assert ws.receive_json() == {"type": "subscriptions", "symbols": []}